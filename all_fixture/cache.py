@@ -0,0 +1,94 @@
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from all_fixture.transactions import on_commit_once
+
+# Пространства имён кэша витрин (горящие и популярные предложения на главной)
+HOTELS_SHOWCASE = "hotels_showcase"
+TOURS_SHOWCASE = "tours_showcase"
+# Кластеры отелей на карте (по уровням масштаба)
+HOTELS_MAP = "hotels_map"
+
+SHOWCASE_TIMEOUT = 60 * 15
+# Устаревшая копия отдаётся, пока другой воркер пересчитывает значение
+STALE_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_cache_version(namespace):
+    """Текущая версия пространства имён кэша."""
+    return cache.get_or_set(f"cache_version:{namespace}", 1, None)
+
+
+def bump_cache_version(*namespaces):
+    """
+    Инвалидирует пространства имён кэша после фиксации транзакции.
+    Старые ключи не удаляются, а перестают читаться и истекают сами.
+    Повторные вызовы с теми же пространствами имён в одной транзакции дают одну инвалидацию.
+    """
+
+    def bump():
+        for namespace in namespaces:
+            key = f"cache_version:{namespace}"
+            cache.add(key, 1, None)
+            cache.incr(key)
+
+    on_commit_once(("cache_version", namespaces), bump)
+
+
+def get_or_compute(namespace, key, compute, timeout=SHOWCASE_TIMEOUT):
+    """
+    Значение из кэша с защитой от одновременного пересчёта.
+    После инвалидации пересчитывает только воркер, получивший блокировку (cache.add),
+    остальные отдают предыдущее значение, а если его нет — ждут результат не дольше LOCK_WAIT.
+    """
+    cache_key = f"{namespace}:{get_cache_version(namespace)}:{key}"
+    stale_key = f"{namespace}:stale:{key}"
+    lock_key = f"{cache_key}:lock"
+    value = cache.get(cache_key)
+    if value is not None:
+        return value
+
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        value = cache.get(stale_key)
+        deadline = time.monotonic() + LOCK_WAIT
+        while value is None and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(cache_key)
+        if value is not None:
+            return value
+        return compute()
+
+    try:
+        value = compute()
+        cache.set(cache_key, value, timeout)
+        cache.set(stale_key, value, STALE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+class CachedListMixin:
+    """
+    Кэширование ответа list во ViewSet, ключ — класс представления и параметры запроса (limit, offset).
+    Пространство имён задаётся cache_namespace (может быть общим у нескольких представлений)
+    и инвалидируется bump_cache_version.
+    """
+
+    cache_namespace = None
+    cache_timeout = SHOWCASE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        key = f"{type(self).__name__}:{urlencode(sorted(request.query_params.items()))}"
+        data = get_or_compute(
+            self.cache_namespace,
+            key,
+            lambda: super(CachedListMixin, self).list(request, *args, **kwargs).data,
+            self.cache_timeout,
+        )
+        return Response(data)
@@ -1,7 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# Поля, для которых запрошены варианты фильтров: {модель: {поле, ...}}
+_choices_fields = {}
+
+
+def _choices_cache_key(model, field):
+    return f"filter_choices:{model._meta.label_lower}:{field}"
+
+
+def _load_choices(model, field):
+    return [(name, name) for name in model.objects.values_list(field, flat=True).distinct().order_by(field) if name]
+
+
+def get_choices(model, field):
+    """
+    Варианты фильтра из кэша, при промахе — запрос к БД.
+    Если БД недоступна, возвращает пустой список и ничего не кэширует.
+    """
+    key = _choices_cache_key(model, field)
+    choices = cache.get(key)
+    if choices is None:
+        try:
+            choices = _load_choices(model, field)
+        except Exception:
+            return []
+        cache.set(key, choices, settings.FILTER_CHOICES_TIMEOUT)
+    return choices
+
+
+def invalidate_choices(sender, instance=None, update_fields=None, **kwargs):
+    """
+    Сбрасывает кэш вариантов фильтров модели при изменении её записей.
+    Сброс откладывается до фиксации транзакции, чтобы кэш не заполнился старыми значениями.
+    """
+    fields = _choices_fields.get(sender, set())
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    if fields:
+        keys = [_choices_cache_key(sender, field) for field in fields]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
 def filter_choices(model, field):
-    try:
-        return [
-            (name, name) for name in model.objects.values_list(field, flat=True).distinct().order_by(field) if name
-        ]
-    except Exception:
-        return []
+    """
+    Ленивые варианты фильтра по уникальным значениям поля модели.
+    Возвращает callable: запрос выполняется при первом обращении к фильтру, а не при импорте,
+    результат хранится в общем кэше и сбрасывается при сохранении/удалении записей модели.
+    """
+    if model not in _choices_fields:
+        _choices_fields[model] = set()
+        post_save.connect(invalidate_choices, sender=model, dispatch_uid=f"filter_choices_{model._meta.label_lower}")
+        post_delete.connect(invalidate_choices, sender=model, dispatch_uid=f"filter_choices_{model._meta.label_lower}")
+    _choices_fields[model].add(field)
+    return lambda: get_choices(model, field)
@@ -0,0 +1,73 @@
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bbox_q(min_lat, min_lon, max_lat, max_lon, lat_field, lon_field):
+    """
+    Условие попадания координат в прямоугольник (использует индекс по координатам).
+    min_lon > max_lon означает прямоугольник через 180-й меридиан.
+    """
+    condition = Q(**{f"{lat_field}__gte": min_lat, f"{lat_field}__lte": max_lat})
+    if min_lon <= max_lon:
+        return condition & Q(**{f"{lon_field}__gte": min_lon, f"{lon_field}__lte": max_lon})
+    return condition & (Q(**{f"{lon_field}__gte": min_lon}) | Q(**{f"{lon_field}__lte": max_lon}))
+
+
+def point_in_bbox(lat, lon, min_lat, min_lon, max_lat, max_lon):
+    """Попадает ли точка в прямоугольник (как bbox_q, но в Python)."""
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon
+
+
+def radius_bbox(lat, lon, radius_km):
+    """
+    Прямоугольник (min_lat, min_lon, max_lat, max_lon), описанный вокруг круга радиуса radius_km.
+    Им отсекаются точки по индексу до точного расчёта расстояния.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angle)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+        # Круг накрывает полюс: подходят все долготы
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    delta_lon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine_km(lat, lon, lat_field, lon_field):
+    """Выражение расстояния в километрах от точки (lat, lon) до координат записи по формуле гаверсинусов."""
+    lat1, lon1 = Radians(Value(lat, output_field=FloatField())), Radians(Value(lon, output_field=FloatField()))
+    lat2, lon2 = Radians(F(lat_field)), Radians(F(lon_field))
+    chord = Power(Sin((lat2 - lat1) / 2), 2) + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(chord, Value(1.0, output_field=FloatField()))))
+
+
+def parse_coordinates(value, count):
+    """
+    Разбирает строку "a,b,..." из count чисел. Широты и долготы чередуются (широта первой).
+    Возвращает кортеж чисел или None, если формат или диапазон неверны.
+    """
+    parts = str(value).split(",")
+    if len(parts) != count:
+        return None
+    try:
+        numbers = tuple(float(part) for part in parts)
+    except ValueError:
+        return None
+    for index, number in enumerate(numbers):
+        limit = 90 if index % 2 == 0 else 180
+        if not -limit <= number <= limit:
+            return None
+    return numbers
@@ -0,0 +1,171 @@
+import logging
+import os
+from io import BytesIO
+
+from celery import shared_task
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from PIL import Image, ImageOps
+from rest_framework.fields import ReadOnlyField
+
+logger = logging.getLogger(__name__)
+
+# Варианты изображения: название -> наибольшая сторона в пикселях (меньшие изображения не увеличиваются)
+IMAGE_VARIANTS = {
+    "card": 480,
+    "gallery": 1280,
+    "full": 1920,
+}
+# Форматы вариантов: расширение -> (формат Pillow, параметры сохранения)
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Поля изображений с вариантами: {модель: (поле изображения, поле вариантов)}
+_variant_fields = {}
+
+
+def build_image_variants(field_file):
+    """
+    Сохраняет варианты изображения рядом с оригиналом (в подкаталоге variants) и возвращает их описание.
+    Ориентация из EXIF применяется к пикселям, сами метаданные EXIF в варианты не попадают.
+    """
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+    storage = field_file.storage
+    with field_file.open("rb"), Image.open(field_file) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGB")
+
+    variants = {"source": field_file.name}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[variant] = {"width": resized.width, "height": resized.height}
+        for extension, (image_format, options) in IMAGE_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            name = os.path.join(directory, "variants", f"{stem}_{variant}.{extension}")
+            variants[variant][extension] = storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_image_variants(storage, variants):
+    """Удаляет файлы вариантов изображения из хранилища."""
+    for variant in IMAGE_VARIANTS:
+        for extension in IMAGE_FORMATS:
+            name = variants.get(variant, {}).get(extension)
+            if name:
+                storage.delete(name)
+
+
+@shared_task
+def build_image_variants_task(model_label, pk):
+    """Строит варианты изображения записи и сохраняет их описание в поле вариантов."""
+    model = apps.get_model(model_label)
+    field_name, variants_field = _variant_fields[model]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    previous = getattr(instance, variants_field) or {}
+    if not field_file or previous.get("source") == field_file.name:
+        return
+    try:
+        variants = build_image_variants(field_file)
+    except (OSError, Image.DecompressionBombError):
+        logger.exception(f"Не удалось построить варианты изображения {model_label} {pk}")
+        return
+    # save, а не update: сигналы post_save сбрасывают кэши, в которых сериализовано изображение
+    setattr(instance, variants_field, variants)
+    instance.save(update_fields=[variants_field])
+    delete_image_variants(field_file.storage, previous)
+    logger.info(f"Варианты изображения {model_label} {pk} построены")
+
+
+def schedule_image_variants(sender, instance, **kwargs):
+    """Ставит построение вариантов после фиксации транзакции, если изображение изменилось."""
+    field_name, variants_field = _variant_fields[sender]
+    field_file = getattr(instance, field_name)
+    if field_file and (getattr(instance, variants_field) or {}).get("source") != field_file.name:
+        transaction.on_commit(
+            lambda: build_image_variants_task.delay(sender._meta.label, instance.pk),
+            robust=True,
+        )
+
+
+def remove_image_variants(sender, instance, **kwargs):
+    """Удаляет файлы вариантов после удаления записи."""
+    field_name, variants_field = _variant_fields[sender]
+    variants = getattr(instance, variants_field)
+    if variants:
+        storage = getattr(instance, field_name).storage
+        transaction.on_commit(lambda: delete_image_variants(storage, variants))
+
+
+def get_image_variant_fields():
+    """Зарегистрированные поля изображений: [(модель, поле изображения, поле вариантов)]."""
+    return [(model, field_name, variants_field) for model, (field_name, variants_field) in _variant_fields.items()]
+
+
+def register_image_variants(model, field_name, variants_field="image_variants"):
+    """
+    Включает фоновое построение вариантов для поля изображения модели.
+    Описание вариантов хранится в JSONField модели variants_field.
+    """
+    _variant_fields[model] = (field_name, variants_field)
+    dispatch_uid = f"image_variants_{model._meta.label_lower}"
+    post_save.connect(schedule_image_variants, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(remove_image_variants, sender=model, dispatch_uid=dispatch_uid)
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(ReadOnlyField):
+    """
+    Ссылки на варианты изображения и готовые srcset для webp и jpg.
+    null, пока варианты ещё не построены.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        representation = {}
+        srcset = {extension: {} for extension in IMAGE_FORMATS}
+        for variant in IMAGE_VARIANTS:
+            if variant not in value:
+                continue
+            width = value[variant]["width"]
+            representation[variant] = {"width": width, "height": value[variant]["height"]}
+            for extension in IMAGE_FORMATS:
+                url = default_storage.url(value[variant][extension])
+                representation[variant][extension] = url
+                # Для небольших оригиналов размеры вариантов совпадают, в srcset идёт один из них
+                srcset[extension].setdefault(width, f"{url} {width}w")
+        representation["srcset"] = {extension: ", ".join(urls.values()) for extension, urls in srcset.items()}
+        request = self.context.get("request")
+        return absolute_image_variants(representation, request) if request else representation
+
+
+def absolute_image_variants(representation, request):
+    """
+    Делает абсолютными ссылки в представлении ImageVariantsField, включая srcset.
+    Нужна для данных, сериализованных без запроса (например, подборки в кэше).
+    """
+    if not representation:
+        return representation
+    for variant in IMAGE_VARIANTS:
+        if variant in representation:
+            for extension in IMAGE_FORMATS:
+                representation[variant][extension] = request.build_absolute_uri(representation[variant][extension])
+    for extension, srcset in representation["srcset"].items():
+        candidates = (candidate.rsplit(" ", 1) for candidate in srcset.split(", ") if candidate)
+        representation["srcset"][extension] = ", ".join(
+            f"{request.build_absolute_uri(url)} {width}" for url, width in candidates
+        )
+    return representation
@@ -1,21 +1,197 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder обрезает время до миллисекунд, в курсоре нужны микросекунды, иначе записи повторяются."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
 
 
 class CustomLOPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с ограничением размера страницы.
+    Без limit возвращается первая страница максимального размера, а не вся таблица.
+    С параметром cursor (в том числе пустым) включается пагинация по ключу сортировки:
+    следующая страница выбирается условием по последней записи, без OFFSET.
+    Для больших таблиц без фильтров count берётся из статистики планировщика (count_exact=False).
+    """
+
+    cursor_query_param = "cursor"
+    default_limit = settings.PAGINATION_MAX_LIMIT
+    max_limit = settings.PAGINATION_MAX_LIMIT
+    count_estimate_threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+
     def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_keys = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_keys = self.get_cursor_keys(queryset)
+        if self.cursor_keys is None:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
+
+    def get_paginated_response(self, data):
+        if self.cursor_keys is not None:
+            return Response({"count": None, "next": self.next_cursor_link, "previous": None, "results": data})
+        return Response(
+            {
+                "count": self.count,
+                "count_exact": self.count_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {
+            "type": "boolean",
+            "description": "false — count взят из статистики PostgreSQL и приблизителен",
+        }
+        return response_schema
+
+    def get_count(self, queryset):
+        """
+        Количество записей без сортировки и лишних аннотаций.
+        Запросы с DISTINCT или аннотациями (подзапросы цен, оконные функции) считаются
+        через pk IN (...), который PostgreSQL выполняет как полусоединение.
+        """
+        self.count_exact = True
+        query = queryset.query
+        if not query.where and not query.is_sliced and not query.distinct and not query.annotations:
+            estimate = self.get_count_estimate(queryset)
+            if estimate is not None and estimate >= self.count_estimate_threshold:
+                self.count_exact = False
+                return estimate
+        if query.is_sliced:
+            return queryset.count()
+        queryset = queryset.order_by()
+        if query.distinct or query.annotations:
+            return queryset.model._base_manager.filter(pk__in=queryset.values("pk")).count()
+        return queryset.count()
+
+    @staticmethod
+    def get_count_estimate(queryset):
+        """Оценка количества строк таблицы из pg_class, None — если таблица ещё не анализировалась."""
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор следующей страницы (пустое значение — первая страница), без подсчёта count",
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
+
+    @staticmethod
+    def get_cursor_keys(queryset):
+        """
+        Ключи сортировки queryset в виде [(поле, по убыванию)], в конце всегда pk.
+        Возвращает None, если сортировка не по простым полям (связанные поля, выражения, случайная).
+        """
+        query = queryset.query
+        ordering = query.order_by or (query.default_ordering and queryset.model._meta.ordering) or ()
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str):
+                return None
+            name = item.lstrip("-")
+            if name == "?" or "__" in name:
+                return None
+            if name in ("pk", queryset.model._meta.pk.name):
+                keys.append(("pk", item.startswith("-")))
+                return keys
+            if name not in query.annotations:
+                try:
+                    name = queryset.model._meta.get_field(name).attname
+                except FieldDoesNotExist:
+                    return None
+            keys.append((name, item.startswith("-")))
+        keys.append(("pk", False))
+        return keys
+
+    def paginate_queryset_by_cursor(self, queryset, request):
         self.limit = self.get_limit(request)
+        queryset = queryset.order_by(*[f"-{name}" if descending else name for name, descending in self.cursor_keys])
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(self.get_cursor_filter(self.decode_cursor(cursor)))
+            except (TypeError, ValueError, DjangoValidationError):
+                # Значения подделанного курсора не подходят к типам полей
+                raise NotFound("Некорректный курсор") from None
 
-        # Если limit и offset не указаны, возвращаем все объекты
-        if self.limit is None:
-            self.count = queryset.count()
-            return list(queryset)
+        page = list(queryset[: self.limit + 1])
+        self.next_cursor_link = None
+        if len(page) > self.limit:
+            page = page[: self.limit]
+            last = page[-1]
+            values = [getattr(last, name) for name, _ in self.cursor_keys]
+            self.next_cursor_link = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(values)
+            )
+        return page
 
-        return super().paginate_queryset(queryset, request, view)
+    def get_cursor_filter(self, values):
+        """
+        Условие «строго после записи с values» для сортировки по cursor_keys.
+        NULL в PostgreSQL идёт последним при сортировке по возрастанию и первым по убыванию.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.cursor_keys, values, strict=True):
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if descending else Q(pk__in=[])
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__lt" if descending else f"{name}__gt": value})
+                if not descending:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
 
-    def get_paginated_response(self, data):
-        # Если пагинация отключена, возвращаем все объекты с метаданными
-        if self.limit is None:
-            return Response({"count": self.count, "next": None, "previous": None, "results": data})
+    @staticmethod
+    def encode_cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values, cls=CursorJSONEncoder).encode()).decode()
 
-        return super().get_paginated_response(data)
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound("Некорректный курсор") from None
+        if not isinstance(values, list) or len(values) != len(self.cursor_keys):
+            raise NotFound("Некорректный курсор")
+        if any(isinstance(value, dict | list) for value in values):
+            raise NotFound("Некорректный курсор")
+        return values
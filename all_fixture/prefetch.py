@@ -0,0 +1,26 @@
+from django.db.models import Prefetch
+
+from all_fixture.views_fixture import LIST_PHOTOS_LIMIT
+
+
+def limited_prefetch(lookup, queryset, limit=LIST_PHOTOS_LIMIT):
+    """
+    Prefetch не более limit связанных записей на каждый объект в атрибут limited_<связь>.
+    Срез queryset Django выполняет одним запросом с ROW_NUMBER() OVER (PARTITION BY ...),
+    поэтому объём выборки ограничен числом строк списка, а не числом связанных записей.
+    """
+    if not queryset.ordered:
+        queryset = queryset.order_by("pk")
+    return Prefetch(lookup, queryset=queryset[:limit], to_attr=f"limited_{lookup.split('__')[-1]}")
+
+
+def get_limited(obj, related_name, limit=None):
+    """
+    Связанные записи, загруженные limited_prefetch, а без него — из менеджера связи
+    (обрезанные до limit, если он задан).
+    """
+    limited = getattr(obj, f"limited_{related_name}", None)
+    if limited is not None:
+        return limited
+    related = getattr(obj, related_name).all()
+    return related[:limit] if limit else related
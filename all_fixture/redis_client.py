@@ -0,0 +1,26 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Общий клиент Redis для структур данных, которых нет в API кэша Django (множества, счётчики).
+    Возвращает None, если REDIS_URL не задан: вызывающий код переходит на запасной вариант через БД.
+    """
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+def redis_key(*parts):
+    """Ключ Redis с общим префиксом проекта."""
+    return ":".join(["ku", *map(str, parts)])
@@ -0,0 +1,41 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingListMixin:
+    """
+    Потоковая выдача списка для ViewSet с параметром stream=true.
+    Записи читаются курсором на стороне сервера (QuerySet.iterator) и сериализуются пачками,
+    JSON-массив отдаётся по частям, поэтому память воркера не зависит от количества записей.
+    Пагинация в этом режиме не применяется.
+    """
+
+    stream_query_param = "stream"
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param, "").lower() not in ("1", "true"):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.stream_json(queryset), content_type="application/json")
+
+    def stream_json(self, queryset):
+        yield "["
+        separator = ""
+        chunk = []
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield separator + self.serialize_chunk(chunk)
+                separator = ","
+                chunk = []
+        if chunk:
+            yield separator + self.serialize_chunk(chunk)
+        yield "]"
+
+    def serialize_chunk(self, chunk):
+        """Пачка записей в виде элементов JSON-массива без квадратных скобок."""
+        data = self.get_serializer(chunk, many=True).data
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)[1:-1]
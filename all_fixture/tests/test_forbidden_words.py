@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from all_fixture.validators import forbidden_words
+from all_fixture.validators.forbidden_words import WordMatcher, contains_forbidden_word, get_forbidden_words_matcher
+
+
+class WordMatcherTest(TestCase):
+    def test_search(self):
+        """Автомат находит любое слово, в том числе внутри других и пересекающиеся"""
+        matcher = WordMatcher(["he", "she", "his", "hers"])
+        self.assertTrue(matcher.search("ushers"))
+        self.assertTrue(matcher.search("ahishe"))
+        self.assertTrue(matcher.search("xxhexx"))
+        self.assertFalse(matcher.search("hix"))
+        self.assertFalse(WordMatcher(["abcd", "bcx"]).search("abcbcd"))
+        self.assertTrue(WordMatcher(["abcd", "bc"]).search("abcx"))
+
+    def test_empty_words_ignored(self):
+        """Пустое слово не совпадает с любым текстом"""
+        self.assertFalse(WordMatcher([""]).search("текст"))
+
+
+class ForbiddenWordsFileTest(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.words_file = Path(directory) / "forbidden_words.txt"
+        self.words_file.write_text("Плохое\n\nзапрет\n", encoding="utf-8")
+        patcher = mock.patch.object(forbidden_words, "FORBIDDEN_WORDS_FILE", self.words_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, forbidden_words, "_matcher", None)
+
+    def test_case_insensitive(self):
+        """Слова из файла ищутся без учёта регистра"""
+        self.assertTrue(contains_forbidden_word("Очень ПЛОХОЕ слово"))
+        self.assertFalse(contains_forbidden_word("Хорошее слово"))
+
+    def test_reload_on_change(self):
+        """Автомат общий, пересобирается только после изменения файла"""
+        matcher = get_forbidden_words_matcher()
+        self.assertIs(get_forbidden_words_matcher(), matcher)
+        self.words_file.write_text("новое\n", encoding="utf-8")
+        stat = self.words_file.stat()
+        os.utime(self.words_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertTrue(contains_forbidden_word("что-то новое"))
+        self.assertFalse(contains_forbidden_word("плохое"))
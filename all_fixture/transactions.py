@@ -0,0 +1,35 @@
+from weakref import WeakValueDictionary
+
+from django.db import transaction
+
+
+class _OnCommitOnce:
+    """Отложенный вызов on_commit_once; started отмечает, что вызов уже начался."""
+
+    __slots__ = ("func", "started", "__weakref__")
+
+    def __init__(self, func):
+        self.func = func
+        self.started = False
+
+    def __call__(self):
+        self.started = True
+        self.func()
+
+
+def on_commit_once(key, func, using=None, robust=False):
+    """
+    transaction.on_commit, который для одного key в транзакции ставит только первый вызов func.
+    Ожидающие вызовы хранятся по ключам в WeakValueDictionary на соединении: Django держит ссылку
+    на колбэк, пока он ждёт фиксации, и отпускает её после выполнения или отката (в том числе
+    отката точки сохранения), поэтому после отката ключ снова свободен. Вызов, который уже
+    выполняется, повтор не блокирует.
+    """
+    connection = transaction.get_connection(using)
+    pending = connection.__dict__.setdefault("_on_commit_once", WeakValueDictionary())
+    callback = pending.get(key)
+    if callback is not None and not callback.started:
+        return
+    callback = _OnCommitOnce(func)
+    pending[key] = callback
+    transaction.on_commit(callback, using=using, robust=robust)
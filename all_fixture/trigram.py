@@ -0,0 +1,89 @@
+import logging
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import DatabaseError, connections, transaction
+from django.db.models import FloatField, Value
+
+logger = logging.getLogger(__name__)
+
+# Сколько вариантов отдают autocomplete-представления
+AUTOCOMPLETE_LIMIT = 20
+
+# Поля с триграммным GIN-индексом: [(модель, поле)]
+_trigram_fields = []
+# Кэш наличия pg_trgm по алиасам БД
+_trigram_available = {}
+
+
+def trigram_available(using="default"):
+    """Установлено ли в БД расширение pg_trgm (проверяется один раз на процесс)."""
+    if using not in _trigram_available:
+        connection = connections[using]
+        if connection.vendor != "postgresql":
+            _trigram_available[using] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_available[using] = cursor.fetchone() is not None
+    return _trigram_available[using]
+
+
+def register_trigram_index(model, field_name):
+    """Включает триграммный GIN-индекс (gin_trgm_ops) для текстового поля модели."""
+    _trigram_fields.append((model, field_name))
+
+
+def create_trigram_extension(using="default", **kwargs):
+    """
+    pre_migrate: устанавливает pg_trgm. Если расширение недоступно на сервере,
+    поиск работает через icontains, а индексы не создаются.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        logger.warning("Расширение pg_trgm недоступно, поиск по названиям работает без триграмм")
+    _trigram_available.pop(using, None)
+
+
+def create_trigram_indexes(using="default", **kwargs):
+    """post_migrate: создаёт недостающие триграммные индексы зарегистрированных полей."""
+    if not trigram_available(using):
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for model, field_name in _trigram_fields:
+            table = model._meta.db_table
+            column = model._meta.get_field(field_name).column
+            index = connection.ops.quote_name(f"{table}_{column}_trgm"[:63])
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {connection.ops.quote_name(table)} "
+                f"USING gin ({connection.ops.quote_name(column)} gin_trgm_ops)"
+            )
+
+
+def trigram_search(queryset, field_name, query, limit=None):
+    """
+    Поиск по вхождению слова запроса в поле с учётом опечаток (оператор %> из pg_trgm, использует
+    GIN-индекс). Результаты упорядочены по сходству, оно же в аннотации search_similarity.
+    Без pg_trgm — icontains с search_similarity = 1.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    if trigram_available(queryset.db):
+        queryset = (
+            queryset.filter(**{f"{field_name}__trigram_word_similar": query})
+            .annotate(search_similarity=TrigramWordSimilarity(query, field_name))
+            .order_by("-search_similarity", field_name)
+        )
+    else:
+        queryset = (
+            queryset.filter(**{f"{field_name}__icontains": query})
+            .annotate(search_similarity=Value(1.0, output_field=FloatField()))
+            .order_by(field_name)
+        )
+    return queryset[:limit] if limit else queryset
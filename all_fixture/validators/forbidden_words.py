@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+from pathlib import Path
+
+FORBIDDEN_WORDS_FILE = Path(__file__).parent / "forbidden_words.txt"
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из набора слов в тексте за один проход.
+    Время проверки линейно по длине текста и не зависит от числа слов.
+    """
+
+    def __init__(self, words):
+        # Переходы, суффиксные ссылки и признак «здесь заканчивается слово» по номерам состояний
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in words:
+            self.add_word(word)
+        self.build_links()
+
+    def add_word(self, word):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+            state = next_state
+        if state:
+            self.terminal[state] = True
+
+    def build_links(self):
+        """Суффиксные ссылки обходом в ширину: состояние принимает, если принимает его ссылка."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                link = self.fail[state]
+                while link and char not in self.goto[link]:
+                    link = self.fail[link]
+                link = self.goto[link].get(char, 0)
+                self.fail[next_state] = link
+                self.terminal[next_state] = self.terminal[next_state] or self.terminal[link]
+                queue.append(next_state)
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово автомата."""
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_mtime = None
+
+
+def get_forbidden_words_matcher():
+    """
+    Общий на процесс автомат запрещённых слов из forbidden_words.txt.
+    Строится при первом обращении и пересобирается, когда файл изменился.
+    """
+    global _matcher, _matcher_mtime
+    try:
+        mtime = FORBIDDEN_WORDS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError("Файл forbidden_words.txt не был найден.") from None
+    if _matcher is None or mtime != _matcher_mtime:
+        with _lock:
+            if _matcher is None or mtime != _matcher_mtime:
+                words = FORBIDDEN_WORDS_FILE.read_text(encoding="utf-8").splitlines()
+                _matcher = WordMatcher({word.strip().lower() for word in words if word.strip()})
+                _matcher_mtime = mtime
+    return _matcher
+
+
+def contains_forbidden_word(text):
+    """Содержит ли текст (без учёта регистра) одно из запрещённых слов."""
+    return get_forbidden_words_matcher().search(text.lower())
@@ -1,34 +1,21 @@
 from datetime import datetime
-from pathlib import Path
 
 from rest_framework.exceptions import ValidationError
 
+from all_fixture.validators.forbidden_words import contains_forbidden_word
+
 
 class ForbiddenWordValidator:
     """
     Валидатор на наличие недопустимых слов в названии.
+    Слова ищутся общим автоматом из forbidden_words.py.
     """
 
-    def __init__(self):
-        self.forbidden_words = self.load_forbidden_words()
-
-    def load_forbidden_words(self):
-        """
-        Загружает запрещенные слова из файла forbidden_words.txt.
-        """
-        base_dir = Path(__file__).parent
-        file_path = base_dir / "forbidden_words.txt"
-        try:
-            with open(file_path, encoding="utf-8") as file:
-                return [word.strip() for word in file.read().splitlines()]
-        except FileNotFoundError:
-            raise FileNotFoundError("Файл forbidden_words.txt не был найден.") from None
-
     def __call__(self, value):
         """
         Проверяет, содержит ли значение запрещённые слова.
         """
-        if isinstance(value, str) and any(word in value.lower() for word in self.forbidden_words):
+        if isinstance(value, str) and contains_forbidden_word(value):
             raise ValidationError("Введено недопустимое слово")
         return value
 
@@ -11,6 +11,8 @@ from blogs.constants import (
 )
 
 NULLABLE = {"blank": True, "null": True}
+# Сколько фотографий отеля или номера отдаётся в одной записи списка
+LIST_PHOTOS_LIMIT = 10
 # Теги для settings
 USER_SETTINGS = {
     "name": "Пользователи",
@@ -339,6 +341,21 @@ CALENDAR_ID = OpenApiParameter(
     description="ID Календаря",
     required=True,
 )
+# Область карты для кластеров отелей
+HOTEL_MAP_BBOX = OpenApiParameter(
+    name="bbox",
+    type=str,
+    description="Область карты: мин_широта,мин_долгота,макс_широта,макс_долгота "
+    "(мин_долгота > макс_долгота — область через 180-й меридиан)",
+    required=True,
+)
+# Уровень масштаба карты для кластеров отелей
+HOTEL_MAP_ZOOM = OpenApiParameter(
+    name="zoom",
+    type=int,
+    description="Уровень масштаба карты (0–18)",
+    required=True,
+)
 # Дата заезда в отель
 HOTEL_CHECK_IN = OpenApiParameter(
     name="check_in_date",
@@ -486,6 +503,12 @@ OFFSET = OpenApiParameter(
     description="Начальный индекс для пагинации",
     required=False,
 )
+STREAM = OpenApiParameter(
+    name="stream",
+    type=bool,
+    description="Потоковая выдача всего списка JSON-массивом, без пагинации",
+    required=False,
+)
 # ID статьи
 ARTICLE_ID = OpenApiParameter(
     location=OpenApiParameter.PATH,
@@ -830,7 +853,8 @@ ORDERING = OpenApiParameter(
 SEARCH = OpenApiParameter(
     name="search",
     location=OpenApiParameter.QUERY,
-    description="Текстовый поиск по заголовку и содержимому статьи",
+    description='Полнотекстовый поиск по заголовку, описанию и тексту статьи (websearch: "фраза", or, -слово), '
+    "результаты по релевантности с фрагментом текста в search_headline",
     required=False,
     type=str,
 )
@@ -865,6 +889,12 @@ LIKE_ID = OpenApiParameter(
     description="ID реакции",
     required=True,
 )
+ARTICLE_Q = OpenApiParameter(
+    name="article",
+    location=OpenApiParameter.QUERY,
+    description="Фильтр по статье (ID)",
+    required=False,
+)
 COMMENT_Q = OpenApiParameter(
     name="comment",
     location=OpenApiParameter.QUERY,
@@ -880,6 +910,13 @@ MIN_GUESTS = 1
 MAX_GUESTS = 20
 MIN_PRICE = 0
 MAX_PRICE = 10000000
+NEAR_DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
+MAP_MAX_ZOOM = 18
+# Ячеек сетки кластеров на ширину тайла карты (тайл 256 px — ячейка 64 px)
+MAP_CELLS_PER_TILE = 4
+# Больше тайлов в области карты не кэшируется: кластеры считаются запросом по самой области
+MAP_MAX_TILES = 64
 MAX_DAYS = 365
 MIN_NIGHTS = 1
 MAX_NIGHTS = 20
@@ -11,11 +11,13 @@ from all_fixture.errors.serializers_error import (
     ApplicationTourErrorIdSerializer,
 )
 from all_fixture.pagination import CustomLOPagination
+from all_fixture.streaming import StreamingListMixin
 from all_fixture.views_fixture import (
     APPLICATION_ID,
     APPLICATION_SETTINGS,
     LIMIT,
     OFFSET,
+    STREAM,
 )
 from applications.models import ApplicationHotel, ApplicationTour
 from applications.serializers import (
@@ -39,7 +41,7 @@ class ApplicationBaseViewSet(viewsets.ModelViewSet):
     list=extend_schema(
         summary="Список заявок на тур",
         description="Получение списка всех заявок на тур",
-        parameters=[LIMIT, OFFSET],
+        parameters=[LIMIT, OFFSET, STREAM],
         responses={
             200: OpenApiResponse(
                 response=ApplicationTourListSerializer(many=True),
@@ -104,7 +106,7 @@ class ApplicationBaseViewSet(viewsets.ModelViewSet):
         },
     ),
 )
-class ApplicationTourViewSet(ApplicationBaseViewSet):
+class ApplicationTourViewSet(StreamingListMixin, ApplicationBaseViewSet):
     queryset = ApplicationTour.objects.all()
     pagination_class = CustomLOPagination
     model = ApplicationTour
@@ -121,7 +123,7 @@ class ApplicationTourViewSet(ApplicationBaseViewSet):
     list=extend_schema(
         summary="Список заявок на отель",
         description="Получение списка заявок на отель",
-        parameters=[LIMIT, OFFSET],
+        parameters=[LIMIT, OFFSET, STREAM],
         responses={
             200: OpenApiResponse(
                 response=ApplicationHotelListSerializer(many=True),
@@ -186,7 +188,7 @@ class ApplicationTourViewSet(ApplicationBaseViewSet):
         },
     ),
 )
-class ApplicationHotelViewSet(ApplicationBaseViewSet):
+class ApplicationHotelViewSet(StreamingListMixin, ApplicationBaseViewSet):
     queryset = ApplicationHotel.objects.all()
     pagination_class = CustomLOPagination
     model = ApplicationHotel
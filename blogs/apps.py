@@ -5,3 +5,6 @@ class BlogsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blogs"
     verbose_name = "Блог"
+
+    def ready(self):
+        import blogs.signals  # noqa: F401
@@ -13,6 +13,21 @@ MAX_FILE_SIZE_BYTES: Final[int] = MAX_FILE_SIZE_MB * 1024 * 1024  # 10 МБ
 ALLOWED_VIDEO_EXT: Final[tuple[str, ...]] = (".mp4", ".webm")
 MAX_VIDEO_DURATION_SEC: Final[int] = 2 * 60  # 120 секунд
 
+# Комментарии: сколько уровней ответов отдаётся под комментарием верхнего уровня
+COMMENT_REPLIES_DEPTH: Final[int] = 2
+
+# Полнотекстовый поиск статей: конфигурация russian стеммит кириллицу русским словарём,
+# а латиницу (asciiword) английским, поэтому одна конфигурация покрывает оба языка
+ARTICLE_SEARCH_CONFIG: Final[str] = "russian"
+# Поля статьи в поисковом векторе и их веса (заголовок важнее описания, описание важнее текста)
+ARTICLE_SEARCH_WEIGHTS: Final[dict[str, str]] = {"title": "A", "short_description": "B", "content": "C"}
+# Названия тегов статьи в поисковом векторе
+ARTICLE_SEARCH_TAGS_WEIGHT: Final[str] = "B"
+# Границы подсветки в search_headline: символы, которых нет в тексте; сериализатор экранирует фрагмент
+# и заменяет их на <mark></mark>
+ARTICLE_HEADLINE_START: Final[str] = "\x02"
+ARTICLE_HEADLINE_STOP: Final[str] = "\x03"
+
 # Эти имена используются в all_fixture/views_fixture.py (ВРЕМЕННО)
 MAX_PHOTO_SIZE_MB = MAX_FILE_SIZE_MB
 MAX_VIDEO_SIZE_MB = MAX_FILE_SIZE_MB
@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
 from django.db import models
+from django.db.models import F, Func, Value
 from django_filters import (
     CharFilter,
     DateFromToRangeFilter,
@@ -8,7 +10,8 @@ from django_filters import (
 from rest_framework.exceptions import ValidationError
 
 from all_fixture.choices import CountryChoices
-from blogs.models import Article, Theme
+from blogs.constants import ARTICLE_HEADLINE_START, ARTICLE_HEADLINE_STOP, ARTICLE_SEARCH_CONFIG
+from blogs.models import Article, ArticleStatus, Theme
 
 
 class ArticleFilter(FilterSet):
@@ -39,6 +42,12 @@ class ArticleFilter(FilterSet):
         help_text="Фильтр по ID темы",
     )
 
+    search = CharFilter(
+        method="filter_search",
+        label="Поиск",
+        help_text="Полнотекстовый поиск по заголовку, краткому описанию и тексту статьи",
+    )
+
     class Meta:
         model = Article
         fields: list[str] = []
@@ -118,19 +127,52 @@ class ArticleFilter(FilterSet):
             raise ValidationError({"theme_id": "Тема с указанным ID не найдена."})
         return queryset.filter(theme_id=value)
 
+    # ─────────────────────────────── Поиск ───────────────────────────────────
+
+    def filter_search(self, queryset, name, value):  # noqa: ARG002
+        """
+        Полнотекстовый поиск по search_vector (GIN-индекс) с синтаксисом websearch:
+        слова, "фразы в кавычках", OR и -исключения. Результаты упорядочены по релевантности
+        (явный ordering её переопределяет), в search_headline — фрагмент текста без разметки,
+        совпадения отмечены ARTICLE_HEADLINE_START/STOP (сериализатор превращает их в <mark>).
+        """
+        value = value.strip()
+        if not value:
+            return queryset
+        query = SearchQuery(value, config=ARTICLE_SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query),
+                search_headline=SearchHeadline(
+                    # Фрагмент строится по тексту без HTML-разметки
+                    Func(F("content"), Value("<[^>]*>"), Value(" "), Value("g"), function="regexp_replace"),
+                    query,
+                    config=ARTICLE_SEARCH_CONFIG,
+                    start_sel=ARTICLE_HEADLINE_START,
+                    stop_sel=ARTICLE_HEADLINE_STOP,
+                    max_words=35,
+                    min_words=15,
+                    max_fragments=2,
+                    fragment_delimiter=" … ",
+                ),
+            )
+            .order_by("-search_rank", "-published_at")
+        )
+
     # ─────────────────────────── Права доступа ──────────────────────────────
 
     @property
     def qs(self):
         """
-        анонимы — только published+moderated,
-        авторы — свои черновики + published,
+        анонимы — только опубликованные (прошедшие модерацию),
+        авторы — свои черновики + опубликованные,
         суперпользователь — все.
         """
         base = super().qs
         user = getattr(self.request, "user", None)
         if not user or not user.is_authenticated:
-            return base.filter(is_published=True, is_moderated=True)
+            return base.filter(status=ArticleStatus.PUBLISHED)
         if user.is_superuser:
             return base
-        return base.filter(models.Q(is_published=True, is_moderated=True) | models.Q(author=user))
+        return base.filter(models.Q(status=ArticleStatus.PUBLISHED) | models.Q(author=user))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blogs.models import Article
+
+
+class Command(BaseCommand):
+    help = "Команда для пересчёта поисковых векторов статей (например, после добавления поиска или смены весов)"
+
+    def handle(self, *args, **options):
+        updated = Article.objects.update(search_vector=Article.build_search_vector())
+        self.stdout.write(self.style.SUCCESS(f"Поисковые векторы обновлены для {updated} статей"))
@@ -3,10 +3,14 @@ from __future__ import annotations
 from pathlib import Path
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -14,6 +18,9 @@ from all_fixture.choices import CountryChoices
 from all_fixture.views_fixture import NULLABLE
 from blogs.constants import (
     ALLOWED_VIDEO_EXT,
+    ARTICLE_SEARCH_CONFIG,
+    ARTICLE_SEARCH_TAGS_WEIGHT,
+    ARTICLE_SEARCH_WEIGHTS,
     MAX_FILE_SIZE_BYTES,
 )
 from blogs.validators import enforce_media_limit, validate_media_file
@@ -100,6 +107,7 @@ class Article(models.Model):
     cover_image = models.ImageField(
         upload_to="articles/covers/", validators=[validate_file_size], verbose_name="Обложка"
     )
+    cover_image_variants = models.JSONField(default=dict, editable=False, verbose_name="Варианты обложки")
 
     # география
     countries = ArrayField(
@@ -117,6 +125,12 @@ class Article(models.Model):
     content = models.TextField(verbose_name="Полный текст статьи")
     rating = models.FloatField(default=0, verbose_name="Рейтинг")
     views_count = models.PositiveIntegerField(default=0, verbose_name="Просмотры")
+    unique_views_count = models.PositiveIntegerField(default=0, verbose_name="Уникальные посетители (оценка)")
+    # Ключ последней перенесённой из Redis пачки просмотров: повторный перенос той же пачки пропускается
+    views_flush_key = models.CharField(max_length=32, blank=True, editable=False, verbose_name="Пачка просмотров")
+
+    # поиск
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Поисковый вектор")
 
     # workflow
     status = models.CharField(
@@ -134,6 +148,7 @@ class Article(models.Model):
         indexes = [
             models.Index(fields=["status", "-published_at"], name="status_pub_idx"),
             GinIndex(fields=["countries"], name="countries_gin"),
+            GinIndex(fields=["search_vector"], name="article_search_gin"),
         ]
 
     # ─────────────── helpers ───────────────
@@ -146,6 +161,38 @@ class Article(models.Model):
                 n += 1
             self.slug = slug
         super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(ARTICLE_SEARCH_WEIGHTS):
+            Article.objects.filter(pk=self.pk).update(search_vector=self.build_search_vector())
+
+    @staticmethod
+    def build_search_vector():
+        """
+        Взвешенный поисковый вектор статьи, считается в БД из полей ARTICLE_SEARCH_WEIGHTS
+        и названий тегов (подзапросом, поэтому годится для UPDATE по многим статьям).
+        """
+        tag_names = (
+            Article.tags.through.objects.filter(article_id=OuterRef("pk"))
+            .order_by()
+            .values("article_id")
+            .annotate(names=StringAgg("tag__name", " "))
+            .values("names")
+        )
+        vectors = [
+            SearchVector(field, config=ARTICLE_SEARCH_CONFIG, weight=weight)
+            for field, weight in ARTICLE_SEARCH_WEIGHTS.items()
+        ]
+        vectors.append(
+            SearchVector(
+                Coalesce(Subquery(tag_names), Value(""), output_field=models.TextField()),
+                config=ARTICLE_SEARCH_CONFIG,
+                weight=ARTICLE_SEARCH_TAGS_WEIGHT,
+            )
+        )
+        vector = vectors[0]
+        for other in vectors[1:]:
+            vector += other
+        return vector
 
     # workflow
     def submit_for_review(self):
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from html import escape, unescape
 from typing import Any
 
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
 
 from all_fixture.choices import CountryChoices
+from all_fixture.images import ImageVariantsField
+from blogs.constants import ARTICLE_HEADLINE_START, ARTICLE_HEADLINE_STOP, COMMENT_REPLIES_DEPTH
 from blogs.models import (
     Article,
     Category,
@@ -16,12 +20,16 @@ from blogs.models import (
     Tag,
     Theme,
 )
+from blogs.services import build_comment_tree, comments_with_reactions
 from blogs.validators import (
     DynamicForbiddenWordValidator,
     enforce_media_limit,
     validate_media_file,
 )
 
+# Один валидатор на процесс: слова проверяет общий автомат, новый на каждый запрос не нужен
+FORBIDDEN_WORDS_VALIDATOR = DynamicForbiddenWordValidator()
+
 
 # ────────────────────────── базовые справочники ──────────────────────────
 class CategorySerializer(serializers.ModelSerializer):
@@ -106,21 +114,28 @@ class CommentSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
-    # рекурсивная выдача ответов (до 2-го уровня)
+    # рекурсивная выдача ответов (до COMMENT_REPLIES_DEPTH уровня);
+    # ответы и реакции берутся из дерева, собранного blogs.services, без запросов на каждый комментарий
     def get_replies(self, obj: Comment) -> list[dict[str, Any]]:
         depth = self.context.get("depth", 0)
-        if depth >= 2:
+        if depth >= COMMENT_REPLIES_DEPTH:
             return []
-        qs = Comment.objects.filter(parent=obj, status="approved")
+        replies = getattr(obj, "loaded_replies", None)
+        if replies is None:
+            replies = comments_with_reactions().filter(parent=obj)
         ctx = {**self.context, "depth": depth + 1}
-        return CommentSerializer(qs, many=True, context=ctx).data
+        return CommentSerializer(replies, many=True, context=ctx).data
 
     @staticmethod
     def get_likes_count(obj: Comment) -> int:  # noqa: D401
+        if hasattr(obj, "likes_total"):
+            return obj.likes_total
         return obj.likes.filter(is_like=True).count()
 
     @staticmethod
     def get_dislikes_count(obj: Comment) -> int:  # noqa: D401
+        if hasattr(obj, "dislikes_total"):
+            return obj.dislikes_total
         return obj.likes.filter(is_like=False).count()
 
 
@@ -130,9 +145,11 @@ class ArticleSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
     theme = ThemeSerializer(required=False, allow_null=True)
     media = MediaAssetSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     author = serializers.HiddenField(default=CurrentUserDefault())
     reading_time = serializers.IntegerField(source="reading_time_minutes", read_only=True)
+    cover_image_variants = ImageVariantsField()
+    search_headline = serializers.SerializerMethodField()
 
     countries = serializers.ListField(
         child=serializers.CharField(),
@@ -150,10 +167,12 @@ class ArticleSerializer(serializers.ModelSerializer):
             "meta_title",
             "meta_description",
             "cover_image",
+            "cover_image_variants",
             "countries",
             "rating",
             "status",
             "views_count",
+            "unique_views_count",
             "reading_time",
             "content",
             "category",
@@ -162,6 +181,7 @@ class ArticleSerializer(serializers.ModelSerializer):
             "author",
             "media",
             "comments",
+            "search_headline",
             "created_at",
             "updated_at",
         )
@@ -170,20 +190,21 @@ class ArticleSerializer(serializers.ModelSerializer):
             "slug",
             "status",
             "views_count",
+            "unique_views_count",
             "reading_time",
             "rating",
             "created_at",
             "updated_at",
             "media",
             "comments",
+            "search_headline",
         )
 
     # ─── валидаторы «плохих слов» ─────────────────────────────────────────
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        banned = DynamicForbiddenWordValidator()
-        self.fields["title"].validators.append(banned)
-        self.fields["content"].validators.append(banned)
+        self.fields["title"].validators.append(FORBIDDEN_WORDS_VALIDATOR)
+        self.fields["content"].validators.append(FORBIDDEN_WORDS_VALIDATOR)
 
     # ─── страны: валидация и маппинг код ⇄ рус. название ──────────────────
     def validate_countries(self, value):
@@ -199,6 +220,23 @@ class ArticleSerializer(serializers.ModelSerializer):
             data["countries"] = [mapping[n] for n in data["countries"] if n in mapping]
         return super().to_internal_value(data)
 
+    # ─── комментарии: дерево одобренных, загруженных Prefetch в approved_comments ─
+    @extend_schema_field(CommentSerializer(many=True))
+    def get_comments(self, obj: Article) -> list[dict[str, Any]]:
+        comments = getattr(obj, "approved_comments", None)
+        if comments is None:
+            comments = comments_with_reactions().filter(article=obj)
+        return CommentSerializer(build_comment_tree(comments), many=True, context=self.context).data
+
+    # ─── поиск: фрагмент текста с подсветкой, есть только в выдаче с параметром search ─
+    def get_search_headline(self, obj: Article) -> str | None:
+        """Экранированный фрагмент текста, единственная разметка в нём — <mark> вокруг совпадений."""
+        headline = getattr(obj, "search_headline", None)
+        if headline is None:
+            return None
+        headline = escape(unescape(headline))
+        return headline.replace(ARTICLE_HEADLINE_START, "<mark>").replace(ARTICLE_HEADLINE_STOP, "</mark>")
+
     def to_representation(self, instance):
         rep = super().to_representation(instance)
         rev = dict(CountryChoices.choices)
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import secrets
+
+from django.db.models import Case, Count, F, PositiveIntegerField, Q, Value, When
+from redis.exceptions import RedisError, ResponseError
+
+from all_fixture.redis_client import get_redis, redis_key
+from blogs.constants import COMMENT_REPLIES_DEPTH
+from blogs.models import Article, Comment
+from users.services import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+
+def comments_with_reactions():
+    """Одобренные комментарии с автором и числом лайков/дизлайков, посчитанными в том же запросе."""
+    return (
+        Comment.objects.filter(status="approved")
+        .select_related("user")
+        .annotate(
+            likes_total=Count("likes", filter=Q(likes__is_like=True)),
+            dislikes_total=Count("likes", filter=Q(likes__is_like=False)),
+        )
+    )
+
+
+def build_comment_tree(comments):
+    """
+    Собирает дерево из уже загруженных комментариев: ответы кладутся в loaded_replies родителя.
+    Возвращает комментарии верхнего уровня. Ответы на неодобренные (не загруженные) комментарии отбрасываются.
+    """
+    comments = list(comments)
+    by_id = {comment.id: comment for comment in comments}
+    roots = []
+    for comment in comments:
+        comment.loaded_replies = []
+    for comment in comments:
+        if comment.parent_id is None:
+            roots.append(comment)
+        elif comment.parent_id in by_id:
+            by_id[comment.parent_id].loaded_replies.append(comment)
+    return roots
+
+
+def attach_comment_replies(roots, depth=COMMENT_REPLIES_DEPTH):
+    """
+    Загружает одним запросом ответы на комментарии roots до depth уровней вложенности
+    и раскладывает их по loaded_replies.
+    """
+    roots = list(roots)
+    ids = [root.id for root in roots]
+    condition = Q()
+    lookup = "parent_id__in"
+    for _ in range(depth):
+        condition |= Q(**{lookup: ids})
+        lookup = f"parent__{lookup}"
+    replies = comments_with_reactions().filter(condition) if ids and depth else []
+    build_comment_tree([*roots, *replies])
+    return roots
+
+
+# ─── Просмотры статей ──────────────────────────────────────────────────────────
+ARTICLE_VIEWS_PENDING_KEY = redis_key("article_views", "pending")
+ARTICLE_VIEWS_FLUSHING_KEY = redis_key("article_views", "flushing")
+ARTICLE_VIEWS_BATCH_KEY = redis_key("article_views", "batch")
+ARTICLE_VIEWS_FLUSH_LOCK_KEY = redis_key("article_views", "flush_lock")
+ARTICLE_VIEWS_FLUSH_LOCK_TIMEOUT = 60 * 5
+
+
+def article_visitors_key(article_id):
+    return redis_key("article_views", "visitors", article_id)
+
+
+def get_visitor_id(request):
+    """Посетитель для оценки уникальных просмотров: пользователь или хэш IP и User-Agent."""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    agent = request.META.get("HTTP_USER_AGENT", "")
+    return hashlib.sha1(f"{get_client_ip(request)}|{agent}".encode()).hexdigest()
+
+
+def track_article_view(article_id, visitor):
+    """
+    Учитывает просмотр статьи в Redis: счётчик в общем хэше и посетителя в HyperLogLog статьи.
+    В БД просмотры переносит flush_article_views, без Redis счётчик обновляется сразу.
+    """
+    client = get_redis()
+    if client is None:
+        Article.objects.filter(pk=article_id).update(views_count=F("views_count") + 1)
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hincrby(ARTICLE_VIEWS_PENDING_KEY, article_id, 1)
+        pipe.pfadd(article_visitors_key(article_id), visitor)
+        pipe.execute()
+    except RedisError:
+        logger.warning("Не удалось учесть просмотр статьи в Redis", exc_info=True)
+
+
+def flush_article_views():
+    """
+    Переносит накопленные просмотры в views_count и оценку уникальных посетителей в unique_views_count
+    одним UPDATE. Хэш с просмотрами сначала переименовывается, поэтому новые просмотры не теряются,
+    а если перенос прервался, оставшийся хэш будет перенесён следующим запуском.
+    Параллельные запуски исключены блокировкой, а у пачки есть ключ, который UPDATE записывает в статьи:
+    пачка, перенесённая повторно после сбоя между UPDATE и удалением хэша, второй раз не прибавляется.
+    Возвращает число обновлённых статей.
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+    if not client.set(ARTICLE_VIEWS_FLUSH_LOCK_KEY, 1, nx=True, ex=ARTICLE_VIEWS_FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush_article_views(client)
+    finally:
+        client.delete(ARTICLE_VIEWS_FLUSH_LOCK_KEY)
+
+
+def _flush_article_views(client):
+    if not client.exists(ARTICLE_VIEWS_FLUSHING_KEY):
+        try:
+            client.rename(ARTICLE_VIEWS_PENDING_KEY, ARTICLE_VIEWS_FLUSHING_KEY)
+        except ResponseError:
+            # Новых просмотров нет
+            return 0
+    # Ключ пачки сохраняется до удаления хэша, повторный запуск получит тот же ключ
+    client.set(ARTICLE_VIEWS_BATCH_KEY, secrets.token_hex(16), nx=True)
+    batch = client.get(ARTICLE_VIEWS_BATCH_KEY).decode()
+    deltas = {int(article_id): int(count) for article_id, count in client.hgetall(ARTICLE_VIEWS_FLUSHING_KEY).items()}
+    pipe = client.pipeline(transaction=False)
+    for article_id in deltas:
+        pipe.pfcount(article_visitors_key(article_id))
+    uniques = dict(zip(deltas, pipe.execute(), strict=True))
+
+    updated = 0
+    if deltas:
+        updated = (
+            Article.objects.filter(pk__in=deltas)
+            .exclude(views_flush_key=batch)
+            .update(
+                views_count=F("views_count")
+                + Case(
+                    *[When(pk=article_id, then=Value(count)) for article_id, count in deltas.items()],
+                    default=Value(0),
+                    output_field=PositiveIntegerField(),
+                ),
+                unique_views_count=Case(
+                    *[When(pk=article_id, then=Value(count)) for article_id, count in uniques.items()],
+                    default=F("unique_views_count"),
+                    output_field=PositiveIntegerField(),
+                ),
+                views_flush_key=batch,
+            )
+        )
+    client.delete(ARTICLE_VIEWS_FLUSHING_KEY, ARTICLE_VIEWS_BATCH_KEY)
+    return updated
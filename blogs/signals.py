@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from all_fixture.images import register_image_variants
+from blogs.models import Article, Tag
+
+register_image_variants(Article, "cover_image", "cover_image_variants")
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def update_search_vector_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Теги входят в поисковый вектор статьи: пересчитываем его при изменении набора тегов."""
+    if reverse and action == "pre_clear":
+        # После clear со стороны тега статьи уже не найти, запоминаем их заранее
+        instance._search_article_ids = list(instance.article_set.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        articles = Article.objects.filter(pk=instance.pk)
+    elif action == "post_clear":
+        articles = Article.objects.filter(pk__in=instance.__dict__.pop("_search_article_ids", []))
+    else:
+        articles = Article.objects.filter(pk__in=pk_set)
+    articles.update(search_vector=Article.build_search_vector())
+
+
+@receiver(post_save, sender=Tag)
+def update_search_vector_on_tag_rename(sender, instance, created, **kwargs):
+    if not created:
+        Article.objects.filter(tags=instance).update(search_vector=Article.build_search_vector())
@@ -5,6 +5,7 @@ from django.conf import settings
 from django.core.mail import send_mail
 
 from blogs.models import Article
+from blogs.services import flush_article_views
 
 logger = logging.getLogger(__name__)
 
@@ -29,3 +30,11 @@ def send_moderation_notification(article_id):
         logger.error(f"Статья с ID {article_id} не найдена.")
     except Exception as e:
         logger.exception(f"Ошибка при отправке уведомления о модерации: {e}")
+
+
+@shared_task
+def flush_article_views_task():
+    """Переносит накопленные в Redis просмотры статей в БД (по расписанию Celery beat)."""
+    updated = flush_article_views()
+    if updated:
+        logger.info(f"Просмотры перенесены для {updated} статей")
@@ -1 +1,260 @@
-# Create your tests here.
+import os
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from redis.exceptions import RedisError
+from rest_framework import status
+
+from all_fixture import redis_client
+from blogs.models import Article, ArticleStatus, Category, Comment, CommentLike, Tag
+from blogs.services import (
+    ARTICLE_VIEWS_BATCH_KEY,
+    ARTICLE_VIEWS_FLUSH_LOCK_KEY,
+    ARTICLE_VIEWS_FLUSHING_KEY,
+    ARTICLE_VIEWS_PENDING_KEY,
+    flush_article_views,
+    track_article_view,
+)
+from users.models import User
+
+
+class CommentTreeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="author@test.ru", phone_number="+79990000001")
+        self.reader = User.objects.create(email="reader@test.ru", phone_number="+79990000002")
+        category = Category.objects.create(name="Путешествия", slug="travel")
+        self.article = Article.objects.create(
+            author=self.user,
+            category=category,
+            title="Статья",
+            short_description="Кратко",
+            cover_image="articles/covers/cover.jpg",
+            content="Текст",
+        )
+        self.roots = []
+        for number in range(3):
+            root = self.comment(f"Комментарий {number}")
+            reply = self.comment("Ответ", parent=root)
+            self.comment("Ответ на ответ", parent=reply)
+            self.comment("На модерации", parent=root, status="pending")
+            self.roots.append(root)
+        CommentLike.objects.create(comment=self.roots[0], user=self.user, is_like=True)
+        CommentLike.objects.create(comment=self.roots[0], user=self.reader, is_like=False)
+        self.url = reverse("comment-list")
+
+    def comment(self, text, parent=None, status="approved"):
+        return Comment.objects.create(article=self.article, user=self.user, parent=parent, text=text, status=status)
+
+    def test_tree_loaded_with_constant_queries(self):
+        """Страница комментариев с ответами и реакциями загружается тремя запросами"""
+        # count, страница комментариев верхнего уровня, все ответы страницы
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"article": self.article.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        first = response.data["results"][0]
+        self.assertEqual((first["likes_count"], first["dislikes_count"]), (1, 1))
+        self.assertEqual(len(first["replies"]), 1)
+        self.assertEqual(first["replies"][0]["replies"][0]["text"], "Ответ на ответ")
+
+    def test_cursor_over_top_level(self):
+        """Курсор проходит только по комментариям верхнего уровня"""
+        response = self.client.get(self.url, {"article": self.article.id, "cursor": "", "limit": 2})
+        ids = [comment["id"] for comment in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        ids += [comment["id"] for comment in response.data["results"]]
+        self.assertEqual(ids, [root.id for root in self.roots])
+
+    def test_invalid_article(self):
+        """Нечисловой ID статьи — ошибка 400"""
+        response = self.client.get(self.url, {"article": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(REDIS_URL=None)
+class ArticleViewsTest(TestCase):
+    def test_views_without_redis(self):
+        """Без Redis просмотр сразу увеличивает views_count, переносить нечего"""
+        user = User.objects.create(email="author@test.ru", phone_number="+79990000001")
+        article = Article.objects.create(
+            author=user,
+            category=Category.objects.create(name="Путешествия", slug="travel"),
+            title="Статья",
+            short_description="Кратко",
+            cover_image="articles/covers/cover.jpg",
+            content="Текст",
+        )
+        track_article_view(article.id, "visitor")
+        track_article_view(article.id, "visitor")
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 2)
+        self.assertEqual(flush_article_views(), 0)
+
+
+@override_settings(REDIS_URL=os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"))
+class RedisArticleViewsTest(TestCase):
+    def setUp(self):
+        redis_client._client = None
+        self.redis = redis_client.get_redis()
+        try:
+            self.redis.flushdb()
+        except Exception:
+            self.skipTest("Redis недоступен")
+        user = User.objects.create(email="author@test.ru", phone_number="+79990000001")
+        category = Category.objects.create(name="Путешествия", slug="travel")
+        self.articles = [
+            Article.objects.create(
+                author=user,
+                category=category,
+                title=f"Статья {i}",
+                short_description="Кратко",
+                cover_image="articles/covers/cover.jpg",
+                content="Текст",
+            )
+            for i in range(2)
+        ]
+
+    def tearDown(self):
+        self.redis.flushdb()
+        redis_client._client = None
+
+    def test_views_flushed_in_one_update(self):
+        """Просмотры копятся в Redis и переносятся в БД одним UPDATE, повторы посетителя не уникальны"""
+        first, second = self.articles
+        with self.assertNumQueries(0):
+            for visitor in ("a", "a", "b"):
+                track_article_view(first.id, visitor)
+            track_article_view(second.id, "a")
+        first.refresh_from_db()
+        self.assertEqual(first.views_count, 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_article_views(), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.views_count, first.unique_views_count), (3, 2))
+        self.assertEqual((second.views_count, second.unique_views_count), (1, 1))
+        self.assertFalse(self.redis.exists(ARTICLE_VIEWS_PENDING_KEY, ARTICLE_VIEWS_FLUSHING_KEY))
+
+        # Новые просмотры добавляются к перенесённым, уникальные считаются за всё время
+        track_article_view(first.id, "a")
+        track_article_view(first.id, "c")
+        self.assertEqual(flush_article_views(), 1)
+        first.refresh_from_db()
+        self.assertEqual((first.views_count, first.unique_views_count), (5, 3))
+        self.assertEqual(flush_article_views(), 0)
+
+    def test_interrupted_flush_resumed(self):
+        """Хэш прерванного переноса переносится первым, просмотры, пришедшие после, не теряются"""
+        article = self.articles[0]
+        track_article_view(article.id, "a")
+        self.redis.rename(ARTICLE_VIEWS_PENDING_KEY, ARTICLE_VIEWS_FLUSHING_KEY)
+        track_article_view(article.id, "b")
+
+        self.assertEqual(flush_article_views(), 1)
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 1)
+        self.assertEqual(flush_article_views(), 1)
+        article.refresh_from_db()
+        self.assertEqual((article.views_count, article.unique_views_count), (2, 2))
+
+    def test_concurrent_flush_skipped(self):
+        """Пока идёт перенос, второй запуск ничего не делает"""
+        track_article_view(self.articles[0].id, "a")
+        self.redis.set(ARTICLE_VIEWS_FLUSH_LOCK_KEY, 1)
+        self.assertEqual(flush_article_views(), 0)
+        self.redis.delete(ARTICLE_VIEWS_FLUSH_LOCK_KEY)
+        self.assertEqual(flush_article_views(), 1)
+
+    def test_flush_repeated_after_crash(self):
+        """Пачка, перенесённая повторно после сбоя между UPDATE и удалением хэша, не прибавляется дважды"""
+        article = self.articles[0]
+        track_article_view(article.id, "a")
+        delete = self.redis.delete
+
+        def fail_on_flushing(*keys):
+            if ARTICLE_VIEWS_FLUSHING_KEY in keys:
+                raise RedisError("сбой")
+            return delete(*keys)
+
+        with mock.patch.object(self.redis, "delete", side_effect=fail_on_flushing), self.assertRaises(RedisError):
+            flush_article_views()
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 1)
+
+        self.assertEqual(flush_article_views(), 0)
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 1)
+        self.assertFalse(self.redis.exists(ARTICLE_VIEWS_FLUSHING_KEY, ARTICLE_VIEWS_BATCH_KEY))
+
+    def test_forwarded_for_not_trusted(self):
+        """Подменённый X-Forwarded-For не даёт новых уникальных посетителей, учитывается X-Real-IP от nginx"""
+        article = self.articles[0]
+        article.status = ArticleStatus.PUBLISHED
+        article.save()
+        url = reverse("article-detail", args=[article.id])
+        for i in range(3):
+            self.client.get(url, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 1.2.3.4", HTTP_X_REAL_IP="1.2.3.4")
+        flush_article_views()
+        article.refresh_from_db()
+        self.assertEqual((article.views_count, article.unique_views_count), (3, 1))
+
+
+class ArticleSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="author@test.ru", phone_number="+79990000001")
+        self.category = Category.objects.create(name="Путешествия", slug="travel")
+        self.url = reverse("article-list")
+
+    def article(self, title, content, status=ArticleStatus.PUBLISHED):
+        return Article.objects.create(
+            author=self.user,
+            category=self.category,
+            title=title,
+            short_description="Кратко",
+            cover_image="articles/covers/cover.jpg",
+            content=content,
+            status=status,
+        )
+
+    def test_ranked_search_with_headline(self):
+        """Поиск учитывает словоформы, ранжирует заголовок выше текста и подсвечивает совпадения"""
+        in_content = self.article("Отдых у моря", "Рассказываем, как выбрать отель в Сочи")
+        in_title = self.article("Лучшие отели Сочи", "Подборка мест для отдыха")
+        self.article("Горы", "Походы и палатки")
+        self.article("Отели Абхазии", "Черновик", status=ArticleStatus.DRAFT)
+
+        response = self.client.get(self.url, {"search": "отелях"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual([article["id"] for article in results], [in_title.id, in_content.id])
+        self.assertIn("<mark>отель</mark>", results[1]["search_headline"])
+
+    def test_tags_searched(self):
+        """Статьи находятся по названиям тегов, вектор следует за изменением тегов"""
+        article = self.article("Статья", "Текст")
+        tag = Tag.objects.create(name="Дайвинг", slug="diving")
+        article.tags.add(tag)
+        response = self.client.get(self.url, {"search": "дайвинг"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [article.id])
+
+        tag.article_set.clear()
+        self.assertEqual(self.client.get(self.url, {"search": "дайвинг"}).data["results"], [])
+
+    def test_headline_escaped(self):
+        """Разметка текста статьи не попадает в search_headline, кроме подсветки <mark>"""
+        self.article("Отдых", '<p>Лучший <b>отель</b> у моря</p><script>alert("x")</script> a < b & c')
+        headline = self.client.get(self.url, {"search": "отель"}).data["results"][0]["search_headline"]
+        self.assertIn("<mark>отель</mark>", headline)
+        self.assertNotIn("<b>", headline)
+        self.assertNotIn("<script>", headline)
+        self.assertEqual(headline.replace("<mark>", "").replace("</mark>", "").count("<"), 0)
+
+    def test_vector_follows_edits(self):
+        """Вектор пересчитывается при сохранении, английские слова ищутся по основе"""
+        article = self.article("Статья", "Текст")
+        article.content = "Best hotels near the beach"
+        article.save(update_fields=["content"])
+        response = self.client.get(self.url, {"search": "hotel"})
+        self.assertEqual([article["id"] for article in response.data["results"]], [article.id])
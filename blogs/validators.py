@@ -2,10 +2,9 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.utils.functional import cached_property
 
+from all_fixture.validators.forbidden_words import contains_forbidden_word
 from blogs.constants import (
     ALLOWED_VIDEO_EXT,
     MAX_FILE_SIZE_BYTES,
@@ -15,20 +14,13 @@ from blogs.constants import (
 
 # ───────────────────────────── forbidden-words ──────────────────────────────
 class DynamicForbiddenWordValidator:
-    """Проверяет текст на наличие запрещённых слов из файла."""
+    """Проверяет текст на наличие запрещённых слов из файла (общий автомат, пересобирается при изменении файла)."""
 
     def __init__(self, field_name: str | None = None) -> None:
         self.field_name = field_name
 
-    @cached_property
-    def forbidden_words(self) -> set[str]:
-        words_file = Path(settings.BASE_DIR) / "all_fixture" / "validators" / "forbidden_words.txt"
-        if not words_file.exists():
-            raise FileNotFoundError(f"Не найден {words_file.relative_to(settings.BASE_DIR)}")
-        return {w.strip().lower() for w in words_file.read_text(encoding="utf-8").splitlines() if w.strip()}
-
     def __call__(self, value: str) -> str:
-        if isinstance(value, str) and any(bad in value.lower() for bad in self.forbidden_words):
+        if isinstance(value, str) and contains_forbidden_word(value):
             field = f" в поле «{self.field_name}»" if self.field_name else ""
             raise ValidationError(f"Недопустимое слово{field}.")
         return value
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     OpenApiResponse,
@@ -6,12 +7,15 @@ from drf_spectacular.utils import (
 )
 from rest_framework import filters, mixins, permissions, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 # единый источник констант для drf-spectacular
+from all_fixture.pagination import CustomLOPagination
 from all_fixture.views_fixture import (
     ARTICLE_ID,
+    ARTICLE_Q,
     BLOG_SETTINGS,
     CATEGORY_ID,
     CATEGORY_SETTINGS,
@@ -42,6 +46,7 @@ from blogs.serializers import (
     TagSerializer,
     ThemeSerializer,
 )
+from blogs.services import attach_comment_replies, comments_with_reactions, get_visitor_id, track_article_view
 
 
 # ─── Справочники ───────────────────────────────────────────────────────────────
@@ -163,7 +168,8 @@ class ArticleViewSet(
 
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    pagination_class = CustomLOPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = ArticleFilter
     ordering_fields = [
         "published_at",
@@ -175,7 +181,6 @@ class ArticleViewSet(
         "rating",
         "-rating",
     ]
-    search_fields = ["title", "content", "tags__name"]
 
     def get_permissions(self):
         if self.action in ("list", "retrieve"):
@@ -187,10 +192,20 @@ class ArticleViewSet(
         return [IsAuthorOrAdmin()]
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = (
+            super()
+            .get_queryset()
+            .prefetch_related(Prefetch("comments", queryset=comments_with_reactions(), to_attr="approved_comments"))
+        )
         user = self.request.user
         return qs if user.is_staff else qs.filter(status=ArticleStatus.PUBLISHED)
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.data.get("status") == ArticleStatus.PUBLISHED:
+            track_article_view(response.data["id"], get_visitor_id(request))
+        return response
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, status=ArticleStatus.DRAFT)
 
@@ -216,11 +231,22 @@ class ArticleViewSet(
 
 
 # ─── Комментарии и реакции ─────────────────────────────────────────────────────
+def id_query_param(request, name):
+    """ID из параметра запроса или None, если параметра нет; не число — ошибка 400, а не 500 в фильтре."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Ожидается целое число."}) from None
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="Список комментариев",
         tags=[COMMENTS_SETTINGS["name"]],
-        parameters=[LIMIT, OFFSET],
+        parameters=[ARTICLE_Q, LIMIT, OFFSET],
         responses={200: CommentSerializer(many=True)},
     ),
     create=extend_schema(
@@ -231,9 +257,29 @@ class ArticleViewSet(
     ),
 )
 class CommentViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+    """
+    Комментарии верхнего уровня с деревом ответов.
+    Страница комментариев, их ответы и реакции загружаются двумя запросами (blogs.services),
+    с параметром cursor страницы выбираются по ключу (created_at, id).
+    """
+
     queryset = Comment.objects.filter(status="approved")
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CustomLOPagination
+
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+        qs = comments_with_reactions().filter(parent__isnull=True).order_by("created_at", "id")
+        article_id = id_query_param(self.request, "article")
+        if article_id is not None:
+            qs = qs.filter(article_id=article_id)
+        return qs
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return attach_comment_replies(page) if page is not None else None
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, status="pending")
@@ -272,8 +318,8 @@ class CommentLikeViewSet(
     def get_queryset(self):
         request: Request = self.request
         qs = CommentLike.objects.filter(user=request.user)
-        comment_id = request.query_params.get("comment")
-        if comment_id:
+        comment_id = id_query_param(request, "comment")
+        if comment_id is not None:
             qs = qs.filter(comment_id=comment_id)
         return qs
 
@@ -5,3 +5,6 @@ class CalendarsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "calendars"
     verbose_name = "Календарь"
+
+    def ready(self):
+        import calendars.signals  # noqa: F401
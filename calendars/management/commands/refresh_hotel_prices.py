@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from calendars.services import refresh_hotel_prices
+from hotels.models import Hotel
+
+
+class Command(BaseCommand):
+    help = "Команда для пересчёта стоимости номеров по ночам и сводки стоимости отелей"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, nargs="*", help="ID отелей, по умолчанию все")
+
+    def handle(self, *args, **options):
+        hotel_ids = options["hotel"] or list(Hotel.objects.values_list("id", flat=True))
+        for hotel_id in hotel_ids:
+            refresh_hotel_prices(hotel_id)
+        self.stdout.write(self.style.SUCCESS(f"Стоимость по ночам пересчитана для {len(hotel_ids)} отелей"))
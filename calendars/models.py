@@ -97,3 +97,113 @@ class CalendarPrice(models.Model):
 
     def __str__(self):
         return f"{self.room} - {self.price}"
+
+
+class HotelPriceSummary(models.Model):
+    """
+    Сводка стоимости номеров отеля по ночам.
+    Пересчитывается из CalendarDate/CalendarPrice (calendars.services), в поиске отелей
+    используется вместо подзапроса по всем ценам календаря.
+    """
+
+    hotel = models.ForeignKey(
+        "hotels.Hotel",
+        on_delete=models.CASCADE,
+        related_name="price_summaries",
+        verbose_name="Отель",
+        help_text="Отель",
+    )
+    date = models.DateField(
+        verbose_name="Ночь",
+        help_text="Дата ночи проживания",
+    )
+    min_price = models.DecimalField(
+        verbose_name="Минимальная стоимость за ночь",
+        max_digits=10,
+        decimal_places=2,
+    )
+    max_price = models.DecimalField(
+        verbose_name="Максимальная стоимость за ночь",
+        max_digits=10,
+        decimal_places=2,
+    )
+    min_price_with_discount = models.DecimalField(
+        verbose_name="Минимальная стоимость за ночь с учётом скидки",
+        max_digits=10,
+        decimal_places=2,
+    )
+    available_for_booking = models.BooleanField(
+        verbose_name="Доступна для бронирования",
+        default=True,
+    )
+
+    class Meta:
+        verbose_name = "Сводка стоимости отеля"
+        verbose_name_plural = "Сводки стоимости отелей"
+        constraints = [
+            models.UniqueConstraint(fields=["hotel", "date"], name="unique_hotel_price_summary_date"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "available_for_booking"], name="idx_price_summary_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel_id} - {self.date}: {self.min_price}"
+
+
+class RoomNightPrice(models.Model):
+    """
+    Стоимость номера за конкретную ночь.
+    Разворачивается из периодов CalendarDate и цен CalendarPrice (calendars.services),
+    используется для расчёта стоимости проживания без перебора периодов.
+    """
+
+    room = models.ForeignKey(
+        "rooms.Room",
+        on_delete=models.CASCADE,
+        related_name="night_prices",
+        verbose_name="Номер",
+        help_text="Номер",
+    )
+    calendar_date = models.ForeignKey(
+        CalendarDate,
+        on_delete=models.CASCADE,
+        related_name="night_prices",
+        verbose_name="Календарь стоимости номеров",
+        help_text="Период, из которого взята стоимость ночи",
+    )
+    date = models.DateField(
+        verbose_name="Ночь",
+        help_text="Дата ночи проживания",
+    )
+    price = models.DecimalField(
+        verbose_name="Стоимость за ночь",
+        max_digits=10,
+        decimal_places=2,
+    )
+    price_with_discount = models.DecimalField(
+        verbose_name="Стоимость за ночь с учётом скидки",
+        max_digits=10,
+        decimal_places=2,
+    )
+    available_for_booking = models.BooleanField(
+        verbose_name="Доступна для бронирования",
+        default=True,
+    )
+
+    class Meta:
+        verbose_name = "Стоимость номера за ночь"
+        verbose_name_plural = "Стоимость номеров по ночам"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "date"],
+                include=["price", "price_with_discount", "available_for_booking"],
+                name="unique_room_night_price_date",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date", "room"], name="idx_room_night_price_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} - {self.date}: {self.price}"
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.postgres.aggregates import BoolOr
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.db.models.functions import Coalesce
+
+from all_fixture.cache import HOTELS_MAP, HOTELS_SHOWCASE, TOURS_SHOWCASE, bump_cache_version
+from all_fixture.transactions import on_commit_once
+from calendars.models import CalendarDate, HotelPriceSummary, RoomNightPrice
+
+
+def price_with_discount(price, calendar_date):
+    """
+    Стоимость ночи с учётом скидки периода.
+    Скидка до 1 включительно считается долей от цены, больше 1 — фиксированной суммой.
+    """
+    if not calendar_date.discount or calendar_date.discount_amount is None:
+        return price
+    if calendar_date.discount_amount <= 1:
+        discounted = price * (1 - calendar_date.discount_amount)
+    else:
+        discounted = price - calendar_date.discount_amount
+    return max(discounted, Decimal("0.00")).quantize(Decimal("0.01"))
+
+
+def refresh_room_night_prices(hotel_id):
+    """
+    Пересобирает стоимость номеров отеля по ночам из периодов календаря.
+    Если ночь номера покрывают несколько периодов, берётся доступный для бронирования и более дешёвый.
+    """
+    calendar_dates = CalendarDate.objects.filter(hotel_id=hotel_id).prefetch_related("calendar_prices")
+    nights = {}
+    for calendar_date in calendar_dates:
+        for calendar_price in calendar_date.calendar_prices.all():
+            if calendar_price.price is None:
+                continue
+            night_price = RoomNightPrice(
+                room_id=calendar_price.room_id,
+                calendar_date=calendar_date,
+                price=calendar_price.price,
+                price_with_discount=price_with_discount(calendar_price.price, calendar_date),
+                available_for_booking=calendar_date.available_for_booking,
+            )
+            rank = (not night_price.available_for_booking, night_price.price)
+            day = calendar_date.start_date
+            while day <= calendar_date.end_date:
+                key = (calendar_price.room_id, day)
+                if key not in nights or rank < nights[key][0]:
+                    nights[key] = (rank, night_price)
+                day += timedelta(days=1)
+
+    with transaction.atomic():
+        RoomNightPrice.objects.filter(calendar_date__hotel_id=hotel_id).delete()
+        RoomNightPrice.objects.bulk_create(
+            [
+                RoomNightPrice(
+                    room_id=room_id,
+                    calendar_date=night_price.calendar_date,
+                    date=day,
+                    price=night_price.price,
+                    price_with_discount=night_price.price_with_discount,
+                    available_for_booking=night_price.available_for_booking,
+                )
+                for (room_id, day), (_, night_price) in nights.items()
+            ],
+            batch_size=1000,
+        )
+
+
+def refresh_hotel_price_summary(hotel_id):
+    """
+    Пересчитывает сводку стоимости отеля по ночам из стоимости номеров.
+    Ночь доступна, если доступен хотя бы один номер, цены недоступных номеров
+    учитываются только для ночей без доступных номеров.
+    """
+    available = Q(available_for_booking=True)
+    nights = (
+        RoomNightPrice.objects.filter(calendar_date__hotel_id=hotel_id)
+        .values("date")
+        .annotate(
+            low=Coalesce(Min("price", filter=available), Min("price")),
+            high=Coalesce(Max("price", filter=available), Max("price")),
+            low_with_discount=Coalesce(Min("price_with_discount", filter=available), Min("price_with_discount")),
+            available=BoolOr("available_for_booking"),
+        )
+    )
+    with transaction.atomic():
+        HotelPriceSummary.objects.filter(hotel_id=hotel_id).delete()
+        HotelPriceSummary.objects.bulk_create(
+            [
+                HotelPriceSummary(
+                    hotel_id=hotel_id,
+                    date=night["date"],
+                    min_price=night["low"],
+                    max_price=night["high"],
+                    min_price_with_discount=night["low_with_discount"],
+                    available_for_booking=night["available"],
+                )
+                for night in nights
+            ],
+            batch_size=1000,
+        )
+
+
+def refresh_hotel_prices(hotel_id):
+    """
+    Пересчитывает стоимость номеров по ночам и сводку стоимости отеля.
+    Витрины и кластеры карты сбрасываются после фиксации пересчёта, а не изменения календаря:
+    иначе запрос между ними закэшировал бы старые цены под новой версией.
+    """
+    with transaction.atomic():
+        refresh_room_night_prices(hotel_id)
+        refresh_hotel_price_summary(hotel_id)
+        bump_cache_version(HOTELS_SHOWCASE, TOURS_SHOWCASE, HOTELS_MAP)
+
+
+def schedule_hotel_prices_refresh(hotel_id):
+    """
+    Откладывает пересчёт стоимости номеров и сводки отеля до фиксации транзакции.
+    Несколько изменений календаря одного отеля в транзакции дают один пересчёт.
+    """
+    if hotel_id is None:
+        return
+    on_commit_once(("hotel_prices", hotel_id), lambda: refresh_hotel_prices(hotel_id))
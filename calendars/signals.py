@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from calendars.models import CalendarDate, CalendarPrice
+from calendars.services import schedule_hotel_prices_refresh
+
+
+@receiver([post_save, post_delete], sender=CalendarDate)
+def calendar_date_changed(sender, instance, **kwargs):
+    """
+    Пересчёт стоимости номеров, сводки отеля и сброс витрин и кластеров карты при изменении периода календаря.
+    Цены периода сериализатор сохраняет через bulk_create без сигналов,
+    их покрывает пересчёт, отложенный до фиксации той же транзакции; витрины сбрасывает сам пересчёт.
+    """
+    schedule_hotel_prices_refresh(instance.hotel_id)
+
+
+@receiver([post_save, post_delete], sender=CalendarPrice)
+def calendar_price_changed(sender, instance, **kwargs):
+    """Пересчёт стоимости номеров, сводки отеля и сброс витрин и кластеров карты при изменении цены номера."""
+    if CalendarPrice.calendar_date.is_cached(instance):
+        hotel_id = instance.calendar_date.hotel_id
+    else:
+        hotel_id = CalendarDate.objects.filter(pk=instance.calendar_date_id).values_list("hotel_id", flat=True).first()
+    schedule_hotel_prices_refresh(hotel_id)
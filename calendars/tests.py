@@ -1 +1,72 @@
-# Create your tests here.
+from datetime import date
+from decimal import Decimal
+
+from unittest import mock
+
+from django.test import TestCase
+
+from calendars.models import CalendarDate, CalendarPrice, HotelPriceSummary
+from hotels.filters import HotelFilter
+from hotels.models import Hotel
+from rooms.models import Room
+
+
+class HotelPriceSummaryTest(TestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        self.room = Room.objects.create(hotel=self.hotel, category="Стандарт", area=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.calendar_date = CalendarDate.objects.create(
+                hotel=self.hotel,
+                start_date=date(2030, 7, 1),
+                end_date=date(2030, 7, 3),
+                discount=True,
+                discount_amount=Decimal("0.10"),
+            )
+            CalendarPrice.objects.create(calendar_date=self.calendar_date, room=self.room, price=Decimal("5000.00"))
+
+    def search(self, **params):
+        return HotelFilter(params, queryset=Hotel.objects.all()).qs
+
+    def test_summary_refreshed_on_price_change(self):
+        """Сводка пересчитывается при изменении цены и удалении периода"""
+        summary = HotelPriceSummary.objects.filter(hotel=self.hotel).order_by("date")
+        self.assertEqual(summary.count(), 3)
+        self.assertEqual(summary[0].min_price, Decimal("5000.00"))
+        self.assertEqual(summary[0].min_price_with_discount, Decimal("4500.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CalendarPrice.objects.filter(room=self.room).get().delete()
+            CalendarPrice.objects.create(calendar_date=self.calendar_date, room=self.room, price=Decimal("3000.00"))
+        self.assertEqual(summary.first().min_price, Decimal("3000.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.calendar_date.delete()
+        self.assertFalse(summary.exists())
+
+    def test_cache_bumped_after_summary_refresh(self):
+        """Витрины и карта сбрасываются только после фиксации пересчитанной сводки"""
+        summary = HotelPriceSummary.objects.filter(hotel=self.hotel).order_by("date")
+        bumped_prices = []
+
+        def bump(*namespaces):
+            bumped_prices.append(summary.first().min_price)
+
+        with mock.patch("calendars.services.bump_cache_version", side_effect=bump):
+            with self.captureOnCommitCallbacks(execute=True):
+                CalendarPrice.objects.filter(room=self.room).update(price=Decimal("3000.00"))
+                self.calendar_date.save()
+                self.assertEqual(bumped_prices, [])
+        self.assertEqual(bumped_prices[-1], Decimal("3000.00"))
+
+    def test_search_by_dates_and_price(self):
+        """Поиск отелей по датам и цене использует сводку стоимости"""
+        hotels = self.search(date_range_after="2030-07-01", date_range_before="2030-07-04")
+        self.assertEqual(list(hotels), [self.hotel])
+        self.assertEqual(hotels[0].min_price, Decimal("5000.00"))
+        self.assertEqual(hotels[0].min_price_with_discount, Decimal("4500.00"))
+
+        self.assertFalse(self.search(date_range_after="2030-07-02", date_range_before="2030-07-05").exists())
+        self.assertFalse(
+            self.search(date_range_after="2030-07-01", date_range_before="2030-07-02", price_max="4000").exists()
+        )
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Сторонние библиотеки
     "django_filters",
     "rest_framework",
@@ -173,8 +174,9 @@ STATIC_ROOT = BASE_DIR / "static"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "static", "media")
-# Настройки для тестов
-if "test" in sys.argv:
+# Настройки для тестов: manage.py test или pytest (pytest-django импортирует настройки после pytest)
+TESTING = "test" in sys.argv or "pytest" in sys.modules
+if TESTING:
     MEDIA_ROOT = tempfile.mkdtemp(prefix="test_media_")
 
 # Ограничение на размер загружаемого файла в 10 мегабайт
@@ -251,6 +253,9 @@ LOGIN_BAN_STEPS = [
     timedelta(days=1),
     timedelta(days=7),
 ]
+LOGIN_ATTEMPTS_WINDOW = timedelta(minutes=15)  # скользящее окно неверных попыток (при наличии Redis)
+LOGIN_IP_ATTEMPTS_LIMIT = 20  # неверных попыток с одного IP за окно
+LOGIN_CODE_TTL = timedelta(minutes=5)  # срок действия кода входа из письма
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "API приложения Куда Угодно",
@@ -305,12 +310,64 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT", 465))
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = False
-EMAIL_USE_SSL = True
+# Для локального SMTP-сервера без шифрования (например, python -m aiosmtpd -n -l localhost:1025) — False
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "True") == "True"
+# Рассылки по подписчикам: писем в секунду и размер пачки получателей
+CAMPAIGN_RATE_LIMIT = float(os.getenv("CAMPAIGN_RATE_LIMIT", 10))
+CAMPAIGN_CHUNK_SIZE = int(os.getenv("CAMPAIGN_CHUNK_SIZE", 500))
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# Построение вариантов изображений идёт в отдельной очереди, её обрабатывает пул процессов воркера celery_images
+CELERY_TASK_ROUTES = {
+    "all_fixture.images.build_image_variants_task": {"queue": "images"},
+}
+CELERY_BEAT_SCHEDULE = {
+    "refresh-what-about-collections": {
+        "task": "hotels.tasks.refresh_what_about_collections",
+        "schedule": 60 * 10,
+    },
+    "flush-article-views": {
+        "task": "blogs.tasks.flush_article_views_task",
+        "schedule": 60,
+    },
+    "send-outgoing-emails": {
+        "task": "mailings.tasks.send_outgoing_emails",
+        "schedule": 60,
+    },
+    "flush-login-attempts": {
+        "task": "users.tasks.flush_login_attempts_task",
+        "schedule": 60,
+    },
+}
+
+# Общий для всех воркеров кэш в Redis, без REDIS_CACHE_URL — локальный кэш процесса
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "ku",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+# Redis для множеств и счётчиков (ротация Вжухов и т.п.), по умолчанию тот же, что и для кэша
+REDIS_URL = os.getenv("REDIS_URL", REDIS_CACHE_URL)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+# Максимальный размер страницы списков (в том числе запросов без limit)
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 100))
+# С какого размера таблицы count списка без фильтров берётся из статистики PostgreSQL
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 100_000))
+# Время жизни кэша вариантов фильтров (страны, города, туроператоры), в секундах
+FILTER_CHOICES_TIMEOUT = int(os.getenv("FILTER_CHOICES_TIMEOUT", 60 * 60))
 
 CORS_ALLOW_CREDENTIALS = True
 # Разрешенные домены для CORS (кросс-доменных запросов)
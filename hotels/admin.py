@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from hotels.models import Hotel, HotelPhoto, HotelRules, HotelWhatAbout, TypeOfMeal
+from hotels.services import update_cover_photos
 
 
 @admin.register(Hotel)
@@ -24,6 +25,19 @@ class TypeOfMealsAdmin(admin.ModelAdmin):
 class HotelPhotoAdmin(admin.ModelAdmin):
     list_display = ("id", "photo")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        update_cover_photos([obj.hotel_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        update_cover_photos([obj.hotel_id])
+
+    def delete_queryset(self, request, queryset):
+        hotel_ids = set(queryset.values_list("hotel_id", flat=True))
+        super().delete_queryset(request, queryset)
+        update_cover_photos(hotel_ids)
+
 
 @admin.register(HotelRules)
 class HotelRulesAdmin(admin.ModelAdmin):
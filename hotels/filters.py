@@ -1,5 +1,9 @@
-from django.db.models import F, OuterRef, Q, Subquery
+from datetime import timedelta
+
+from django.db.models import Count, F, Min
+from django.utils import timezone
 from django_filters import (
+    CharFilter,
     ChoiceFilter,
     DateFromToRangeFilter,
     FilterSet,
@@ -7,17 +11,32 @@ from django_filters import (
     NumberFilter,
     RangeFilter,
 )
+from rest_framework.exceptions import ValidationError
 
 from all_fixture.choices import PlaceChoices, TypeOfHolidayChoices, TypeOfMealChoices
 from all_fixture.filters.filter_fixture import filter_choices
-from all_fixture.views_fixture import MAX_PRICE, MAX_RATING, MAX_STARS, MIN_PRICE, MIN_RATING, MIN_STARS
-from calendars.models import CalendarPrice
+from all_fixture.geo import bbox_q, haversine_km, parse_coordinates, radius_bbox
+from all_fixture.trigram import trigram_search
+from all_fixture.views_fixture import (
+    MAX_PRICE,
+    MAX_RADIUS_KM,
+    MAX_RATING,
+    MAX_STARS,
+    MIN_PRICE,
+    MIN_RATING,
+    MIN_STARS,
+    NEAR_DEFAULT_RADIUS_KM,
+)
 from hotels.models import Hotel
 
 
 class HotelFilter(FilterSet):
     """Класс фильтров для расширенного поиска отелей."""
 
+    search = CharFilter(
+        method="filter_by_name",
+        label="Поиск по названию отеля (с учётом опечаток)",
+    )
     date_range = DateFromToRangeFilter(
         method="filter_by_dates",
         label="Диапазон дат в формате (YYYY-MM-DD)",
@@ -73,6 +92,24 @@ class HotelFilter(FilterSet):
         lookup_expr="exact",
     )
 
+    near = CharFilter(
+        method="filter_by_near",
+        label="Точка поиска в формате широта,долгота",
+    )
+    radius = NumberFilter(
+        method="filter_by_radius",
+        label=f"Радиус поиска от точки near в км (по умолчанию {NEAR_DEFAULT_RADIUS_KM}, до {MAX_RADIUS_KM})",
+    )
+    bbox = CharFilter(
+        method="filter_by_bbox",
+        label="Область карты в формате мин_широта,мин_долгота,макс_широта,макс_долгота",
+    )
+    ordering = ChoiceFilter(
+        method="filter_by_ordering",
+        label="Сортировка: по цене (по умолчанию) или по расстоянию от точки near",
+        choices=[("min_price", "По цене"), ("distance", "По расстоянию")],
+    )
+
     class Meta:
         model = Hotel
         fields = []
@@ -87,57 +124,115 @@ class HotelFilter(FilterSet):
         except (ValueError, TypeError):
             return queryset.none()
 
+    def filter_by_name(self, queryset, name, value):
+        """Поиск по названию: подходящие отели идут первыми, аннотация search_similarity."""
+        self.searched = bool(value.strip())
+        return trigram_search(queryset, "name", value)
+
+    def filter_by_near(self, queryset, name, value):
+        """Точка поиска, сам поиск по радиусу выполняется в filter_queryset."""
+        self.near = parse_coordinates(value, 2)
+        if self.near is None:
+            raise ValidationError({"near": "Укажите точку в формате широта,долгота."})
+        return queryset
+
+    def filter_by_radius(self, queryset, name, value):
+        """Радиус поиска вокруг точки near."""
+        if not 0 < value <= MAX_RADIUS_KM:
+            raise ValidationError({"radius": f"Радиус должен быть больше 0 и не больше {MAX_RADIUS_KM} км."})
+        self.radius_km = float(value)
+        return queryset
+
+    def filter_by_bbox(self, queryset, name, value):
+        """Отели в области карты, при min_долгота > max_долгота область проходит через 180-й меридиан."""
+        bbox = parse_coordinates(value, 4)
+        if bbox is None or bbox[0] > bbox[2]:
+            raise ValidationError(
+                {"bbox": "Укажите область в формате мин_широта,мин_долгота,макс_широта,макс_долгота."}
+            )
+        return queryset.filter(bbox_q(*bbox, "width", "longitude"))
+
+    def filter_by_ordering(self, queryset, name, value):
+        """Сортировка применяется в filter_queryset после расчёта цен и расстояний."""
+        self.ordering = value
+        return queryset
+
+    def filter_by_distance(self, queryset):
+        """
+        Отели в радиусе от точки near с расстоянием в км в аннотации distance.
+        Описанный прямоугольник отсекает отели по индексу координат, точное расстояние считается только для них.
+        """
+        near = getattr(self, "near", None)
+        radius_km = getattr(self, "radius_km", None)
+        if near is None:
+            if radius_km is not None or getattr(self, "ordering", None) == "distance":
+                raise ValidationError({"near": "Для поиска по радиусу и сортировки по расстоянию укажите точку."})
+            return queryset
+        radius_km = radius_km or NEAR_DEFAULT_RADIUS_KM
+        lat, lon = near
+        return (
+            queryset.filter(bbox_q(*radius_bbox(lat, lon, radius_km), "width", "longitude"))
+            .annotate(distance=haversine_km(lat, lon, "width", "longitude"))
+            .filter(distance__lte=radius_km)
+        )
+
     def filter_by_dates(self, queryset, name, value):
         """Фильтрация по датам заезда/выезда."""
-        if name == "check_in_date":
-            self.check_in_date = value
-        elif name == "check_out_date":
-            self.check_out_date = value
+        self.check_in_date = value.start
+        self.check_out_date = value.stop
         return queryset
 
     def filter_by_price(self, queryset, name, value):
         """Фильтрация по цене."""
-        if name == "price_gte":
-            self.price_gte = value
-        elif name == "price_lte":
-            self.price_lte = value
+        self.price_gte = value.start
+        self.price_lte = value.stop
         return queryset
 
+    def get_nights(self):
+        """
+        Ночи проживания для поиска по сводке стоимости.
+        Возвращает фильтр по ночам и количество ночей, которые должны быть доступны.
+        """
+        check_in = getattr(self, "check_in_date", None)
+        check_out = getattr(self, "check_out_date", None)
+        if check_in and check_out and check_out > check_in:
+            return {"date__gte": check_in, "date__lt": check_out}, (check_out - check_in).days
+        if check_in:
+            return {"date": check_in}, 1
+        if check_out:
+            return {"date": check_out - timedelta(days=1)}, 1
+        return {"date__gte": timezone.now().date()}, None
+
     def filter_queryset(self, queryset):
         """Основная фильтрация с учетом всех параметров."""
-        queryset = super().filter_queryset(queryset)
-        filters = Q(
-            calendar_date__available_for_booking=True,
-        )
-        if hasattr(self, "check_in_date"):
-            filters &= Q(
-                calendar_date__start_date__lte=self.check_in_date,
-            )
-        if hasattr(self, "check_out_date"):
-            filters &= Q(
-                calendar_date__end_date__gte=self.check_out_date,
-            )
-        if hasattr(self, "price_gte"):
-            filters &= Q(
-                price__gte=self.price_gte,
-            )
-        if hasattr(self, "price_lte"):
-            filters &= Q(
-                price__lte=self.price_lte,
-            )
-        subquery = (
-            CalendarPrice.objects.filter(room__hotel=OuterRef("pk"))
-            .filter(filters)
-            .order_by("price")
-            .values("price")[:1]
+        queryset = self.filter_by_distance(super().filter_queryset(queryset))
+        nights_filter, nights = self.get_nights()
+        # Ночи сводки соединяются с отелями и агрегируются одним GROUP BY: фильтр до annotate
+        # ограничивает соединение нужными ночами (индекс по отелю и дате), отели без ночей отпадают
+        queryset = queryset.filter(
+            price_summaries__available_for_booking=True,
+            **{f"price_summaries__{lookup}": value for lookup, value in nights_filter.items()},
+        ).annotate(
+            min_price=Min("price_summaries__min_price"),
+            min_price_with_discount=Min("price_summaries__min_price_with_discount"),
+            available_nights=Count("price_summaries", distinct=True),
         )
+        if nights:
+            # Отель подходит, только если свободны все ночи проживания
+            queryset = queryset.filter(available_nights=nights)
+        if getattr(self, "price_gte", None) is not None:
+            queryset = queryset.filter(min_price__gte=self.price_gte)
+        if getattr(self, "price_lte", None) is not None:
+            queryset = queryset.filter(min_price__lte=self.price_lte)
+        ordering = ["min_price", "pk"]
+        if getattr(self, "ordering", None) == "distance":
+            ordering.insert(0, "distance")
+        elif getattr(self, "searched", False):
+            ordering.insert(0, "-search_similarity")
         return (
             queryset.annotate(
-                min_price=Subquery(subquery),
-            )
-            .filter(
-                min_price__isnull=False,
+                min_price_without_discount=F("min_price"),
             )
-            .order_by("min_price")
+            .order_by(*ordering)
             .distinct()
         )
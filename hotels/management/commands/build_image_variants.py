@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from all_fixture.images import build_image_variants_task, get_image_variant_fields
+
+
+class Command(BaseCommand):
+    help = "Команда для построения вариантов изображений (WebP/JPEG) для уже загруженных фотографий"
+
+    def handle(self, *args, **options):
+        for model, field_name, variants_field in get_image_variant_fields():
+            built = 0
+            for instance in model.objects.exclude(**{field_name: ""}).exclude(**{field_name: None}).iterator():
+                source = (getattr(instance, variants_field) or {}).get("source")
+                if source != getattr(instance, field_name).name:
+                    build_image_variants_task(model._meta.label, instance.pk)
+                    built += 1
+            self.stdout.write(f"{model._meta.verbose_name_plural}: построено {built}")
+        self.stdout.write(self.style.SUCCESS("Варианты изображений построены"))
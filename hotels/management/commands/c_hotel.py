@@ -26,6 +26,7 @@ from calendars.models import CalendarDate, CalendarPrice
 from flights.models import Flight
 from guests.models import Guest
 from hotels.models import Hotel, HotelPhoto, HotelWhatAbout, TypeOfMeal
+from hotels.services import update_cover_photos
 from rooms.models import Room, RoomPhoto
 from tours.models import Tour
 from users.models import User
@@ -410,6 +411,7 @@ class Command(BaseCommand):
             "hotel",
             5,
         )
+        update_cover_photos([hotel.id for hotel in hotels])
         return hotels
 
     def create_type_of_meals(self, hotels):
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hotels.services import update_cover_photos
+
+
+class Command(BaseCommand):
+    help = "Команда для пересчёта обложек отелей по их первым фотографиям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, nargs="*", help="ID отелей, по умолчанию все")
+
+    def handle(self, *args, **options):
+        updated = update_cover_photos(options["hotel"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Обложки обновлены для {updated} отелей"))
@@ -196,11 +196,23 @@ class Hotel(models.Model):
         ],
         **NULLABLE,
     )
+    cover_photo = models.ForeignKey(
+        "HotelPhoto",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        verbose_name="Обложка отеля",
+        help_text="Первая фотография отеля, обновляется при добавлении и удалении фотографий",
+        **NULLABLE,
+    )
 
     class Meta:
         verbose_name = "Отель"
         verbose_name_plural = "Отели"
         ordering = ("name",)
+        indexes = [
+            # Поиск по радиусу и области карты отсекает отели прямоугольником по координатам
+            models.Index(fields=["width", "longitude"], name="hotel_coordinates_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -225,6 +237,12 @@ class HotelPhoto(models.Model):
         help_text="Фотография отеля",
         blank=True,
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Варианты фотографии",
+        help_text="Уменьшенные копии фотографии в WebP и JPEG, строятся в фоне",
+    )
 
     class Meta:
         verbose_name = "Фотография отеля"
@@ -14,6 +14,7 @@ from rest_framework.serializers import (
     ModelSerializer,
     Serializer,
     SerializerMethodField,
+    ValidationError,
 )
 
 from all_fixture.errors.list_error import (
@@ -28,6 +29,10 @@ from all_fixture.errors.list_error import (
     MIN_ERROR,
     TIME_ERROR,
 )
+from all_fixture.geo import parse_coordinates
+from all_fixture.images import ImageVariantsField
+from all_fixture.prefetch import get_limited
+from all_fixture.views_fixture import LIST_PHOTOS_LIMIT, MAP_MAX_ZOOM
 from hotels.models import Hotel, HotelPhoto, HotelRules, HotelWhatAbout
 from hotels.validators import DateValidator
 from rooms.serializers import RoomDetailSerializer
@@ -234,12 +239,14 @@ class HotelPhotoSerializer(ModelSerializer):
     """
 
     photo = ImageField()
+    variants = ImageVariantsField(source="image_variants")
 
     class Meta:
         model = HotelPhoto
         fields = (
             "id",
             "photo",
+            "variants",
             "hotel",
         )
         read_only_fields = (
@@ -280,16 +287,21 @@ class HotelListRoomAndPhotoSerializer(HotelListWithPhotoSerializer):
 
 
 class HotelShortPhotoSerializer(ModelSerializer):
-    photo = HotelPhotoSerializer(source="hotel_photos", many=True, read_only=True)
+    """
+    Фотографии отеля для списков, не больше LIST_PHOTOS_LIMIT.
+    Во вьюхах фотографии загружаются через limited_prefetch.
+    """
+
+    photo = SerializerMethodField()
 
     class Meta:
         model = Hotel
         fields = ("photo",)
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation["photo"] = representation["photo"][:10]
-        return representation
+    @extend_schema_field(HotelPhotoSerializer(many=True))
+    def get_photo(self, obj):
+        photos = get_limited(obj, "hotel_photos", LIST_PHOTOS_LIMIT)
+        return HotelPhotoSerializer(photos, many=True, context=self.context).data
 
 
 class HotelPopularSerializer(HotelShortPhotoSerializer):
@@ -371,12 +383,14 @@ class HotelFiltersResponseSerializer(HotelShortWithPriceSerializer):
 
     nights = SerializerMethodField()
     guests = SerializerMethodField()
+    distance = SerializerMethodField()
 
     class Meta:
         model = Hotel
         fields = HotelShortWithPriceSerializer.Meta.fields + (
             "nights",
             "guests",
+            "distance",
         )
 
     @extend_schema_field(int)
@@ -403,6 +417,14 @@ class HotelFiltersResponseSerializer(HotelShortWithPriceSerializer):
         """
         return int(self.context.get("guests", 1))
 
+    @extend_schema_field(float)
+    def get_distance(self, obj) -> float | None:
+        """
+        Расстояние до точки поиска near в км (null без near).
+        """
+        distance = getattr(obj, "distance", None)
+        return round(distance, 2) if distance is not None else None
+
 
 class HotelFiltersRequestSerializer(Serializer):
     """
@@ -496,3 +518,32 @@ class HotelWhatAboutFullSerializer(ModelSerializer):
             "name_set",
             "hotel",
         )
+
+
+class HotelMapClustersRequestSerializer(Serializer):
+    """
+    Сериализатор параметров запроса кластеров отелей на карте.
+    """
+
+    zoom = IntegerField(min_value=0, max_value=MAP_MAX_ZOOM)
+    bbox = CharField()
+
+    def validate_bbox(self, value):
+        bbox = parse_coordinates(value, 4)
+        if bbox is None or bbox[0] > bbox[2]:
+            raise ValidationError("Укажите область в формате мин_широта,мин_долгота,макс_широта,макс_долгота.")
+        return bbox
+
+
+class HotelMapClusterSerializer(Serializer):
+    """
+    Сериализатор кластера отелей на карте.
+    """
+
+    latitude = FloatField(help_text="Широта центра кластера")
+    longitude = FloatField(help_text="Долгота центра кластера")
+    count = IntegerField(help_text="Количество отелей")
+    min_price = DecimalField(
+        max_digits=10, decimal_places=2, allow_null=True, help_text="Минимальная цена за ночь со скидкой"
+    )
+    hotel_id = IntegerField(allow_null=True, help_text="ID отеля, если в кластере один отель")
@@ -0,0 +1,139 @@
+import math
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Floor
+from django.utils import timezone
+
+from all_fixture.cache import HOTELS_MAP, SHOWCASE_TIMEOUT, get_cache_version
+from all_fixture.geo import bbox_q, point_in_bbox
+from all_fixture.views_fixture import MAP_CELLS_PER_TILE, MAP_MAX_TILES
+from calendars.models import HotelPriceSummary
+from hotels.models import Hotel, HotelPhoto
+
+
+def update_cover_photos(hotel_ids=None):
+    """
+    Ставит обложкой отелей их первую фотографию (по id) одним UPDATE.
+    Без hotel_ids обновляет все отели.
+    """
+    hotels = Hotel.objects.all() if hotel_ids is None else Hotel.objects.filter(id__in=hotel_ids)
+    first_photo = HotelPhoto.objects.filter(hotel_id=OuterRef("pk")).order_by("id").values("id")[:1]
+    return hotels.update(cover_photo=Subquery(first_photo))
+
+
+def map_cell_size(zoom):
+    """Размер ячейки сетки кластеров в градусах для уровня масштаба."""
+    return 360 / (2**zoom * MAP_CELLS_PER_TILE)
+
+
+def map_tiles(zoom, bbox):
+    """
+    Тайлы (x, y) уровня масштаба, покрывающие bbox, или None, если их больше MAP_MAX_TILES.
+    Тайл — квадрат из MAP_CELLS_PER_TILE × MAP_CELLS_PER_TILE ячеек сетки кластеров.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    tile_size = map_cell_size(zoom) * MAP_CELLS_PER_TILE
+    ys = range(math.floor(min_lat / tile_size), math.floor(max_lat / tile_size) + 1)
+    if min_lon <= max_lon:
+        xs = list(range(math.floor(min_lon / tile_size), math.floor(max_lon / tile_size) + 1))
+    else:
+        # Область через 180-й меридиан
+        xs = list(range(math.floor(min_lon / tile_size), math.floor(180 / tile_size) + 1))
+        xs += range(math.floor(-180 / tile_size), math.floor(max_lon / tile_size) + 1)
+    if len(xs) * len(ys) > MAP_MAX_TILES:
+        return None
+    return [(x, y) for x in xs for y in ys]
+
+
+def build_map_clusters(zoom, area):
+    """
+    Кластеры активных отелей с координатами в области area (Q по координатам, использует индекс)
+    одним групповым запросом: отели группируются по ячейкам сетки, для ячейки — число отелей, центр
+    (средние координаты) и минимальная цена со скидкой на доступные даты с сегодняшнего дня.
+    Каждый кластер помечен тайлом (tile), в который входит его ячейка.
+    """
+    size = map_cell_size(zoom)
+    hotel_min_price = (
+        HotelPriceSummary.objects.filter(
+            hotel=OuterRef("pk"),
+            available_for_booking=True,
+            date__gte=timezone.now().date(),
+        )
+        .order_by()
+        .values("hotel")
+        .annotate(low=Min("min_price_with_discount"))
+        .values("low")
+    )
+    cells = (
+        Hotel.objects.filter(area, is_active=True, width__isnull=False, longitude__isnull=False)
+        .annotate(
+            cell_x=Floor(F("longitude") / size, output_field=FloatField()),
+            cell_y=Floor(F("width") / size, output_field=FloatField()),
+            hotel_min_price=Subquery(hotel_min_price),
+        )
+        .order_by()
+        .values("cell_x", "cell_y")
+        .annotate(
+            count=Count("id"),
+            latitude=Avg("width"),
+            longitude=Avg("longitude"),
+            min_price=Min("hotel_min_price"),
+            hotel_id=Max("id"),
+        )
+    )
+    return [
+        {
+            "tile": (int(cell["cell_x"]) // MAP_CELLS_PER_TILE, int(cell["cell_y"]) // MAP_CELLS_PER_TILE),
+            "latitude": cell["latitude"],
+            "longitude": cell["longitude"],
+            "count": cell["count"],
+            "min_price": cell["min_price"],
+            # Кластер из одного отеля на карте показывается самим отелем
+            "hotel_id": cell["hotel_id"] if cell["count"] == 1 else None,
+        }
+        for cell in cells
+    ]
+
+
+def tiles_area(zoom, tiles):
+    """Условие попадания координат в тайлы (с небольшим запасом: тайл кластера определяется по его ячейке)."""
+    tile_size = map_cell_size(zoom) * MAP_CELLS_PER_TILE
+    margin = tile_size / 1000
+    area = Q(pk__in=[])
+    for x, y in tiles:
+        area |= bbox_q(
+            y * tile_size - margin,
+            x * tile_size - margin,
+            (y + 1) * tile_size + margin,
+            (x + 1) * tile_size + margin,
+            "width",
+            "longitude",
+        )
+    return area
+
+
+def get_map_clusters(zoom, bbox):
+    """
+    Кластеры отелей в области карты bbox. Кластеры кэшируются по тайлам уровня масштаба:
+    запрос читает из кэша только тайлы области, недостающие считаются одним запросом к БД.
+    Кэш сбрасывается при изменении отелей и их цен (пространство имён HOTELS_MAP).
+    Область больше MAP_MAX_TILES тайлов считается запросом по самой области без кэша.
+    """
+    tiles = map_tiles(zoom, bbox)
+    if tiles is None:
+        clusters = build_map_clusters(zoom, bbox_q(*bbox, "width", "longitude"))
+    else:
+        version = get_cache_version(HOTELS_MAP)
+        keys = {tile: f"{HOTELS_MAP}:{version}:zoom:{zoom}:{tile[0]}:{tile[1]}" for tile in tiles}
+        cached = cache.get_many(keys.values())
+        missing = [tile for tile, key in keys.items() if key not in cached]
+        clusters = [cluster for tile in tiles if keys[tile] in cached for cluster in cached[keys[tile]]]
+        if missing:
+            computed = {tile: [] for tile in missing}
+            for cluster in build_map_clusters(zoom, tiles_area(zoom, missing)):
+                if cluster["tile"] in computed:
+                    computed[cluster["tile"]].append(cluster)
+            cache.set_many({keys[tile]: tile_clusters for tile, tile_clusters in computed.items()}, SHOWCASE_TIMEOUT)
+            clusters += [cluster for tile_clusters in computed.values() for cluster in tile_clusters]
+    return [cluster for cluster in clusters if point_in_bbox(cluster["latitude"], cluster["longitude"], *bbox)]
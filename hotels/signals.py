@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_migrate
+from django.dispatch import receiver
+
+from all_fixture.cache import HOTELS_MAP, HOTELS_SHOWCASE, TOURS_SHOWCASE, bump_cache_version
+from all_fixture.images import register_image_variants
+from all_fixture.trigram import create_trigram_extension, create_trigram_indexes, register_trigram_index
+from calendars.models import CalendarDate, CalendarPrice
+from hotels.models import Hotel, HotelPhoto, HotelWhatAbout
+from hotels.tasks import schedule_what_about_refresh
+
+register_image_variants(HotelPhoto, "photo")
+register_trigram_index(Hotel, "name")
+
+# Расширение и триграммные индексы создаются один раз за migrate (от имени приложения hotels)
+pre_migrate.connect(create_trigram_extension, sender=apps.get_app_config("hotels"), dispatch_uid="trigram_extension")
+post_migrate.connect(create_trigram_indexes, sender=apps.get_app_config("hotels"), dispatch_uid="trigram_indexes")
+
+
+@receiver([post_save, post_delete], sender=Hotel)
+@receiver([post_save, post_delete], sender=HotelPhoto)
+def hotel_changed(sender, instance, **kwargs):
+    """Сброс витрин отелей и туров и кластеров карты при изменении отеля или его фотографий."""
+    bump_cache_version(HOTELS_SHOWCASE, TOURS_SHOWCASE, HOTELS_MAP)
+    schedule_what_about_refresh()
+
+
+@receiver([post_save, post_delete], sender=CalendarDate)
+@receiver([post_save, post_delete], sender=CalendarPrice)
+@receiver([post_save, post_delete], sender=HotelWhatAbout)
+@receiver(m2m_changed, sender=HotelWhatAbout.hotel.through)
+def what_about_changed(sender, **kwargs):
+    """Пересборка подборок «Что насчёт...» при изменении подборок или цен отелей."""
+    schedule_what_about_refresh()
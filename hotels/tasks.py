@@ -0,0 +1,87 @@
+import logging
+from random import choice, randrange
+
+from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, OuterRef, Prefetch, Subquery
+from django.utils import timezone
+
+from all_fixture.prefetch import limited_prefetch
+from calendars.models import HotelPriceSummary
+from hotels.models import Hotel, HotelPhoto, HotelWhatAbout
+from hotels.serializers import HotelWhatAboutFullSerializer
+
+logger = logging.getLogger(__name__)
+
+WHAT_ABOUT_COUNT_KEY = "what_about:count"
+WHAT_ABOUT_COLLECTION_KEY = "what_about:collection:{}"
+WHAT_ABOUT_REFRESH_SCHEDULED_KEY = "what_about:refresh_scheduled"
+# Задержка пересчёта после изменения цен: изменения за это время собираются в один пересчёт
+WHAT_ABOUT_REFRESH_DELAY = 60
+
+
+def build_what_about_collections():
+    """
+    Сериализует все подборки «Что насчёт...» с минимальными ценами отелей, начиная с текущей даты.
+    Ссылки на фотографии остаются относительными, абсолютными их делает эндпоинт.
+    """
+    nights = (
+        HotelPriceSummary.objects.filter(
+            hotel=OuterRef("pk"),
+            date__gte=timezone.now().date(),
+            available_for_booking=True,
+        )
+        .order_by()
+        .values("hotel")
+    )
+    hotels_with_prices = Hotel.objects.prefetch_related(
+        limited_prefetch("hotel_photos", HotelPhoto.objects.all())
+    ).annotate(
+        min_price_without_discount=Subquery(nights.annotate(low=Min("min_price")).values("low")[:1]),
+        min_price_with_discount=Subquery(nights.annotate(low=Min("min_price_with_discount")).values("low")[:1]),
+    )
+    collections = HotelWhatAbout.objects.prefetch_related(Prefetch("hotel", queryset=hotels_with_prices))
+    return [HotelWhatAboutFullSerializer(collection).data for collection in collections]
+
+
+def save_what_about_collections(collections):
+    """Каждая подборка хранится под своим номером, чтобы случайную можно было взять одним запросом к кэшу."""
+    cache.set_many({WHAT_ABOUT_COLLECTION_KEY.format(i): collection for i, collection in enumerate(collections)}, None)
+    cache.set(WHAT_ABOUT_COUNT_KEY, len(collections), None)
+
+
+def get_random_what_about_collection():
+    """Случайная подборка из кэша, при пустом кэше подборки собираются сразу."""
+    count = cache.get(WHAT_ABOUT_COUNT_KEY)
+    if count is not None:
+        if not count:
+            return None
+        collection = cache.get(WHAT_ABOUT_COLLECTION_KEY.format(randrange(count)))
+        if collection is not None:
+            return collection
+    collections = build_what_about_collections()
+    save_what_about_collections(collections)
+    return choice(collections) if collections else None
+
+
+@shared_task
+def refresh_what_about_collections():
+    """Пересборка подборок «Что насчёт...» в кэше (Celery beat и изменения цен)."""
+    cache.delete(WHAT_ABOUT_REFRESH_SCHEDULED_KEY)
+    collections = build_what_about_collections()
+    save_what_about_collections(collections)
+    logger.info(f"Подборки «Что насчёт...» обновлены: {len(collections)}")
+
+
+def schedule_what_about_refresh():
+    """
+    Ставит пересборку подборок после фиксации транзакции.
+    Пока задача ждёт запуска, повторные изменения новую задачу не ставят.
+    """
+
+    def schedule():
+        if cache.add(WHAT_ABOUT_REFRESH_SCHEDULED_KEY, 1, WHAT_ABOUT_REFRESH_DELAY * 2):
+            refresh_what_about_collections.apply_async(countdown=WHAT_ABOUT_REFRESH_DELAY)
+
+    transaction.on_commit(schedule, robust=True)
@@ -1,10 +1,16 @@
+import base64
+import json
 import shutil
 import tempfile
+from datetime import timedelta
 from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -14,8 +20,16 @@ from all_fixture.tests.fixture_hotel import (
     get_hotel_rules_data,
     update_hotel_data,
 )
+from all_fixture.choices import WhatAboutChoices
+from all_fixture.images import build_image_variants_task
 from all_fixture.tests.test_temp_image import create_test_image
-from hotels.models import Hotel, HotelPhoto, HotelRules
+from all_fixture.trigram import AUTOCOMPLETE_LIMIT, trigram_available
+from all_fixture.views_fixture import LIST_PHOTOS_LIMIT
+from calendars.models import CalendarDate, CalendarPrice, HotelPriceSummary
+from hotels.filters import HotelFilter
+from hotels.models import Hotel, HotelPhoto, HotelRules, HotelWhatAbout
+from rooms.models import Room
+from tours.views import ToursAutocompleteHotel
 
 
 class HotelModelTest(TestCase):
@@ -146,3 +160,356 @@ class HotelModelTest(TestCase):
         response = self.client.delete(self.url_photo_detail)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(HotelPhoto.objects.count(), 0)
+
+
+class HotelFilterChoicesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+
+    def test_choices_refreshed_on_change(self):
+        """Варианты городов берутся лениво и обновляются после изменения отелей"""
+        self.assertEqual(list(HotelFilter().filters["city"].field.choices), [("Москва", "Москва")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel.city = "Сочи"
+            self.hotel.save()
+        self.assertEqual(list(HotelFilter().filters["city"].field.choices), [("Сочи", "Сочи")])
+
+
+class HotelListPaginationTest(TestCase):
+    def setUp(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.hotels = []
+        for number, price in enumerate(["3000.00", "1000.00", "2000.00", "2000.00"]):
+            hotel = Hotel.objects.create(name=f"Отель {number}", country="Россия", city="Москва")
+            HotelPriceSummary.objects.create(
+                hotel=hotel,
+                date=tomorrow,
+                min_price=Decimal(price),
+                max_price=Decimal(price),
+                min_price_with_discount=Decimal(price),
+            )
+            self.hotels.append(hotel)
+        self.url_list = reverse("hotels:hotels-list")
+
+    def test_cursor_pages(self):
+        """Пагинация по курсору проходит отели по цене и id без повторов"""
+        response = self.client.get(self.url_list, {"cursor": "", "limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [hotel["id"] for hotel in response.data["results"]]
+        self.assertIsNone(response.data["count"])
+
+        response = self.client.get(response.data["next"])
+        ids += [hotel["id"] for hotel in response.data["results"]]
+        self.assertIsNone(response.data["next"])
+        expected = [self.hotels[1].id, self.hotels[2].id, self.hotels[3].id, self.hotels[0].id]
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор возвращает 404"""
+        response = self.client.get(self.url_list, {"cursor": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        first = self.client.get(self.url_list, {"cursor": "", "limit": 2}).data["next"]
+        values = json.loads(base64.urlsafe_b64decode(parse_qs(urlparse(first).query)["cursor"][0]))
+        for tampered in (["дёшево", values[-1]], [values[0], "abc"], [{"price": 1}, values[-1]]):
+            cursor = base64.urlsafe_b64encode(json.dumps(tampered).encode()).decode()
+            response = self.client.get(self.url_list, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, tampered)
+
+    def test_stream_list(self):
+        """Потоковая выдача возвращает весь список одним JSON-массивом"""
+        response = self.client.get(self.url_list, {"stream": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(data), 4)
+        self.assertEqual(data[0]["id"], self.hotels[1].id)
+
+    def test_count(self):
+        """Количество отелей в поиске считается точно и отмечается как точное"""
+        response = self.client.get(self.url_list, {"limit": 2})
+        self.assertEqual(response.data["count"], 4)
+        self.assertTrue(response.data["count_exact"])
+
+    def test_photos_limited(self):
+        """В списке отдаются только первые LIST_PHOTOS_LIMIT фотографий отеля"""
+        media_root = tempfile.mkdtemp(prefix="test_media_")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root):
+            photos = [
+                HotelPhoto.objects.create(hotel=self.hotels[1], photo=create_test_image())
+                for _ in range(LIST_PHOTOS_LIMIT + 2)
+            ]
+            response = self.client.get(self.url_list, {"limit": 1})
+        photo_ids = [photo["id"] for photo in response.data["results"][0]["photo"]]
+        self.assertEqual(photo_ids, [photo.id for photo in photos[:LIST_PHOTOS_LIMIT]])
+
+
+class HotelNameSearchTest(TestCase):
+    def setUp(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        for name in ("Hilton Garden Inn", "Radisson Blu", "Гранд Отель Поляна"):
+            hotel = Hotel.objects.create(name=name, country="Россия", city="Сочи")
+            HotelPriceSummary.objects.create(
+                hotel=hotel,
+                date=tomorrow,
+                min_price=Decimal("1000.00"),
+                max_price=Decimal("1000.00"),
+                min_price_with_discount=Decimal("1000.00"),
+            )
+        self.url_list = reverse("hotels:hotels-list")
+
+    def search(self, query):
+        response = self.client.get(self.url_list, {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [hotel["name"] for hotel in response.data["results"]]
+
+    def test_search_by_name(self):
+        """Поиск по части названия без учёта регистра"""
+        self.assertEqual(self.search("radisson"), ["Radisson Blu"])
+        self.assertEqual(self.search("поляна"), ["Гранд Отель Поляна"])
+
+    def test_search_with_typo(self):
+        """С pg_trgm поиск находит название с опечаткой"""
+        if not trigram_available():
+            self.skipTest("Расширение pg_trgm недоступно")
+        self.assertEqual(self.search("hiltn"), ["Hilton Garden Inn"])
+
+    def test_autocomplete_limited(self):
+        """Autocomplete отдаёт не больше AUTOCOMPLETE_LIMIT отелей"""
+        Hotel.objects.bulk_create(Hotel(name=f"Отель {i}") for i in range(AUTOCOMPLETE_LIMIT + 5))
+        view = ToursAutocompleteHotel()
+        view.q = "Отель"
+        self.assertEqual(view.get_queryset().count(), AUTOCOMPLETE_LIMIT)
+
+
+class HotelGeoSearchTest(TestCase):
+    def setUp(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        coordinates = {
+            "Сочи": (43.5855, 39.7231),
+            "Адлер": (43.4286, 39.9239),
+            "Москва": (55.7558, 37.6173),
+            "Фиджи запад": (-17.7, 178.0),
+            "Фиджи восток": (-17.7, -179.9),
+        }
+        for name, (width, longitude) in coordinates.items():
+            hotel = Hotel.objects.create(name=name, width=width, longitude=longitude)
+            HotelPriceSummary.objects.create(
+                hotel=hotel,
+                date=tomorrow,
+                min_price=Decimal("1000.00"),
+                max_price=Decimal("1000.00"),
+                min_price_with_discount=Decimal("1000.00"),
+            )
+        self.url_list = reverse("hotels:hotels-list")
+
+    def search(self, **params):
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_near_with_radius(self):
+        """Поиск в радиусе от точки с сортировкой по расстоянию"""
+        self.assertEqual([hotel["name"] for hotel in self.search(near="43.58,39.72", radius=5)], ["Сочи"])
+        results = self.search(near="43.58,39.72", radius=30, ordering="distance")
+        self.assertEqual([hotel["name"] for hotel in results], ["Сочи", "Адлер"])
+        self.assertAlmostEqual(results[1]["distance"], 24.0, delta=1)
+
+    def test_across_antimeridian(self):
+        """Радиус и область карты через 180-й меридиан"""
+        self.assertEqual([hotel["name"] for hotel in self.search(near="-17.7,179.9", radius=50)], ["Фиджи восток"])
+        self.assertEqual([hotel["name"] for hotel in self.search(bbox="-20,179,-15,-179")], ["Фиджи восток"])
+
+    def test_bbox(self):
+        """Отели в области карты"""
+        results = self.search(bbox="43,39,44,40")
+        self.assertEqual({hotel["name"] for hotel in results}, {"Сочи", "Адлер"})
+        self.assertIsNone(results[0]["distance"])
+
+    def test_invalid_params(self):
+        """Радиус и сортировка по расстоянию требуют точку, координаты проверяются"""
+        for params in ({"radius": 5}, {"ordering": "distance"}, {"near": "91,0"}, {"bbox": "44,39,43,40"}):
+            response = self.client.get(self.url_list, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class HotelMapClustersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        coordinates = [(43.5855, 39.7231, "5000.00"), (43.4286, 39.9239, "3000.00"), (55.7558, 37.6173, None)]
+        self.hotels = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for width, longitude, price in coordinates:
+                hotel = Hotel.objects.create(name="Отель", width=width, longitude=longitude, is_active=True)
+                if price:
+                    HotelPriceSummary.objects.create(
+                        hotel=hotel,
+                        date=tomorrow,
+                        min_price=Decimal(price),
+                        max_price=Decimal(price),
+                        min_price_with_discount=Decimal(price),
+                    )
+                self.hotels.append(hotel)
+        self.url = reverse("hotels:hotels-map")
+
+    def clusters(self, zoom, bbox="40,30,60,45"):
+        response = self.client.get(self.url, {"zoom": zoom, "bbox": bbox})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(response.data, key=lambda cluster: cluster["latitude"])
+
+    def test_clusters_by_zoom(self):
+        """На мелком масштабе соседние отели объединяются, на крупном — разделяются"""
+        south, moscow = self.clusters(zoom=5)
+        self.assertEqual((south["count"], south["min_price"], south["hotel_id"]), (2, "3000.00", None))
+        self.assertAlmostEqual(south["latitude"], (43.5855 + 43.4286) / 2)
+        self.assertEqual((moscow["count"], moscow["min_price"], moscow["hotel_id"]), (1, None, self.hotels[2].id))
+        self.assertEqual([cluster["count"] for cluster in self.clusters(zoom=12)], [1, 1, 1])
+        self.assertEqual(len(self.clusters(zoom=5, bbox="50,30,60,45")), 1)
+
+    def test_cache_invalidated(self):
+        """Кластеры кэшируются по масштабу и сбрасываются при перемещении отеля"""
+        self.clusters(zoom=5)
+        with self.assertNumQueries(0):
+            self.clusters(zoom=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotels[2].width = 43.5
+            self.hotels[2].longitude = 39.8
+            self.hotels[2].save()
+        self.assertEqual([cluster["count"] for cluster in self.clusters(zoom=5)], [3])
+
+    def test_cached_by_tiles(self):
+        """Кэш хранится по тайлам: область внутри уже загруженной не требует запросов, кластеры как без кэша"""
+        self.assertEqual(len(self.clusters(zoom=9, bbox="43,39,44,40.5")), 2)
+        with self.assertNumQueries(0):
+            clusters = self.clusters(zoom=9, bbox="43.3,39.5,43.7,40")
+        self.assertEqual([cluster["count"] for cluster in clusters], [1, 1])
+        # Большая область (больше MAP_MAX_TILES тайлов) считается по самой области
+        self.assertEqual([cluster["count"] for cluster in self.clusters(zoom=9, bbox="40,30,60,45")], [1, 1, 1])
+
+    def test_invalid_params(self):
+        """Масштаб и область карты обязательны и проверяются"""
+        for params in ({"zoom": 5}, {"bbox": "40,30,60,45"}, {"zoom": 30, "bbox": "40,30,60,45"}, {"zoom": 5, "bbox": "1,2"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class HotelShowcaseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url_hots = reverse("hotels:hotels-hots")
+
+    def test_hots_cached_until_hotel_changed(self):
+        """Горящие отели берутся из кэша до изменения отелей"""
+        self.assertEqual(self.client.get(self.url_hots).data["count"], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url_hots).data["count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва", is_active=True)
+            room = Room.objects.create(hotel=hotel, category="Стандарт", area=50)
+            calendar_date = CalendarDate.objects.create(
+                hotel=hotel,
+                start_date=timezone.now().date(),
+                end_date=timezone.now().date() + timedelta(days=5),
+                discount=True,
+                discount_amount=Decimal("0.10"),
+            )
+            CalendarPrice.objects.create(calendar_date=calendar_date, room=room, price=Decimal("5000.00"))
+        self.assertEqual(self.client.get(self.url_hots).data["count"], 1)
+
+    def test_views_sharing_namespace_cached_separately(self):
+        """Горящие и популярные отели с общим пространством имён кэша не отдают ответы друг друга"""
+        url_populars = reverse("hotels:hotels-populars")
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва", is_active=True)
+            room = Room.objects.create(hotel=hotel, category="Стандарт", area=50)
+            calendar_date = CalendarDate.objects.create(
+                hotel=hotel,
+                start_date=timezone.now().date(),
+                end_date=timezone.now().date() + timedelta(days=5),
+                discount=True,
+                discount_amount=Decimal("0.10"),
+            )
+            CalendarPrice.objects.create(calendar_date=calendar_date, room=room, price=Decimal("5000.00"))
+        for _ in range(2):
+            hots = self.client.get(self.url_hots).data["results"]
+            populars = self.client.get(url_populars).data["results"]
+            self.assertIn("min_price_with_discount", hots[0])
+            self.assertIn("hotels_count", populars[0])
+
+
+class HotelWhatAboutCollectionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("hotels:hotels-whats-about-list")
+
+    def test_collection_served_from_cache(self):
+        """Подборка «Что насчёт...» собирается один раз и дальше отдаётся из кэша"""
+        hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        collection = HotelWhatAbout.objects.create(name_set=WhatAboutChoices.EXPLORE_THE_STREETS)
+        collection.hotel.add(hotel)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["hotel"][0]["name"], "Тестовый отель")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data, response.data)
+
+    def test_photo_variants_absolute(self):
+        """Ссылки на варианты фотографий из кэшированной подборки абсолютные, как в остальных эндпоинтах"""
+        media_root = tempfile.mkdtemp(prefix="test_media_")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        HotelWhatAbout.objects.create(name_set=WhatAboutChoices.EXPLORE_THE_STREETS).hotel.add(hotel)
+        with self.settings(MEDIA_ROOT=media_root):
+            photo = HotelPhoto.objects.create(hotel=hotel, photo=create_test_image(size=(2400, 1200)))
+            build_image_variants_task(HotelPhoto._meta.label, photo.id)
+            response = self.client.get(self.url)
+
+        variants = response.data[0]["hotel"][0]["photo"][0]["variants"]
+        self.assertTrue(variants["card"]["webp"].startswith("http://testserver/"))
+        for candidate in variants["srcset"]["jpg"].split(", "):
+            self.assertTrue(candidate.startswith("http://testserver/"), candidate)
+
+
+class HotelCoverPhotoTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(prefix="test_media_")
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        self.url = reverse("hotels:hotels-photos-list", kwargs={"hotel_id": self.hotel.id})
+
+    def test_cover_follows_photos(self):
+        """Обложкой становится первая фотография, при её удалении — следующая"""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            first = self.client.post(self.url, {"photo": create_test_image()}).data["id"]
+            second = self.client.post(self.url, {"photo": create_test_image()}).data["id"]
+            self.hotel.refresh_from_db()
+            self.assertEqual(self.hotel.cover_photo_id, first)
+
+            url_detail = reverse("hotels:hotels-photos-detail", kwargs={"hotel_id": self.hotel.id, "pk": first})
+            self.assertEqual(self.client.delete(url_detail).status_code, status.HTTP_204_NO_CONTENT)
+            self.hotel.refresh_from_db()
+            self.assertEqual(self.hotel.cover_photo_id, second)
+
+
+class HotelPhotoVariantsTest(TestCase):
+    def test_variants_built(self):
+        """Для фотографии строятся уменьшенные варианты, в API отдаётся srcset"""
+        media_root = tempfile.mkdtemp(prefix="test_media_")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        with self.settings(MEDIA_ROOT=media_root):
+            photo = HotelPhoto.objects.create(hotel=hotel, photo=create_test_image(size=(2400, 1200)))
+            build_image_variants_task(HotelPhoto._meta.label, photo.id)
+            response = self.client.get(reverse("hotels:hotels-photos-list", kwargs={"hotel_id": hotel.id}))
+
+        variants = response.data[0]["variants"]
+        self.assertEqual((variants["card"]["width"], variants["card"]["height"]), (480, 240))
+        self.assertEqual(variants["full"]["width"], 1920)
+        self.assertTrue(variants["card"]["webp"].endswith("_card.webp"))
+        self.assertEqual(len(variants["srcset"]["webp"].split(", ")), 3)
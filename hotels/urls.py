@@ -2,6 +2,7 @@ from django.urls import path
 
 from hotels.apps import HotelsConfig
 from hotels.views import (
+    HotelMapClusterViewSet,
     HotelPhotoViewSet,
     HotelsHotView,
     HotelsPopularView,
@@ -19,6 +20,11 @@ urlpatterns = [
         HotelViewSet.as_view({"get": "list", "post": "create"}),
         name="hotels-list",
     ),
+    path(
+        "hotels/map/",
+        HotelMapClusterViewSet.as_view({"get": "list"}),
+        name="hotels-map",
+    ),
     path(
         "hotels/<int:pk>/",
         HotelViewSet.as_view(
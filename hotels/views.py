@@ -1,6 +1,4 @@
-from random import choice
-
-from django.db.models import Count, F, Min, OuterRef, Prefetch, Q, Subquery, Window
+from django.db.models import Count, F, OuterRef, Subquery, Window
 from django.db.models.functions import RowNumber
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
@@ -14,6 +12,7 @@ from rest_framework import status, viewsets
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
+from all_fixture.cache import HOTELS_SHOWCASE, CachedListMixin
 from all_fixture.errors.list_error import (
     HOTEL_ID_ERROR,
     PHOTO_ERROR,
@@ -33,16 +32,22 @@ from all_fixture.errors.views_error import (
     TYPE_OF_MEAL_RETRIEVE_404,
     TYPE_OF_MEAL_UPDATE_404,
 )
+from all_fixture.images import absolute_image_variants
 from all_fixture.pagination import CustomLOPagination
+from all_fixture.prefetch import limited_prefetch
+from all_fixture.streaming import StreamingListMixin
 from all_fixture.views_fixture import (
     DISCOUNT_SETTINGS,
     HOTEL_ID,
     HOTEL_ID_PHOTO,
+    HOTEL_MAP_BBOX,
+    HOTEL_MAP_ZOOM,
     HOTEL_PHOTO_SETTINGS,
     HOTEL_SETTINGS,
     ID_HOTEL,
     LIMIT,
     OFFSET,
+    STREAM,
     TYPE_OF_MEAL_ID,
     TYPE_OF_MEAL_SETTINGS,
     WHAT_ABOUT_SETTINGS,
@@ -55,12 +60,16 @@ from hotels.serializers import (
     HotelDetailSerializer,
     HotelFiltersResponseSerializer,
     HotelListRoomAndPhotoSerializer,
+    HotelMapClusterSerializer,
+    HotelMapClustersRequestSerializer,
     HotelPhotoSerializer,
     HotelPopularSerializer,
     HotelShortWithPriceSerializer,
     HotelWhatAboutFullSerializer,
 )
 from hotels.serializers_type_of_meals import TypeOfMealSerializer
+from hotels.services import get_map_clusters, update_cover_photos
+from hotels.tasks import get_random_what_about_collection
 
 
 class HotelRelatedViewSet(viewsets.ModelViewSet):
@@ -124,6 +133,7 @@ class HotelRelatedViewSet(viewsets.ModelViewSet):
         parameters=[
             LIMIT,
             OFFSET,
+            STREAM,
         ],
         responses={
             200: OpenApiResponse(
@@ -203,7 +213,7 @@ class HotelRelatedViewSet(viewsets.ModelViewSet):
         },
     ),
 )
-class HotelViewSet(viewsets.ModelViewSet):
+class HotelViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Hotel.objects.all()
     pagination_class = CustomLOPagination
     filter_backends = [DjangoFilterBackend]
@@ -243,7 +253,9 @@ class HotelViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
 
         # Оптимизируем запрос, если действие требует получения фотографий
-        if self.action in ["list", "retrieve"]:
+        if self.action == "list":
+            queryset = queryset.prefetch_related(limited_prefetch("hotel_photos", HotelPhoto.objects.all()))
+        elif self.action == "retrieve":
             queryset = queryset.prefetch_related("hotel_photos")
 
         if self.action == "list":
@@ -279,11 +291,12 @@ class HotelViewSet(viewsets.ModelViewSet):
         },
     )
 )
-class HotelsHotView(viewsets.ModelViewSet):
+class HotelsHotView(CachedListMixin, viewsets.ModelViewSet):
     """Отели по специальной цене."""
 
     serializer_class = HotelShortWithPriceSerializer
     pagination_class = CustomLOPagination
+    cache_namespace = HOTELS_SHOWCASE
     queryset = Hotel.objects.none()
 
     def get_queryset(self):
@@ -300,7 +313,7 @@ class HotelsHotView(viewsets.ModelViewSet):
 
         queryset = (
             Hotel.objects.filter(is_active=True)
-            .prefetch_related("hotel_photos")
+            .prefetch_related(limited_prefetch("hotel_photos", HotelPhoto.objects.all()))
             .annotate(min_price=Subquery(min_price_subquery))
             .exclude(min_price=None)
             .annotate(
@@ -328,11 +341,12 @@ class HotelsHotView(viewsets.ModelViewSet):
         },
     )
 )
-class HotelsPopularView(viewsets.ModelViewSet):
+class HotelsPopularView(CachedListMixin, viewsets.ModelViewSet):
     """Отели шести стран."""
 
     serializer_class = HotelPopularSerializer
     pagination_class = CustomLOPagination
+    cache_namespace = HOTELS_SHOWCASE
     queryset = Hotel.objects.none()
 
     def get_queryset(self):
@@ -356,7 +370,7 @@ class HotelsPopularView(viewsets.ModelViewSet):
         )
         queryset = (
             Hotel.objects.filter(is_active=True)
-            .prefetch_related("hotel_photos")
+            .prefetch_related(limited_prefetch("hotel_photos", HotelPhoto.objects.all()))
             .annotate(
                 hotels_count=Subquery(country_hotel_count),
                 min_price_without_discount=Subquery(min_price_without_discount_subquery),
@@ -433,6 +447,20 @@ class HotelPhotoViewSet(HotelRelatedViewSet):
     serializer_class = HotelPhotoSerializer
     error_message = PHOTO_ERROR
 
+    def perform_create(self, serializer):
+        """Первая загруженная фотография становится обложкой отеля."""
+        super().perform_create(serializer)
+        photo = serializer.instance
+        if photo.hotel.cover_photo_id is None:
+            Hotel.objects.filter(id=photo.hotel_id, cover_photo__isnull=True).update(cover_photo=photo)
+
+    def perform_destroy(self, instance):
+        """При удалении обложки обложкой становится следующая фотография отеля."""
+        is_cover = instance.hotel.cover_photo_id == instance.id
+        super().perform_destroy(instance)
+        if is_cover:
+            update_cover_photos([instance.hotel_id])
+
 
 @extend_schema(tags=[TYPE_OF_MEAL_SETTINGS["name"]])
 @extend_schema_view(
@@ -536,29 +564,43 @@ class HotelWarpUpViewSet(viewsets.ModelViewSet):
     queryset = HotelWhatAbout.objects.none()
     serializer_class = HotelWhatAboutFullSerializer
 
-    def get_queryset(self):
+    def list(self, request, *args, **kwargs):
         """
         Возвращает случайную подборку отелей с минимальными ценами,
-        начиная с текущей даты, с учетом скидок
+        начиная с текущей даты, из подборок, заранее собранных в кэше (hotels.tasks)
         """
-        today = timezone.now().date()
-        all_ids = list(HotelWhatAbout.objects.values_list("id", flat=True))
-        if not all_ids:
-            return HotelWhatAbout.objects.none()
-
-        # Выбираем случайную подборку
-        random_id = choice(all_ids)
-
-        # Находим минимальную цену, начиная с текущей даты
-        # Без ограничения по конечной дате
-        hotels_with_prices = Hotel.objects.annotate(
-            min_price_without_discount=Min(
-                "calendar_dates__calendar_prices__price",
-                filter=Q(calendar_dates__start_date__gte=today, calendar_dates__calendar_prices__price__gt=0),
-            ),
-        )
-        # Создаем префетч для оптимизации запросов
-        prefetch = Prefetch("hotel", queryset=hotels_with_prices)
+        collection = get_random_what_about_collection()
+        if collection is None:
+            return Response([])
+        for hotel in collection["hotel"]:
+            for photo in hotel["photo"]:
+                if photo["photo"]:
+                    photo["photo"] = request.build_absolute_uri(photo["photo"])
+                absolute_image_variants(photo.get("variants"), request)
+        return Response([collection])
+
+
+@extend_schema(tags=[HOTEL_SETTINGS["name"]])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Кластеры отелей на карте",
+        description="Отели в области карты, сгруппированные по ячейкам сетки уровня масштаба: "
+        "количество, центр и минимальная цена. Кластер из одного отеля содержит его ID",
+        parameters=[HOTEL_MAP_BBOX, HOTEL_MAP_ZOOM],
+        responses={
+            200: HotelMapClusterSerializer(many=True),
+            400: OpenApiResponse(description="Ошибка валидации"),
+        },
+    )
+)
+class HotelMapClusterViewSet(viewsets.GenericViewSet):
+    """Кластеры отелей на карте."""
+
+    serializer_class = HotelMapClusterSerializer
+    queryset = Hotel.objects.none()
 
-        # Возвращаем подборку с префетчем отелей и их ценами
-        return HotelWhatAbout.objects.filter(id=random_id).prefetch_related(prefetch)
+    def list(self, request, *args, **kwargs):
+        params = HotelMapClustersRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        clusters = get_map_clusters(params.validated_data["zoom"], params.validated_data["bbox"])
+        return Response(self.get_serializer(clusters, many=True).data)
@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
 
-from mailings.models import Mailing
+from mailings.models import Campaign, CampaignRecipient, CampaignStatus, Mailing, OutgoingEmail, OutgoingEmailStatus
+from mailings.services import start_campaign
+from mailings.tasks import send_campaign_task
 
 
 @admin.register(Mailing)
@@ -29,3 +34,70 @@ class MailingAdmin(admin.ModelAdmin):
     @admin.action(description="Деактивировать рассылку для выбранных")
     def deactivate_mailing(self, request, queryset):
         queryset.update(mailing=False)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "recipients", "status", "attempts", "send_after", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "recipients")
+    readonly_fields = ("sensitive", "attempts", "send_after", "last_error", "created_at", "sent_at")
+    list_per_page = 50
+
+    actions = ["retry_emails"]
+
+    def get_exclude(self, request, obj=None):
+        # Текст секретных писем (коды входа) в админке не показывается
+        if obj is not None and obj.sensitive:
+            return ("body",)
+        return super().get_exclude(request, obj)
+
+    @admin.action(description="Отправить повторно")
+    def retry_emails(self, request, queryset):
+        # У отправленных и окончательно не отправленных секретных писем текст уже стёрт
+        queryset.exclude(
+            Q(status=OutgoingEmailStatus.SENT) | Q(sensitive=True, status=OutgoingEmailStatus.FAILED)
+        ).update(status=OutgoingEmailStatus.PENDING, attempts=0, send_after=timezone.now())
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "recipients_total", "recipients_sent", "started_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
+    readonly_fields = ("status", "created_at", "started_at", "finished_at")
+
+    actions = ["send_campaigns"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                recipients_total=Count("recipients"),
+                recipients_sent=Count("recipients", filter=Q(recipients__status=OutgoingEmailStatus.SENT)),
+            )
+        )
+
+    @admin.display(description="Получателей", ordering="recipients_total")
+    def recipients_total(self, obj):
+        return obj.recipients_total
+
+    @admin.display(description="Отправлено", ordering="recipients_sent")
+    def recipients_sent(self, obj):
+        return obj.recipients_sent
+
+    @admin.action(description="Запустить или продолжить отправку")
+    def send_campaigns(self, request, queryset):
+        for campaign in queryset.exclude(status=CampaignStatus.FINISHED):
+            start_campaign(campaign)
+            transaction.on_commit(lambda pk=campaign.pk: send_campaign_task.delay(pk), robust=True)
+
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(admin.ModelAdmin):
+    list_display = ("id", "campaign", "email", "status", "sent_at")
+    list_filter = ("status", "campaign")
+    search_fields = ("email",)
+    raw_id_fields = ("campaign",)
+    list_per_page = 50
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.models import Campaign
+from mailings.services import CampaignLockLostError, send_campaign
+
+
+class Command(BaseCommand):
+    help = "Команда для отправки рассылки подписчикам (прерванная рассылка продолжается с неотправленных)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign", type=int, help="ID рассылки")
+        parser.add_argument("--rate", type=float, help="Писем в секунду, по умолчанию CAMPAIGN_RATE_LIMIT")
+        parser.add_argument(
+            "--chunk-size", type=int, help="Размер пачки получателей, по умолчанию CAMPAIGN_CHUNK_SIZE"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sent = send_campaign(options["campaign"], rate_limit=options["rate"], chunk_size=options["chunk_size"])
+        except Campaign.DoesNotExist:
+            raise CommandError(f"Рассылка {options['campaign']} не найдена") from None
+        except CampaignLockLostError as error:
+            raise CommandError(str(error)) from None
+        except OSError as error:
+            raise CommandError(f"Отправка прервана, повторный запуск продолжит её: {error}") from error
+        self.stdout.write(self.style.SUCCESS(f"Отправлено писем: {sent}"))
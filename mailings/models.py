@@ -1,4 +1,6 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.utils import timezone
 
 
 class Mailing(models.Model):
@@ -20,3 +22,200 @@ class Mailing(models.Model):
     def __str__(self):
         """Строковое представление — email туриста."""
         return self.email
+
+
+class OutgoingEmailStatus(models.TextChoices):
+    PENDING = "pending", "Ожидает отправки"
+    SENT = "sent", "Отправлено"
+    FAILED = "failed", "Не отправлено"
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди отправки (outbox). Представления только сохраняют письмо,
+    отправляют его воркеры Celery (mailings.services.send_pending_emails).
+    """
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name="Тема",
+    )
+    body = models.TextField(
+        verbose_name="Текст письма",
+    )
+    is_html = models.BooleanField(
+        default=False,
+        verbose_name="HTML-письмо",
+    )
+    sensitive = models.BooleanField(
+        default=False,
+        verbose_name="Секретное содержимое",
+        help_text="Текст (например, код входа) стирается после отправки или окончательной ошибки и не показывается",
+    )
+    from_email = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Отправитель",
+        help_text="Пусто — EMAIL_HOST_USER",
+    )
+    recipients = ArrayField(
+        base_field=models.EmailField(),
+        verbose_name="Получатели",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=OutgoingEmailStatus.choices,
+        default=OutgoingEmailStatus.PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попытки отправки",
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Отправить не раньше",
+        help_text="Следующая попытка отправки (отодвигается при ошибках и на время отправки воркером)",
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Последняя ошибка",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата отправки",
+    )
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["send_after"],
+                condition=models.Q(status="pending"),
+                name="outgoing_email_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.recipients)}"
+
+
+class CampaignStatus(models.TextChoices):
+    DRAFT = "draft", "Черновик"
+    SENDING = "sending", "Отправляется"
+    FINISHED = "finished", "Завершена"
+
+
+class Campaign(models.Model):
+    """
+    Рассылка письма подписчикам. При запуске фиксируется список получателей (CampaignRecipient),
+    прогресс отправки хранится по каждому получателю, прерванная рассылка продолжается с неотправленных.
+    """
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name="Тема",
+    )
+    body = models.TextField(
+        verbose_name="Текст письма",
+    )
+    is_html = models.BooleanField(
+        default=True,
+        verbose_name="HTML-письмо",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=CampaignStatus.choices,
+        default=CampaignStatus.DRAFT,
+        verbose_name="Статус",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания",
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата запуска",
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата завершения",
+    )
+    # Аренда отправки: рассылку отправляет только воркер с действующей арендой (mailings.services.send_campaign)
+    locked_by = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        verbose_name="Отправляющий воркер",
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Отправка занята до",
+    )
+
+    class Meta:
+        verbose_name = "Рассылка подписчикам"
+        verbose_name_plural = "Рассылки подписчикам"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return self.subject
+
+
+class CampaignRecipient(models.Model):
+    """
+    Получатель рассылки и результат отправки ему письма.
+    """
+
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.CASCADE,
+        related_name="recipients",
+        verbose_name="Рассылка",
+    )
+    email = models.EmailField(
+        verbose_name="Email",
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=OutgoingEmailStatus.choices,
+        default=OutgoingEmailStatus.PENDING,
+        verbose_name="Статус",
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка отправки",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата отправки",
+    )
+
+    class Meta:
+        verbose_name = "Получатель рассылки"
+        verbose_name_plural = "Получатели рассылки"
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "email"], name="unique_campaign_recipient"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["campaign", "id"],
+                condition=models.Q(status="pending"),
+                name="campaign_recipient_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.email
@@ -0,0 +1,321 @@
+import logging
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from all_fixture.transactions import on_commit_once
+from mailings.models import (
+    Campaign,
+    CampaignRecipient,
+    CampaignStatus,
+    Mailing,
+    OutgoingEmail,
+    OutgoingEmailStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 6
+# Повтор после ошибки: 30 с, 1, 2, 4, 8 минут...; не реже раза в час
+EMAIL_RETRY_BASE = timedelta(seconds=30)
+EMAIL_RETRY_MAX = timedelta(hours=1)
+# На это время воркер забирает пачку писем; если он упал, письма снова станут доступны
+EMAIL_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def queue_email(subject, body, recipients, is_html=False, from_email="", sensitive=False):
+    """
+    Сохраняет письмо в очередь и ставит её разбор после фиксации транзакции.
+    Несколько писем в одной транзакции дают одну задачу отправки.
+    Текст письма с sensitive=True (коды входа) стирается, как только письмо отправлено или не отправлено окончательно.
+    """
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipients=list(recipients),
+        is_html=is_html,
+        from_email=from_email,
+        sensitive=sensitive,
+    )
+
+    def send():
+        from mailings.tasks import send_outgoing_emails
+
+        send_outgoing_emails.delay()
+
+    on_commit_once("send_outgoing_emails", send, robust=True)
+    return email
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой (экспоненциальная, не больше EMAIL_RETRY_MAX)."""
+    return min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX)
+
+
+def claim_emails(batch_size=EMAIL_BATCH_SIZE):
+    """
+    Забирает пачку писем, которые пора отправить. Строки блокируются с SKIP LOCKED,
+    поэтому параллельные воркеры получают разные письма; на время отправки send_after отодвигается.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmailStatus.PENDING, send_after__lte=now)
+            .order_by("send_after", "id")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            send_after=now + EMAIL_CLAIM_TIMEOUT
+        )
+    return emails
+
+
+def build_message(email, smtp_connection):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.EMAIL_HOST_USER,
+        to=email.recipients,
+        connection=smtp_connection,
+    )
+    if email.is_html:
+        message.content_subtype = "html"
+    return message
+
+
+def send_pending_emails(batch_size=EMAIL_BATCH_SIZE):
+    """
+    Отправляет одну пачку писем из очереди через одно SMTP-соединение.
+    Неотправленные письма повторяются с экспоненциальной задержкой, после EMAIL_MAX_ATTEMPTS
+    попыток получают статус «не отправлено»; недоступность SMTP-сервера тоже считается попыткой
+    для каждого неотправленного письма пачки. Возвращает число взятых из очереди писем
+    (0, если очередь пуста или SMTP-сервер недоступен).
+    """
+    expire_sensitive_emails()
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0
+    smtp_connection = get_connection()
+    unsent = iter(emails)
+    try:
+        smtp_connection.open()
+        for email in unsent:
+            try:
+                build_message(email, smtp_connection).send()
+            except Exception as error:
+                # Любая ошибка отправки уходит в повтор
+                mark_failed(email, error)
+                # Соединение после ошибки может быть разорвано
+                smtp_connection.close()
+                smtp_connection.open()
+            else:
+                OutgoingEmail.objects.filter(pk=email.pk).update(
+                    status=OutgoingEmailStatus.SENT,
+                    attempts=email.attempts + 1,
+                    sent_at=timezone.now(),
+                    **finished_body(email),
+                )
+    except Exception as error:
+        logger.exception("Не удалось подключиться к SMTP-серверу")
+        for email in unsent:
+            mark_failed(email, error)
+        return 0
+    finally:
+        smtp_connection.close()
+    return len(emails)
+
+
+def expire_sensitive_emails():
+    """
+    Секретные письма (коды входа) старше LOGIN_CODE_TTL больше не отправляются: код в них уже недействителен.
+    Возвращает число снятых с отправки писем.
+    """
+    return OutgoingEmail.objects.filter(
+        status=OutgoingEmailStatus.PENDING,
+        sensitive=True,
+        created_at__lt=timezone.now() - settings.LOGIN_CODE_TTL,
+    ).update(status=OutgoingEmailStatus.FAILED, body="", last_error="Истёк срок действия")
+
+
+def finished_body(email):
+    """Поля для обновления письма, которое больше не будет отправляться: секретный текст стирается."""
+    return {"body": ""} if email.sensitive else {}
+
+
+def mark_failed(email, error):
+    attempts = email.attempts + 1
+    extra = {}
+    if attempts >= EMAIL_MAX_ATTEMPTS:
+        status, send_after = OutgoingEmailStatus.FAILED, timezone.now()
+        extra = finished_body(email)
+        logger.error(f"Письмо {email.pk} не отправлено после {attempts} попыток: {error}")
+    else:
+        status, send_after = OutgoingEmailStatus.PENDING, timezone.now() + retry_delay(attempts)
+        logger.warning(f"Ошибка отправки письма {email.pk}, попытка {attempts}: {error}")
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=status, attempts=attempts, send_after=send_after, last_error=str(error), **extra
+    )
+
+
+# ─── Рассылки подписчикам ──────────────────────────────────────────────────────
+# Аренда рассылки воркером; продлевается после каждого письма, поэтому её хватает при любой скорости отправки
+CAMPAIGN_LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+class RateLimiter:
+    """Не больше rate вызовов wait() в секунду (rate=None — без ограничения)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(self.next_at, now) + self.interval
+
+
+class CampaignLockLostError(Exception):
+    """Аренда рассылки истекла и перешла к другому воркеру."""
+
+
+def acquire_campaign_lock(campaign, token, lease):
+    """
+    Берёт аренду рассылки условным UPDATE в БД: работает между процессами и серверами
+    независимо от бэкенда кэша. Возвращает False, если рассылку уже отправляет другой воркер.
+    """
+    now = timezone.now()
+    return bool(
+        Campaign.objects.filter(pk=campaign.pk)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now) | Q(locked_by=token))
+        .update(locked_by=token, locked_until=now + lease)
+    )
+
+
+def extend_campaign_lock(campaign, token, lease):
+    if not Campaign.objects.filter(pk=campaign.pk, locked_by=token).update(locked_until=timezone.now() + lease):
+        raise CampaignLockLostError(f"Рассылка {campaign.pk} отправляется другим воркером")
+
+
+def release_campaign_lock(campaign, token):
+    Campaign.objects.filter(pk=campaign.pk, locked_by=token).update(locked_by="", locked_until=None)
+
+
+def is_permanent_failure(error):
+    """
+    Постоянный отказ сервера принять конкретное письмо (5xx): получатель помечается неотправленным,
+    иначе каждый перезапуск упирался бы в того же получателя. Отказ отправителю касается всех писем
+    и прерывает отправку. Отказ получателям постоянный, только если все коды 5xx: 4xx (грейлистинг,
+    переполненный ящик) повторяется при следующем запуске.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return bool(error.recipients) and all(500 <= code < 600 for code, _ in error.recipients.values())
+    return (
+        isinstance(error, smtplib.SMTPResponseException)
+        and not isinstance(error, smtplib.SMTPSenderRefused)
+        and 500 <= error.smtp_code < 600
+    )
+
+
+def start_campaign(campaign):
+    """
+    Запускает рассылку: фиксирует получателями подписчиков, активных на этот момент.
+    Подписавшиеся позже письмо не получат, уже запущенная рассылка не меняется.
+    """
+    chunk_size = settings.CAMPAIGN_CHUNK_SIZE
+    with transaction.atomic():
+        campaign = Campaign.objects.select_for_update().get(pk=campaign.pk)
+        if campaign.status != CampaignStatus.DRAFT:
+            return campaign
+        emails = Mailing.objects.filter(mailing=True).order_by("id").values_list("email", flat=True)
+        batch = []
+        for email in emails.iterator(chunk_size=chunk_size):
+            batch.append(CampaignRecipient(campaign=campaign, email=email))
+            if len(batch) == chunk_size:
+                CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+        campaign.status = CampaignStatus.SENDING
+        campaign.started_at = timezone.now()
+        campaign.save(update_fields=["status", "started_at"])
+    return campaign
+
+
+def send_campaign(campaign_id, rate_limit=None, chunk_size=None):
+    """
+    Отправляет письма рассылки неотправленным получателям пачками по chunk_size
+    через одно SMTP-соединение, не быстрее rate_limit писем в секунду (по умолчанию — из настроек).
+    Результат сохраняется по каждому получателю, поэтому прерванная отправка продолжается с места остановки.
+    Постоянный отказ (5xx) по адресу помечает получателя как неотправленного, остальные ошибки SMTP
+    прерывают отправку и пробрасываются (получатели остаются в очереди).
+    Возвращает число отправленных писем.
+    """
+    rate_limit = settings.CAMPAIGN_RATE_LIMIT if rate_limit is None else rate_limit
+    chunk_size = chunk_size or settings.CAMPAIGN_CHUNK_SIZE
+    campaign = Campaign.objects.get(pk=campaign_id)
+    if campaign.status == CampaignStatus.DRAFT:
+        campaign = start_campaign(campaign)
+    if campaign.status != CampaignStatus.SENDING:
+        return 0
+    token = uuid.uuid4().hex
+    limiter = RateLimiter(rate_limit)
+    lease = CAMPAIGN_LOCK_TIMEOUT + timedelta(seconds=limiter.interval)
+    if not acquire_campaign_lock(campaign, token, lease):
+        logger.info(f"Рассылка {campaign.pk} уже отправляется")
+        return 0
+
+    sent = 0
+    smtp_connection = get_connection()
+    try:
+        smtp_connection.open()
+        pending = campaign.recipients.filter(status=OutgoingEmailStatus.PENDING).order_by("id")
+        last_id = 0
+        while True:
+            chunk = list(pending.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            for recipient in chunk:
+                limiter.wait()
+                # Аренда продлевается перед каждым письмом: второй воркер не начнёт ту же рассылку
+                extend_campaign_lock(campaign, token, lease)
+                message = EmailMessage(
+                    subject=campaign.subject,
+                    body=campaign.body,
+                    from_email=settings.EMAIL_HOST_USER,
+                    to=[recipient.email],
+                    connection=smtp_connection,
+                )
+                if campaign.is_html:
+                    message.content_subtype = "html"
+                try:
+                    message.send()
+                except smtplib.SMTPException as error:
+                    if not is_permanent_failure(error):
+                        raise
+                    CampaignRecipient.objects.filter(pk=recipient.pk).update(
+                        status=OutgoingEmailStatus.FAILED, error=str(error)
+                    )
+                else:
+                    CampaignRecipient.objects.filter(pk=recipient.pk).update(
+                        status=OutgoingEmailStatus.SENT, sent_at=timezone.now()
+                    )
+                    sent += 1
+            logger.info(f"Рассылка {campaign.pk}: отправлено {sent} писем")
+    finally:
+        smtp_connection.close()
+        release_campaign_lock(campaign, token)
+
+    Campaign.objects.filter(pk=campaign.pk, status=CampaignStatus.SENDING).exclude(
+        recipients__status=OutgoingEmailStatus.PENDING
+    ).update(status=CampaignStatus.FINISHED, finished_at=timezone.now())
+    return sent
@@ -0,0 +1,47 @@
+import logging
+
+from celery import shared_task
+
+from mailings.services import CampaignLockLostError, send_campaign, send_pending_emails
+
+logger = logging.getLogger(__name__)
+
+# Сколько пачек писем отправляет одна задача, остаток заберёт следующий запуск
+MAX_BATCHES_PER_TASK = 20
+
+
+@shared_task
+def send_outgoing_emails():
+    """
+    Отправляет письма из очереди пачками (после постановки писем и по расписанию Celery beat —
+    для повторов после ошибок). Несколько воркеров разбирают очередь параллельно.
+    """
+    sent = 0
+    for _ in range(MAX_BATCHES_PER_TASK):
+        claimed = send_pending_emails()
+        if not claimed:
+            break
+        sent += claimed
+    if sent:
+        logger.info(f"Обработано писем из очереди: {sent}")
+
+
+# Ошибки SMTP (smtplib.SMTPException) и сети — подклассы OSError
+@shared_task(
+    autoretry_for=(OSError,),
+    retry_backoff=60,
+    retry_backoff_max=60 * 30,
+    max_retries=10,
+)
+def send_campaign_task(campaign_id):
+    """
+    Отправляет рассылку подписчикам. При ошибке SMTP задача повторяется с экспоненциальной задержкой
+    и продолжает с неотправленных получателей.
+    """
+    try:
+        sent = send_campaign(campaign_id)
+    except CampaignLockLostError as error:
+        # Рассылку продолжает воркер, получивший аренду
+        logger.warning(str(error))
+        return
+    logger.info(f"Рассылка {campaign_id}: отправлено {sent} писем")
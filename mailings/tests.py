@@ -1,8 +1,16 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from mailings.models import Mailing
+from mailings.models import Campaign, CampaignStatus, Mailing, OutgoingEmail, OutgoingEmailStatus
+from mailings.services import EMAIL_MAX_ATTEMPTS, queue_email, send_campaign, send_pending_emails, start_campaign
 
 
 class MailingTestCase(APITestCase):
@@ -81,3 +89,164 @@ class MailingTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("email", response.data)
+
+
+class OutgoingEmailTestCase(TestCase):
+    """Тесты очереди отправки писем."""
+
+    def test_subscription_email_queued(self):
+        """Письмо о подписке ставится в очередь, а не отправляется в запросе"""
+        response = self.client.post(reverse("mailings:mailings-list"), {"email": "queued@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.recipients, email.status), (["queued@example.com"], OutgoingEmailStatus.PENDING))
+
+    def test_batch_sent_over_one_connection(self):
+        """Пачка писем уходит через одно соединение"""
+        for number in range(3):
+            queue_email("Тема", "Текст", [f"user{number}@example.com"])
+        with mock.patch("mailings.services.get_connection", wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_pending_emails(), 3)
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmailStatus.SENT).exists())
+        self.assertEqual(send_pending_emails(), 0)
+
+    def test_retry_with_backoff(self):
+        """Ошибка отправки откладывает письмо, после последней попытки оно не отправлено"""
+        email = queue_email("Тема", "Текст", ["user@example.com"])
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP недоступен")):
+            send_pending_emails()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutgoingEmailStatus.PENDING, 1))
+            self.assertGreater(email.send_after, timezone.now())
+            self.assertEqual(send_pending_emails(), 0)
+
+            OutgoingEmail.objects.update(attempts=EMAIL_MAX_ATTEMPTS - 1, send_after=timezone.now())
+            send_pending_emails()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.last_error), (OutgoingEmailStatus.FAILED, "SMTP недоступен"))
+
+    def test_sensitive_body_erased(self):
+        """Текст секретного письма стирается после отправки и после окончательной ошибки"""
+        sent = queue_email("Код", "Код 1234", ["sent@example.com"], sensitive=True)
+        send_pending_emails()
+        self.assertIn("1234", mail.outbox[0].body)
+
+        failed = queue_email("Код", "Код 5678", ["failed@example.com"], sensitive=True)
+        OutgoingEmail.objects.filter(pk=failed.pk).update(attempts=EMAIL_MAX_ATTEMPTS - 1)
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP недоступен")):
+            send_pending_emails()
+        for email in (sent, failed):
+            email.refresh_from_db()
+            self.assertEqual(email.body, "")
+        self.assertEqual(failed.status, OutgoingEmailStatus.FAILED)
+
+    def test_smtp_unavailable_counts_attempt(self):
+        """Недоступный SMTP-сервер считается попыткой для всех неотправленных писем пачки"""
+        for number in range(2):
+            queue_email("Тема", "Текст", [f"user{number}@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("Нет соединения")):
+            self.assertEqual(send_pending_emails(), 0)
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual((email.status, email.attempts), (OutgoingEmailStatus.PENDING, 1))
+            self.assertEqual(email.last_error, "Нет соединения")
+
+        OutgoingEmail.objects.update(attempts=EMAIL_MAX_ATTEMPTS - 1, send_after=timezone.now())
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("Нет соединения")):
+            send_pending_emails()
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmailStatus.FAILED).exists())
+
+    def test_expired_sensitive_email_dropped(self):
+        """Письмо с кодом входа старше срока действия кода не отправляется, текст стирается"""
+        email = queue_email("Код", "Код 1234", ["user@example.com"], sensitive=True)
+        OutgoingEmail.objects.filter(pk=email.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(send_pending_emails(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.body), (OutgoingEmailStatus.FAILED, ""))
+
+
+class CampaignTestCase(TestCase):
+    """Тесты рассылки подписчикам."""
+
+    def setUp(self):
+        for number in range(5):
+            Mailing.objects.create(email=f"user{number}@example.com", mailing=True)
+        Mailing.objects.create(email="unsubscribed@example.com", mailing=False)
+        self.campaign = Campaign.objects.create(subject="Новости", body="<p>Текст</p>")
+
+    def recipients(self, status):
+        return list(self.campaign.recipients.filter(status=status).values_list("email", flat=True).order_by("id"))
+
+    def test_snapshot_and_send(self):
+        """Письма получают активные на момент запуска подписчики, через одно соединение и пачками"""
+        start_campaign(self.campaign)
+        Mailing.objects.create(email="late@example.com", mailing=True)
+        with mock.patch("mailings.services.get_connection", wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_campaign(self.campaign.pk, rate_limit=0, chunk_size=2), 5)
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f"user{n}@example.com" for n in range(5)])
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, CampaignStatus.FINISHED)
+
+    def test_resume(self):
+        """Прерванная рассылка продолжается с неотправленных получателей"""
+        start_campaign(self.campaign)
+        original_send = mail.EmailMessage.send
+
+        def send(message, *args, **kwargs):
+            if message.to == ["user3@example.com"]:
+                raise smtplib.SMTPServerDisconnected("Соединение разорвано")
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch("django.core.mail.EmailMessage.send", send), self.assertRaises(smtplib.SMTPException):
+            send_campaign(self.campaign.pk, rate_limit=0)
+        self.assertEqual(len(self.recipients(OutgoingEmailStatus.SENT)), 3)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, CampaignStatus.SENDING)
+
+        mail.outbox.clear()
+        self.assertEqual(send_campaign(self.campaign.pk, rate_limit=0), 2)
+        self.assertEqual([message.to[0] for message in mail.outbox], ["user3@example.com", "user4@example.com"])
+
+    def test_refused_recipient(self):
+        """Постоянный отказ (5xx) по адресу не останавливает рассылку, временный (4xx) прерывает её"""
+        original_send = mail.EmailMessage.send
+        errors = {
+            "user1@example.com": smtplib.SMTPRecipientsRefused({"user1@example.com": (550, b"No such user")}),
+            "user2@example.com": smtplib.SMTPDataError(554, b"Message rejected"),
+            "user3@example.com": smtplib.SMTPDataError(451, b"Try again later"),
+        }
+
+        def send(message, *args, **kwargs):
+            if message.to[0] in errors:
+                raise errors[message.to[0]]
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch("django.core.mail.EmailMessage.send", send):
+            with self.assertRaises(smtplib.SMTPDataError):
+                send_campaign(self.campaign.pk, rate_limit=0)
+            errors["user3@example.com"] = smtplib.SMTPRecipientsRefused({"user3@example.com": (452, b"Mailbox full")})
+            with self.assertRaises(smtplib.SMTPRecipientsRefused):
+                send_campaign(self.campaign.pk, rate_limit=0)
+            del errors["user3@example.com"]
+            self.assertEqual(send_campaign(self.campaign.pk, rate_limit=0), 2)
+        self.assertEqual(self.recipients(OutgoingEmailStatus.FAILED), ["user1@example.com", "user2@example.com"])
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, CampaignStatus.FINISHED)
+
+    def test_lock(self):
+        """Рассылку с действующей арендой другой воркер не отправляет, истёкшую аренду перехватывает"""
+        start_campaign(self.campaign)
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            locked_by="other", locked_until=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(send_campaign(self.campaign.pk, rate_limit=0), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+        Campaign.objects.filter(pk=self.campaign.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(send_campaign(self.campaign.pk, rate_limit=0), 5)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.locked_by, self.campaign.locked_until), ("", None))
@@ -1,4 +1,3 @@
-from django.core.mail import EmailMessage
 from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
 from rest_framework import status, viewsets
 from rest_framework.exceptions import NotFound
@@ -8,9 +7,9 @@ from rest_framework.response import Response
 from all_fixture.errors.list_error import MAILING_ID_ERROR
 from all_fixture.errors.views_error import MAILING_400, MAILING_404
 from all_fixture.views_fixture import LIMIT, MAILING_ID, MAILING_SETTINGS, OFFSET
-from config.settings import EMAIL_HOST_USER
 from mailings.models import Mailing
 from mailings.serializers import MailingSerializer
+from mailings.services import queue_email
 
 
 @extend_schema(tags=[MAILING_SETTINGS["name"]])
@@ -96,38 +95,29 @@ class MailingViewSet(viewsets.ModelViewSet):
     serializer_class = MailingSerializer
 
     def create(self, request, *args, **kwargs):
-        """Добавление рассылки."""
+        """Добавление рассылки, письмо о подписке уходит через очередь отправки."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
-        email = serializer.data["email"]
-        try:
-            email_message = EmailMessage(
-                subject="Вы подписались на рассылку",
-                body="""
-                    <html>
-                        <body>
-                            <p>Вы подписались на рассылку в сервис <strong>'Куда Угодно'</strong>:</p>
-                            <p>Если вы не подписывались, то сообщите в поддержку.</p>
-                        </body>
-                    </html>
-                """,
-                from_email=EMAIL_HOST_USER,
-                to=[email],
-            )
-            email_message.content_subtype = "html"
-            email_message.send()
-            return Response(
-                {"message": "Спасибо за подписку!", "data": serializer.data},
-                status=status.HTTP_201_CREATED,
-                headers=headers,
-            )
-        except Exception as e:
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        queue_email(
+            subject="Вы подписались на рассылку",
+            body="""
+                <html>
+                    <body>
+                        <p>Вы подписались на рассылку в сервис <strong>'Куда Угодно'</strong>:</p>
+                        <p>Если вы не подписывались, то сообщите в поддержку.</p>
+                    </body>
+                </html>
+            """,
+            recipients=[serializer.data["email"]],
+            is_html=True,
+        )
+        return Response(
+            {"message": "Спасибо за подписку!", "data": serializer.data},
+            status=status.HTTP_201_CREATED,
+            headers=headers,
+        )
 
     def destroy(self, request, *args, **kwargs):
         """Мягкое удаление рассылки."""
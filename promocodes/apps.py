@@ -5,3 +5,6 @@ class PromocodesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "promocodes"
     verbose_name = "Промокоды"
+
+    def ready(self):
+        import promocodes.signals  # noqa: F401
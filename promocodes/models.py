@@ -16,6 +16,12 @@ class Promocode(models.Model):
         help_text="Загрузите фотографию для промокода",
         **NULLABLE,
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Варианты фотографии",
+        help_text="Уменьшенные копии фотографии в WebP и JPEG, строятся в фоне",
+    )
     start_date = models.DateField(
         verbose_name="Дата начала",
         help_text="Введите дату начала",
@@ -3,6 +3,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.fields import CharField, DecimalField, ImageField, IntegerField
 from rest_framework.serializers import ModelSerializer, Serializer
 
+from all_fixture.images import ImageVariantsField
 from promocodes.models import Promocode
 from tours.models import Tour
 
@@ -14,12 +15,14 @@ class PromocodeSerializer(ModelSerializer):
         default="0.17",
     )
     photo = ImageField()
+    photo_variants = ImageVariantsField(source="image_variants")
 
     class Meta:
         model = Promocode
         fields = (
             "id",
             "photo",
+            "photo_variants",
             "start_date",
             "end_date",
             "name",
@@ -0,0 +1,4 @@
+from all_fixture.images import register_image_variants
+from promocodes.models import Promocode
+
+register_image_variants(Promocode, "photo")
@@ -1,7 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.db.models import Prefetch
-from django.db.models.expressions import RawSQL
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
 from django_filters import (
     DateFromToRangeFilter,
     FilterSet,
@@ -10,64 +9,55 @@ from django_filters import (
 from rest_framework.exceptions import ValidationError
 
 from all_fixture.choices import RoomCategoryChoices
-from calendars.models import CalendarDate
+from calendars.models import CalendarDate, RoomNightPrice
 from rooms.models import Room
 
+STAY_PRICE_SUBQUERY = "subquery"
+STAY_PRICE_JOIN = "join"
 
-def annotate_with_prices(queryset, start_date, end_date):
+
+def annotate_with_prices(queryset, start_date, end_date, mode=STAY_PRICE_JOIN):
+    """
+    Добавляет к номерам стоимость проживания с датами заезда/выезда.
+    Считается по стоимости номеров за ночь, остаются только номера, доступные все ночи.
+
+    mode=STAY_PRICE_JOIN — одно соединение с ночами проживания и группировка по номеру,
+    все три значения считаются за один проход.
+    mode=STAY_PRICE_SUBQUERY — отдельный коррелированный подзапрос на каждое значение.
+    """
     # Приводим к date, чтобы исключить влияние времени
     start_date = start_date.date() if isinstance(start_date, datetime) else start_date
     end_date = end_date.date() if isinstance(end_date, datetime) else end_date
     total_nights = max((end_date - start_date).days, 1)
+    check_out_date = start_date + timedelta(days=total_nights)
 
-    price_sql = """
-        WITH date_series AS (
-            SELECT generate_series(%s::date, (%s::date - interval '1 day'), interval '1 day')::date AS day
-        ),
-        calculations AS (
-            SELECT 
-                COUNT(DISTINCT CASE WHEN cd.available_for_booking = TRUE THEN ds.day END) AS nights,
-                COALESCE(SUM(cp.price), 0) AS total_price_without_discount,
-                COALESCE(
-                    SUM(
-                        CASE 
-                            WHEN cd.discount = TRUE AND cd.discount_amount IS NOT NULL THEN 
-                                CASE 
-                                    WHEN cd.discount_amount <= 1.0 THEN GREATEST(cp.price * (1 - cd.discount_amount), 0)
-                                    ELSE GREATEST(cp.price - cd.discount_amount, 0)
-                                END
-                            ELSE cp.price
-                        END
-                    ),
-                    0
-                ) AS total_price_with_discount
-            FROM date_series ds
-            JOIN calendars_calendardate cd ON ds.day BETWEEN cd.start_date AND cd.end_date
-            JOIN calendars_calendarprice cp ON cp.calendar_date_id = cd.id
-            WHERE cp.room_id = rooms_room.id
+    if mode == STAY_PRICE_JOIN:
+        # Фильтр и агрегаты после него используют одно и то же соединение с ночами
+        queryset = queryset.filter(
+            night_prices__date__gte=start_date,
+            night_prices__date__lt=check_out_date,
+            night_prices__available_for_booking=True,
+        ).annotate(
+            total_price_without_discount=Sum("night_prices__price"),
+            total_price_with_discount=Sum("night_prices__price_with_discount"),
+            nights=Count("night_prices"),
+        )
+    else:
+        nights = (
+            RoomNightPrice.objects.filter(
+                room=OuterRef("pk"),
+                date__gte=start_date,
+                date__lt=check_out_date,
+                available_for_booking=True,
+            )
+            .order_by()
+            .values("room")
+        )
+        queryset = queryset.annotate(
+            total_price_without_discount=Subquery(nights.annotate(total=Sum("price")).values("total")[:1]),
+            total_price_with_discount=Subquery(nights.annotate(total=Sum("price_with_discount")).values("total")[:1]),
+            nights=Subquery(nights.annotate(total=Count("id")).values("total")[:1]),
         )
-        SELECT 
-            total_price_without_discount AS price_without_discount,
-            total_price_with_discount AS price_with_discount,
-            nights AS available_count
-        FROM calculations
-    """
-
-    params = (start_date, end_date)
-    queryset = queryset.annotate(
-        total_price_without_discount=RawSQL(
-            f"SELECT price_without_discount FROM ({price_sql}) AS subquery",
-            params,
-        ),
-        total_price_with_discount=RawSQL(
-            f"SELECT price_with_discount FROM ({price_sql}) AS subquery",
-            params,
-        ),
-        nights=RawSQL(
-            f"SELECT available_count FROM ({price_sql}) AS subquery",
-            params,
-        ),
-    )
     # Фильтруем по полному покрытию
     queryset = queryset.filter(nights=total_nights)
     return queryset
@@ -0,0 +1,53 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from calendars.models import RoomNightPrice
+from rooms.filters import STAY_PRICE_JOIN, STAY_PRICE_SUBQUERY, annotate_with_prices
+from rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = "Команда для сравнения способов расчёта стоимости проживания в номерах (данные из c_hotel)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="Дата заезда, по умолчанию первая ночь в ценах")
+        parser.add_argument("--nights", type=int, default=7, help="Количество ночей")
+        parser.add_argument("--runs", type=int, default=20, help="Количество замеров на способ")
+
+    def handle(self, *args, **options):
+        start_date = options["start"] or RoomNightPrice.objects.order_by("date").values_list("date", flat=True).first()
+        if start_date is None:
+            self.stdout.write(self.style.ERROR("Нет цен номеров, сначала выполните c_hotel и refresh_hotel_prices"))
+            return
+        end_date = start_date + timedelta(days=options["nights"])
+        self.stdout.write(f"Номеров: {Room.objects.count()}, заезд {start_date}, выезд {end_date}")
+
+        results = {}
+        for mode in (STAY_PRICE_SUBQUERY, STAY_PRICE_JOIN):
+            queryset = annotate_with_prices(Room.objects.order_by("pk"), start_date, end_date, mode=mode).values_list(
+                "pk", "total_price_without_discount", "total_price_with_discount"
+            )
+            timings = []
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                rows = list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[mode] = rows
+            self.stdout.write(
+                f"{mode:>8}: медиана {statistics.median(timings):.2f} мс, "
+                f"мин {min(timings):.2f} мс, номеров {len(rows)}"
+            )
+            with connection.cursor() as cursor:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN ANALYZE {sql}", params)
+                plan = cursor.fetchall()
+            self.stdout.write(f"{mode:>8}: {plan[-1][0]}")
+
+        if results[STAY_PRICE_SUBQUERY] != results[STAY_PRICE_JOIN]:
+            self.stdout.write(self.style.ERROR("Результаты способов расчёта различаются"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Результаты способов расчёта совпадают"))
@@ -184,6 +184,12 @@ class RoomPhoto(models.Model):
         help_text="Фотография номера",
         blank=True,
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Варианты фотографии",
+        help_text="Уменьшенные копии фотографии в WebP и JPEG, строятся в фоне",
+    )
 
     class Meta:
         verbose_name = "Фотография номера"
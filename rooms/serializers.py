@@ -5,6 +5,8 @@ from drf_spectacular.utils import extend_schema_field
 from rest_framework.fields import DecimalField, IntegerField, SerializerMethodField
 from rest_framework.serializers import ImageField, ModelSerializer
 
+from all_fixture.images import ImageVariantsField
+from all_fixture.prefetch import get_limited
 from calendars.models import CalendarDate
 from rooms.models import Room, RoomPhoto, RoomRules
 
@@ -15,12 +17,14 @@ class RoomPhotoSerializer(ModelSerializer):
     """
 
     photo = ImageField()
+    variants = ImageVariantsField(source="image_variants")
 
     class Meta:
         model = RoomPhoto
         fields = (
             "id",
             "photo",
+            "variants",
             "room",
         )
         read_only_fields = (
@@ -163,11 +167,7 @@ class RoomDetailSerializer(RoomBaseSerializer):
     calendar_dates = SerializerMethodField(
         read_only=True,
     )
-    photo = RoomPhotoSerializer(
-        source="room_photos",
-        many=True,
-        read_only=True,
-    )
+    photo = SerializerMethodField()
     rules = RoomRulesSerializer(
         many=True,
         read_only=True,
@@ -196,6 +196,11 @@ class RoomDetailSerializer(RoomBaseSerializer):
             "nights",
         )
 
+    @extend_schema_field(field=RoomPhotoSerializer(many=True))
+    def get_photo(self, obj: Room):
+        """Фотографии номера: в списке номеров — первые из limited_prefetch, в карточке — все."""
+        return RoomPhotoSerializer(get_limited(obj, "room_photos"), many=True, context=self.context).data
+
     @extend_schema_field(field=RoomCalendarDateSerializer(many=True))
     def get_calendar_dates(self, obj: Room):
         request = self.context.get("request")
@@ -0,0 +1,6 @@
+from all_fixture.images import register_image_variants
+from all_fixture.trigram import register_trigram_index
+from rooms.models import Room, RoomPhoto
+
+register_image_variants(RoomPhoto, "photo")
+register_trigram_index(Room, "category")
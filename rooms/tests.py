@@ -1,5 +1,7 @@
 import shutil
 import tempfile
+from datetime import date
+from decimal import Decimal
 
 from django.conf import settings
 from django.test import TestCase
@@ -10,7 +12,9 @@ from rest_framework.test import APIClient
 from all_fixture.tests.fixture_hotel import get_hotel_data
 from all_fixture.tests.fixture_hotel_room import get_hotel_room_data, get_hotel_room_photo_data, update_hotel_room_data
 from all_fixture.tests.test_temp_image import create_test_image
+from calendars.models import CalendarDate, CalendarPrice, RoomNightPrice
 from hotels.models import Hotel
+from rooms.filters import STAY_PRICE_JOIN, STAY_PRICE_SUBQUERY, annotate_with_prices
 from rooms.models import Room, RoomPhoto
 
 
@@ -125,3 +129,39 @@ class RoomModelTest(TestCase):
         response = self.client.delete(self.url_photo_detail)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(RoomPhoto.objects.count(), 0)
+
+
+class RoomStayPriceTest(TestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Тестовый отель", country="Россия", city="Москва")
+        self.room = Room.objects.create(hotel=self.hotel, category="Стандарт", area=50)
+        self.other_room = Room.objects.create(hotel=self.hotel, category="Люкс", area=80)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = CalendarDate.objects.create(
+                hotel=self.hotel, start_date=date(2030, 7, 1), end_date=date(2030, 7, 2)
+            )
+            second = CalendarDate.objects.create(
+                hotel=self.hotel,
+                start_date=date(2030, 7, 3),
+                end_date=date(2030, 7, 5),
+                discount=True,
+                discount_amount=Decimal("500.00"),
+            )
+            CalendarPrice.objects.create(calendar_date=first, room=self.room, price=Decimal("4000.00"))
+            CalendarPrice.objects.create(calendar_date=second, room=self.room, price=Decimal("5000.00"))
+            CalendarPrice.objects.create(calendar_date=first, room=self.other_room, price=Decimal("9000.00"))
+
+    def test_night_prices_created(self):
+        """Стоимость номера разворачивается по ночам периодов"""
+        self.assertEqual(RoomNightPrice.objects.filter(room=self.room).count(), 5)
+        self.assertEqual(RoomNightPrice.objects.filter(room=self.other_room).count(), 2)
+
+    def test_stay_price(self):
+        """Стоимость проживания считается по ночам, номера без полного покрытия исключаются"""
+        for mode in (STAY_PRICE_JOIN, STAY_PRICE_SUBQUERY):
+            with self.subTest(mode=mode):
+                rooms = annotate_with_prices(Room.objects.all(), date(2030, 7, 2), date(2030, 7, 5), mode=mode)
+                self.assertEqual(list(rooms), [self.room])
+                self.assertEqual(rooms[0].nights, 3)
+                self.assertEqual(rooms[0].total_price_without_discount, Decimal("14000.00"))
+                self.assertEqual(rooms[0].total_price_with_discount, Decimal("13000.00"))
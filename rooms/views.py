@@ -30,6 +30,7 @@ from all_fixture.errors.views_error import (
     ROOM_UPDATE_404,
 )
 from all_fixture.pagination import CustomLOPagination
+from all_fixture.prefetch import limited_prefetch
 from all_fixture.views_fixture import (
     HOTEL_ID,
     ID_ROOM,
@@ -205,8 +206,11 @@ class RoomViewSet(HotelRelatedMixin, BaseErrorHandlingMixin, viewsets.ModelViewS
         return RoomDetailSerializer
 
     def get_queryset(self):
+        room_photos = "room_photos"
+        if self.action == "list":
+            room_photos = limited_prefetch("room_photos", RoomPhoto.objects.all())
         return Room.objects.filter(hotel_id=self.kwargs["hotel_id"]).prefetch_related(
-            "room_photos",
+            room_photos,
             "rules",
         )
 
@@ -5,3 +5,6 @@ class ToursConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tours"
     verbose_name = "Туры"
+
+    def ready(self):
+        import tours.signals  # noqa: F401
@@ -183,12 +183,12 @@ class TourPopularSerializer(PriceFieldsMixin, AbstractTourSerializer):
 
     def get_photo(self, obj) -> str:
         """
-        Возвращает URL первой фотографии отеля.
+        Возвращает URL обложки отеля.
         """
         request = self.context.get("request")
-        first_photo = obj.hotel.hotel_photos.first()
-        if first_photo:
-            return request.build_absolute_uri(first_photo.photo.url) if request else first_photo.photo.url
+        cover_photo = obj.hotel.cover_photo if obj.hotel else None
+        if cover_photo:
+            return request.build_absolute_uri(cover_photo.photo.url) if request else cover_photo.photo.url
         return None
 
 
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from all_fixture.cache import TOURS_SHOWCASE, bump_cache_version
+from tours.models import Tour
+
+
+@receiver([post_save, post_delete], sender=Tour)
+def tour_changed(sender, instance, **kwargs):
+    """Сброс витрин туров при изменении тура."""
+    bump_cache_version(TOURS_SHOWCASE)
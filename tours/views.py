@@ -10,6 +10,7 @@ from drf_spectacular.utils import (
 from rest_framework import viewsets
 from rest_framework.exceptions import NotFound, ValidationError
 
+from all_fixture.cache import TOURS_SHOWCASE, CachedListMixin
 from all_fixture.errors.list_error import TOUR_ERROR
 from all_fixture.errors.serializers_error import TourErrorSerializer
 from all_fixture.errors.views_descriptions import DESCRIPTION_POPULAR_TOURS
@@ -18,15 +19,19 @@ from all_fixture.errors.views_error import (
     TOUR_UPDATE_400,
 )
 from all_fixture.pagination import CustomLOPagination
+from all_fixture.prefetch import limited_prefetch
+from all_fixture.streaming import StreamingListMixin
+from all_fixture.trigram import AUTOCOMPLETE_LIMIT, trigram_search
 from all_fixture.views_fixture import (
     DISCOUNT_SETTINGS,
     LIMIT,
     OFFSET,
+    STREAM,
     TOUR_ID,
     TOUR_SETTINGS,
 )
 from calendars.models import CalendarPrice
-from hotels.models import Hotel, TypeOfMeal
+from hotels.models import Hotel, HotelPhoto, TypeOfMeal
 from rooms.models import Room
 from tours.filters import TourFilter
 from tours.models import Tour
@@ -47,6 +52,7 @@ from tours.serializers import (
         parameters=[
             LIMIT,
             OFFSET,
+            STREAM,
         ],
         responses={
             200: OpenApiResponse(
@@ -134,7 +140,7 @@ from tours.serializers import (
         },
     ),
 )
-class TourViewSet(viewsets.ModelViewSet):
+class TourViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Tour.objects.all()
     pagination_class = CustomLOPagination
     filter_backends = [DjangoFilterBackend]
@@ -153,7 +159,12 @@ class TourViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Базовый queryset с оптимизациями + поддержка фильтров."""
-        queryset = super().get_queryset().select_related("hotel").prefetch_related("hotel__hotel_photos")
+        queryset = (
+            super()
+            .get_queryset()
+            .select_related("hotel")
+            .prefetch_related(limited_prefetch("hotel__hotel_photos", HotelPhoto.objects.all()))
+        )
         if self.action == "list":
             filterset = self.filterset_class(self.request.query_params, queryset=queryset)
             if not filterset.is_valid():
@@ -180,12 +191,13 @@ class TourViewSet(viewsets.ModelViewSet):
         },
     )
 )
-class TourHotView(viewsets.ModelViewSet):
+class TourHotView(CachedListMixin, viewsets.ModelViewSet):
     """Горящие туры по одному из каждой страны по минимальной цене."""
 
     queryset = Tour.objects.none()
     serializer_class = TourShortSerializer
     pagination_class = CustomLOPagination
+    cache_namespace = TOURS_SHOWCASE
 
     def get_queryset(self):
         """Получение тура по одному из каждой страны с минимальной ценой."""
@@ -201,6 +213,8 @@ class TourHotView(viewsets.ModelViewSet):
 
         queryset = (
             Tour.objects.filter(is_active=True, discount_amount__isnull=False)
+            .select_related("hotel")
+            .prefetch_related(limited_prefetch("hotel__hotel_photos", HotelPhoto.objects.all()))
             .annotate(
                 number_of_adults=Subquery(guests_subquery.values("room__number_of_adults")),
                 number_of_children=Subquery(guests_subquery.values("room__number_of_children")),
@@ -229,12 +243,13 @@ class TourHotView(viewsets.ModelViewSet):
     ),
     retrieve=extend_schema(exclude=True),
 )
-class TourPopularView(viewsets.ModelViewSet):
+class TourPopularView(CachedListMixin, viewsets.ModelViewSet):
     """Туры шести стран."""
 
     queryset = Tour.objects.none()
     serializer_class = TourPopularSerializer
     pagination_class = CustomLOPagination
+    cache_namespace = TOURS_SHOWCASE
 
     def get_queryset(self):
         """Получение тура по одному из шести страны с минимальной ценой."""
@@ -251,6 +266,7 @@ class TourPopularView(viewsets.ModelViewSet):
 
         queryset = (
             Tour.objects.filter(is_active=True)
+            .select_related("hotel__cover_photo")
             .annotate(
                 tours_count=Subquery(country_tour_count),
                 country_rank=Window(
@@ -270,7 +286,7 @@ class ToursAutocompleteHotel(autocomplete.Select2QuerySetView):
     def get_queryset(self):
         qs = Hotel.objects.all()
         if self.q:
-            qs = qs.filter(name__icontains=self.q)
+            qs = trigram_search(qs, "name", self.q, limit=AUTOCOMPLETE_LIMIT)
         return qs
 
 
@@ -284,7 +300,7 @@ class ToursAutocompleteRoom(autocomplete.Select2QuerySetView):
         if selected:
             qs = qs.exclude(id__in=selected)
         if self.q:
-            qs = qs.filter(category__icontains=self.q)
+            qs = trigram_search(qs, "category", self.q, limit=AUTOCOMPLETE_LIMIT)
         return qs
 
 
@@ -298,5 +314,5 @@ class ToursAutocompleteTypeOfMeal(autocomplete.Select2QuerySetView):
         if selected:
             qs = qs.exclude(id__in=selected)
         if self.q:
-            qs = qs.filter(name__icontains=self.q)
+            return trigram_search(qs, "name", self.q).order_by("-search_similarity", "price")[:AUTOCOMPLETE_LIMIT]
         return qs.order_by("price")
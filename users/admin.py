@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
 from users.models import User
+from users.services import clear_login_limits
 
 
 # ─────────── Массовые действия ────────────────────────────────────────────
@@ -13,6 +14,7 @@ def admin_deactivate(modeladmin, request, queryset):
 @admin.action(description="Реактивировать выбранных пользователей")
 def admin_reactivate(modeladmin, request, queryset):
     queryset.update(is_active=True, ban_until=None, ban_level=0, failed_login_count=0)
+    clear_login_limits(queryset.values_list("pk", flat=True))
 
 
 # ─────────── Admin class ─────────────────────────────────────────────
@@ -173,15 +173,37 @@ class LoginAttempt(models.Model):
         related_name="login_attempts",
         verbose_name="Пользователь",
     )
+    # Не auto_now_add: попытки из буфера Redis записываются пачкой со своим временем
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Когда",  # бывш. ts
     )
     success = models.BooleanField(verbose_name="Успех")
     ip = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP")
+    # Ключ попытки из буфера Redis: повторный перенос той же пачки не создаёт дублей
+    key = models.CharField(max_length=32, unique=True, null=True, editable=False, verbose_name="Ключ из буфера")
 
     class Meta:
         verbose_name = "Попытка входа"
         verbose_name_plural = "Попытки входа"
         indexes = [models.Index(fields=["user", "-created_at"])]
         ordering = ["-created_at"]
+
+
+# ─── Одноразовые коды входа ───────────────────────────────────────────────────
+class LoginCode(models.Model):
+    """Действующий код входа пользователя. Хранится только HMAC кода, новый код заменяет прежний."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="login_code",
+        verbose_name="Пользователь",
+    )
+    code_hash = models.CharField(max_length=64, verbose_name="HMAC кода")
+    expires_at = models.DateTimeField(verbose_name="Действует до")
+
+    class Meta:
+        verbose_name = "Код входа"
+        verbose_name_plural = "Коды входа"
@@ -1,11 +1,20 @@
+import json
+import logging
+import math
+import secrets
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import UTC, datetime, timedelta
 
 from django.conf import settings
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
 from django.utils.timezone import localtime
+from redis.exceptions import RedisError, ResponseError
 
-from users.models import LoginAttempt, User
+from all_fixture.redis_client import get_redis, redis_key
+from users.models import LoginAttempt, LoginCode, User
+
+logger = logging.getLogger(__name__)
 
 # Также переопределила в settings.py:
 # LOGIN_ATTEMPTS_LIMIT = 5
@@ -20,6 +29,7 @@ DEFAULT_BAN_STEPS = [
     timedelta(days=7),
 ]
 BAN_STEPS = getattr(settings, "LOGIN_BAN_STEPS", DEFAULT_BAN_STEPS)
+LOGIN_CODE_TTL = getattr(settings, "LOGIN_CODE_TTL", timedelta(minutes=5))
 
 
 @dataclass
@@ -33,8 +43,14 @@ def _iso_local(dt) -> str:
     return localtime(dt).isoformat()
 
 
-def get_login_state(user: User) -> AttemptState:
+def get_login_state(user: User, ip: str | None = None) -> AttemptState:
     """Вернёт текущее состояние счётчиков/блокировки для ответа фронту."""
+    client = get_redis()
+    if client is not None:
+        try:
+            return _redis_login_state(client, user, ip)
+        except RedisError:
+            logger.warning("Не удалось прочитать ограничения входа из Redis", exc_info=True)
     if user.is_banned() and user.ban_until:
         return AttemptState(remaining_attempts=0, blocked_until=_iso_local(user.ban_until))
     remaining = max(0, LOGIN_ATTEMPTS_LIMIT - int(user.failed_login_count or 0))
@@ -43,6 +59,14 @@ def get_login_state(user: User) -> AttemptState:
 
 def record_login_attempt(user: User, success: bool, ip: str | None = None) -> AttemptState:
     """Логируем попытку, обновляем счётчики/блокировку и возвращаем текущее состояние."""
+    client = get_redis()
+    if client is not None:
+        try:
+            _redis_record_attempt(client, user, success, ip)
+            return get_login_state(user, ip)
+        except RedisError:
+            logger.warning("Не удалось учесть попытку входа в Redis", exc_info=True)
+
     LoginAttempt.objects.create(user=user, success=success, ip=ip)
 
     if success:
@@ -54,17 +78,210 @@ def record_login_attempt(user: User, success: bool, ip: str | None = None) -> At
         # Неуспешная попытка
         user.failed_login_count = int(user.failed_login_count or 0) + 1
         if user.failed_login_count >= LOGIN_ATTEMPTS_LIMIT:
-            # Эскалация временной блокировки
-            level = min(int(user.ban_level or 0), len(BAN_STEPS) - 1)
-            user.ban_until = timezone.now() + BAN_STEPS[level]
-            user.ban_level = min(level + 1, len(BAN_STEPS) - 1)
-            user.failed_login_count = 0
+            _escalate_ban(user)
 
     user.save(update_fields=["failed_login_count", "ban_level", "ban_until"])
-    return get_login_state(user)
+    return get_login_state(user, ip)
+
+
+def _escalate_ban(user: User):
+    """Эскалация временной блокировки: следующая ступень BAN_STEPS, счётчик ошибок обнуляется."""
+    level = min(int(user.ban_level or 0), len(BAN_STEPS) - 1)
+    user.ban_until = timezone.now() + BAN_STEPS[level]
+    user.ban_level = min(level + 1, len(BAN_STEPS) - 1)
+    user.failed_login_count = 0
+    return BAN_STEPS[level]
+
+
+def check_ban(user: User, ip: str | None = None):
+    """Поднимет PermissionError при активной блокировке пользователя или IP (используется в вьюхе)."""
+    state = get_login_state(user, ip)
+    if state.blocked_until:
+        raise PermissionError(f"Вход заблокирован до {state.blocked_until}")
+
+
+# ─── Ограничения входа в Redis ─────────────────────────────────────────────────
+# Скользящие окна неудачных попыток — сортированные множества с отметками времени, блокировка
+# пользователя — ключ с TTL. Решение о блокировке не требует запросов к БД: в БД зеркалируются
+# только сами блокировки (ban_until/ban_level для админки), а попытки пишутся в LoginAttempt пачками.
+LOGIN_ATTEMPTS_WINDOW = getattr(settings, "LOGIN_ATTEMPTS_WINDOW", timedelta(minutes=15))
+LOGIN_IP_ATTEMPTS_LIMIT = getattr(settings, "LOGIN_IP_ATTEMPTS_LIMIT", 20)
+LOGIN_ATTEMPTS_PENDING_KEY = redis_key("login_attempts", "pending")
+LOGIN_ATTEMPTS_FLUSHING_KEY = redis_key("login_attempts", "flushing")
+LOGIN_ATTEMPTS_FLUSH_LOCK_KEY = redis_key("login_attempts", "flush_lock")
+LOGIN_ATTEMPTS_FLUSH_LOCK_TIMEOUT = 60 * 5
+LOGIN_ATTEMPTS_BATCH_SIZE = 1000
 
 
-def check_ban(user: User):
-    """Поднимет PermissionError при активной блокировке (используется в вьюхе)."""
+def login_failures_key(kind, value):
+    return redis_key("login", "failures", kind, value)
+
+
+def login_ban_key(user_id):
+    return redis_key("login", "ban", user_id)
+
+
+def _redis_login_state(client, user: User, ip: str | None) -> AttemptState:
+    now = timezone.now().timestamp()
+    window = LOGIN_ATTEMPTS_WINDOW.total_seconds()
+    pipe = client.pipeline(transaction=False)
+    pipe.get(login_ban_key(user.pk))
+    pipe.zcount(login_failures_key("user", user.pk), now - window, "+inf")
+    if ip:
+        # Окно IP переполнено, пока в нём есть LOGIN_IP_ATTEMPTS_LIMIT-я с конца попытка
+        pipe.zremrangebyscore(login_failures_key("ip", ip), "-inf", now - window)
+        pipe.zrange(login_failures_key("ip", ip), -LOGIN_IP_ATTEMPTS_LIMIT, -LOGIN_IP_ATTEMPTS_LIMIT, withscores=True)
+    ban_until, failures, *ip_results = pipe.execute()
+
+    blocked_until = float(ban_until) if ban_until and float(ban_until) > now else None
     if user.is_banned():
-        raise PermissionError(f"Аккаунт заблокирован до {_iso_local(user.ban_until)}")
+        # Блокировки из БД (выставленные до включения Redis или вручную в админке) тоже действуют
+        blocked_until = max(blocked_until or 0, user.ban_until.timestamp())
+    if ip_results and ip_results[1]:
+        ip_blocked_until = ip_results[1][0][1] + window
+        blocked_until = max(blocked_until or 0, ip_blocked_until)
+    if blocked_until:
+        blocked_until = datetime.fromtimestamp(blocked_until, tz=UTC)
+        return AttemptState(remaining_attempts=0, blocked_until=_iso_local(blocked_until))
+    return AttemptState(remaining_attempts=max(0, LOGIN_ATTEMPTS_LIMIT - failures), blocked_until=None)
+
+
+def _redis_record_attempt(client, user: User, success: bool, ip: str | None):
+    """
+    Учитывает попытку в Redis и кладёт её в буфер для LoginAttempt.
+    Блокировку выставляет ровно один запрос — тот, чья попытка заполнила окно пользователя.
+    """
+    now = timezone.now().timestamp()
+    window = LOGIN_ATTEMPTS_WINDOW.total_seconds()
+    user_key = login_failures_key("user", user.pk)
+    pipe = client.pipeline()
+    attempt = {"key": secrets.token_hex(16), "user": user.pk, "success": success, "ip": ip, "at": now}
+    pipe.rpush(LOGIN_ATTEMPTS_PENDING_KEY, json.dumps(attempt))
+    if success:
+        pipe.delete(user_key, login_ban_key(user.pk))
+        pipe.execute()
+        if user.failed_login_count or user.ban_level or user.ban_until:
+            user.failed_login_count = 0
+            user.ban_level = 0
+            user.ban_until = None
+            user.save(update_fields=["failed_login_count", "ban_level", "ban_until"])
+        return
+
+    member = f"{now}:{secrets.token_hex(4)}"
+    keys = [user_key, login_failures_key("ip", ip)] if ip else [user_key]
+    for key in keys:
+        pipe.zremrangebyscore(key, "-inf", now - window)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.expire(key, math.ceil(window))
+    failures = pipe.execute()[3]
+    if failures != LOGIN_ATTEMPTS_LIMIT:
+        return
+    duration = _escalate_ban(user)
+    pipe = client.pipeline()
+    pipe.set(login_ban_key(user.pk), user.ban_until.timestamp(), ex=math.ceil(duration.total_seconds()))
+    pipe.delete(user_key)
+    pipe.execute()
+    user.save(update_fields=["failed_login_count", "ban_level", "ban_until"])
+
+
+def clear_login_limits(user_ids):
+    """Снимает блокировки и обнуляет окна неудачных попыток пользователей в Redis (разблокировка из админки)."""
+    client = get_redis()
+    user_ids = list(user_ids)
+    if client is None or not user_ids:
+        return
+    try:
+        client.delete(*[login_ban_key(user_id) for user_id in user_ids])
+        client.delete(*[login_failures_key("user", user_id) for user_id in user_ids])
+    except RedisError:
+        logger.warning("Не удалось снять блокировки входа в Redis", exc_info=True)
+
+
+def flush_login_attempts():
+    """
+    Переносит накопленные в Redis попытки входа в LoginAttempt пачками по LOGIN_ATTEMPTS_BATCH_SIZE.
+    Список сначала переименовывается (RENAMENX не затирает недописанный список прошлого запуска),
+    поэтому новые попытки не теряются. Параллельные запуски исключены блокировкой, а каждая попытка
+    несёт уникальный ключ: пачка, записанная повторно после сбоя между INSERT и LTRIM, не создаёт дублей.
+    Попытки удалённых пользователей отбрасываются. Возвращает число перенесённых попыток.
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+    if not client.set(LOGIN_ATTEMPTS_FLUSH_LOCK_KEY, 1, nx=True, ex=LOGIN_ATTEMPTS_FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush_login_attempts(client)
+    finally:
+        client.delete(LOGIN_ATTEMPTS_FLUSH_LOCK_KEY)
+
+
+def _flush_login_attempts(client):
+    try:
+        client.renamenx(LOGIN_ATTEMPTS_PENDING_KEY, LOGIN_ATTEMPTS_FLUSHING_KEY)
+    except ResponseError:
+        # Новых попыток нет, но может остаться недописанный список
+        pass
+    flushed = 0
+    while True:
+        items = client.lrange(LOGIN_ATTEMPTS_FLUSHING_KEY, 0, LOGIN_ATTEMPTS_BATCH_SIZE - 1)
+        if not items:
+            break
+        attempts = [json.loads(item) for item in items]
+        user_ids = set(
+            User.objects.filter(pk__in={attempt["user"] for attempt in attempts}).values_list("pk", flat=True)
+        )
+        LoginAttempt.objects.bulk_create(
+            [
+                LoginAttempt(
+                    key=attempt["key"],
+                    user_id=attempt["user"],
+                    success=attempt["success"],
+                    ip=attempt["ip"],
+                    created_at=datetime.fromtimestamp(attempt["at"], tz=UTC),
+                )
+                for attempt in attempts
+                if attempt["user"] in user_ids
+            ],
+            ignore_conflicts=True,
+        )
+        client.ltrim(LOGIN_ATTEMPTS_FLUSHING_KEY, len(items), -1)
+        client.expire(LOGIN_ATTEMPTS_FLUSH_LOCK_KEY, LOGIN_ATTEMPTS_FLUSH_LOCK_TIMEOUT)
+        flushed += len(items)
+    return flushed
+
+
+def get_client_ip(request):
+    """
+    IP клиента для ограничений входа. За nginx REMOTE_ADDR — адрес прокси, поэтому берётся
+    X-Real-IP, который nginx выставляет сам (в отличие от X-Forwarded-For, его клиент подделать не может).
+    """
+    return request.META.get("HTTP_X_REAL_IP") or request.META.get("REMOTE_ADDR")
+
+
+def _login_code_hash(user: User, code: str) -> str:
+    """HMAC кода на SECRET_KEY; id пользователя в сообщении делает хэши одинаковых кодов разными."""
+    return salted_hmac("users.LoginCode", f"{user.pk}:{code}").hexdigest()
+
+
+def issue_login_code(user: User) -> str:
+    """Создаёт новый 4-значный код входа (прежний перестаёт действовать) и возвращает его для отправки."""
+    code = str(secrets.randbelow(9000) + 1000)
+    LoginCode.objects.update_or_create(
+        user=user,
+        defaults={"code_hash": _login_code_hash(user, code), "expires_at": timezone.now() + LOGIN_CODE_TTL},
+    )
+    return code
+
+
+def verify_login_code(user: User, code: str) -> bool:
+    """
+    Проверяет код входа сравнением HMAC за постоянное время.
+    Верный код погашается: удаление строки удаётся только одному из параллельных запросов.
+    """
+    login_code = LoginCode.objects.filter(user=user, expires_at__gt=timezone.now()).first()
+    if login_code is None or not constant_time_compare(login_code.code_hash, _login_code_hash(user, str(code))):
+        return False
+    deleted, _ = LoginCode.objects.filter(pk=login_code.pk, code_hash=login_code.code_hash).delete()
+    return bool(deleted)
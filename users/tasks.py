@@ -1,21 +1,11 @@
+import logging
+
 from celery import shared_task
 from django.core.mail import send_mail
 
-import users
-from users.models import User
-
-
-@shared_task
-def clear_user_password(user_id):
-    """Удаление пароля через 5 минут после назначения"""
+from users.services import flush_login_attempts
 
-    try:
-        user = User.objects.get(id=user_id)
-    except users.models.User.DoesNotExist:
-        pass
-    else:
-        user.set_password("")
-        user.save(update_fields=["password"])
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -30,3 +20,11 @@ def send_message(subject, message, from_email, recipient_list):
         from_email,
         recipient_list,
     )
+
+
+@shared_task
+def flush_login_attempts_task():
+    """Переносит накопленные в Redis попытки входа в БД (по расписанию Celery beat)."""
+    created = flush_login_attempts()
+    if created:
+        logger.info(f"Записано попыток входа: {created}")
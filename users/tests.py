@@ -1,13 +1,30 @@
 # ─── Стандартные библиотеки ──────────────────────────────────────────────
+import os
 from datetime import timedelta
+from unittest import mock
 
 # ─── Первый уровень ────────────────────────────────────────────────────
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
+from rest_framework import status
 
 # ─── Второй уровень / Приложения разработки ───────────────────────────────
-from users.models import User
-from users.services import BAN_STEPS, check_ban, record_login_attempt
+from all_fixture import redis_client
+from mailings.models import OutgoingEmail
+from users.models import LoginAttempt, LoginCode, User
+from users.services import (
+    BAN_STEPS,
+    LOGIN_ATTEMPTS_FLUSHING_KEY,
+    LOGIN_ATTEMPTS_PENDING_KEY,
+    LOGIN_IP_ATTEMPTS_LIMIT,
+    _login_code_hash,
+    check_ban,
+    flush_login_attempts,
+    get_login_state,
+    issue_login_code,
+    record_login_attempt,
+)
 
 '''
 
@@ -174,3 +191,146 @@ class BanEscalationTest(TestCase):
         self.assertEqual(user.failed_login_count, 0)
         self.assertEqual(user.ban_level, 0)
         self.assertIsNone(user.ban_until)
+
+
+# ────────────────────────────────────────────────────────────
+# Тесты одноразовых кодов входа
+# ────────────────────────────────────────────────────────────
+class LoginCodeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="code@example.com", password="pwd", phone_number="+79990000010")
+        self.password = self.user.password
+        self.verify_url = reverse("users:auth-verify")
+
+    def verify(self, code):
+        return self.client.post(self.verify_url, {"email": self.user.email, "code": code})
+
+    def test_code_sent_without_touching_password(self):
+        """Код уходит письмом, в БД хранится только его HMAC, пароль не меняется"""
+        response = self.client.post(reverse("users:auth-list"), {"email": self.user.email})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        login_code = LoginCode.objects.get(user=self.user)
+        email = OutgoingEmail.objects.get()
+        code = next(code for code in map(str, range(1000, 10000)) if f">{code}<" in email.body)
+        self.assertEqual(login_code.code_hash, _login_code_hash(self.user, code))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, self.password)
+
+        response = self.verify(code)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access_token", response.cookies)
+
+    def test_code_is_single_use(self):
+        """Код действует один раз, новый код заменяет прежний"""
+        old_code = issue_login_code(self.user)
+        code = issue_login_code(self.user)
+        if old_code != code:
+            self.assertEqual(self.verify(old_code).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.verify(code).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.verify(code).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_code(self):
+        """Просроченный код не принимается"""
+        code = issue_login_code(self.user)
+        LoginCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.verify(code)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["remaining_attempts"], 4)
+
+
+# ────────────────────────────────────────────────────────────
+# Тесты ограничений входа в Redis
+# ────────────────────────────────────────────────────────────
+@override_settings(REDIS_URL=os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"))
+class RedisLoginLimitsTest(TestCase):
+    def setUp(self):
+        redis_client._client = None
+        self.redis = redis_client.get_redis()
+        try:
+            self.redis.flushdb()
+        except Exception:
+            self.skipTest("Redis недоступен")
+        self.user = User.objects.create_user(email="limits@example.com", password="pwd", phone_number="+79990000020")
+
+    def tearDown(self):
+        self.redis.flushdb()
+        redis_client._client = None
+
+    def test_ban_without_db_writes_per_attempt(self):
+        """Неудачные попытки копятся в Redis, в БД пишется только сама блокировка"""
+        for _ in range(4):
+            record_login_attempt(self.user, success=False, ip="10.0.0.1")
+        self.assertEqual(get_login_state(self.user).remaining_attempts, 1)
+        with self.assertNumQueries(1):
+            state = record_login_attempt(self.user, success=False, ip="10.0.0.1")
+        self.assertEqual(state.remaining_attempts, 0)
+        self.assertIsNotNone(state.blocked_until)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.ban_level, 1)
+        self.assertLessEqual(user.ban_until - timezone.now(), BAN_STEPS[0])
+        with self.assertNumQueries(0), self.assertRaises(PermissionError):
+            check_ban(user)
+
+        self.assertFalse(LoginAttempt.objects.exists())
+        self.assertEqual(flush_login_attempts(), 5)
+        self.assertEqual(LoginAttempt.objects.filter(user=self.user, success=False, ip="10.0.0.1").count(), 5)
+        self.assertEqual(flush_login_attempts(), 0)
+
+    def test_reset_on_success(self):
+        """Успешный вход снимает блокировку и в Redis, и в БД"""
+        for _ in range(5):
+            record_login_attempt(self.user, success=False)
+        record_login_attempt(self.user, success=True)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.ban_level, self.user.ban_until), (0, None))
+        check_ban(self.user)
+
+    def test_db_ban_respected(self):
+        """Блокировка, выставленная в БД (до включения Redis или в админке), тоже действует"""
+        self.user.ban_until = timezone.now() + timedelta(hours=1)
+        self.user.save(update_fields=["ban_until"])
+        with self.assertRaises(PermissionError):
+            check_ban(self.user)
+        self.assertEqual(get_login_state(self.user).remaining_attempts, 0)
+
+    def test_flush_in_batches_without_duplicates(self):
+        """Попытки переносятся пачками, повторный перенос той же пачки после сбоя не создаёт дублей"""
+        for _ in range(3):
+            record_login_attempt(self.user, success=False)
+        self.redis.rename(LOGIN_ATTEMPTS_PENDING_KEY, LOGIN_ATTEMPTS_FLUSHING_KEY)
+        with mock.patch("users.services.LOGIN_ATTEMPTS_BATCH_SIZE", 2):
+            # Сбой после INSERT первой пачки: LTRIM не выполнен
+            with mock.patch.object(self.redis, "ltrim", side_effect=ConnectionError), self.assertRaises(ConnectionError):
+                flush_login_attempts()
+            record_login_attempt(self.user, success=False)
+            self.assertEqual(flush_login_attempts(), 3)
+            self.assertEqual(flush_login_attempts(), 1)
+        self.assertEqual(LoginAttempt.objects.filter(user=self.user).count(), 4)
+
+    def test_ip_window(self):
+        """IP блокируется по числу неудач с него на разные аккаунты, другие IP не затрагиваются"""
+        for number in range(LOGIN_IP_ATTEMPTS_LIMIT):
+            user = User.objects.create_user(
+                email=f"victim{number}@example.com", password="pwd", phone_number=f"+7999100{number:04d}"
+            )
+            record_login_attempt(user, success=False, ip="10.0.0.2")
+        with self.assertRaises(PermissionError):
+            check_ban(self.user, "10.0.0.2")
+        check_ban(self.user, "10.0.0.3")
+
+    def test_ip_from_proxy_header(self):
+        """За прокси IP берётся из X-Real-IP: блокировка одного IP не задевает остальных клиентов"""
+        url = reverse("users:auth-verify")
+        for number in range(LOGIN_IP_ATTEMPTS_LIMIT):
+            user = User.objects.create_user(
+                email=f"victim{number}@example.com", password="pwd", phone_number=f"+7999100{number:04d}"
+            )
+            response = self.client.post(url, {"email": user.email, "code": "0000"}, HTTP_X_REAL_IP="10.0.0.4")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {"email": self.user.email, "code": "0000"}
+        response = self.client.post(url, data, HTTP_X_REAL_IP="10.0.0.4")
+        self.assertEqual(response.status_code, status.HTTP_423_LOCKED)
+        response = self.client.post(url, data, HTTP_X_REAL_IP="10.0.0.5")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
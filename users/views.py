@@ -1,10 +1,7 @@
 import logging
-import random
 from datetime import timedelta
 
 from django.conf import settings
-from django.contrib.auth import authenticate
-from django.core.mail import EmailMessage
 from django.utils.timezone import now
 from drf_spectacular.utils import (
     OpenApiExample,
@@ -35,7 +32,7 @@ from all_fixture.views_fixture import (
     USER_ID,
     USER_SETTINGS,
 )
-from config.settings import EMAIL_HOST_USER
+from mailings.services import queue_email
 from users.models import User
 from users.permissions import IsAdminOrOwner
 from users.serializers import (
@@ -52,7 +49,14 @@ from users.serializers import (
     VerifyCodeResponseSerializer,
     VerifyCodeSerializer,
 )
-from users.services import check_ban, get_login_state, record_login_attempt
+from users.services import (
+    check_ban,
+    get_client_ip,
+    get_login_state,
+    issue_login_code,
+    record_login_attempt,
+    verify_login_code,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -120,10 +124,7 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        code = random.randint(1000, 9999)
-        user.set_password(str(code))
-        user.save(update_fields=["password"])
-
+        code = issue_login_code(user)
         self.send_email(user.email, code)
 
         return Response(
@@ -133,8 +134,8 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
 
     @staticmethod
     def send_email(email, code):
-        """Отправка email с кодом."""
-        email_message = EmailMessage(
+        """Постановка email с кодом в очередь отправки."""
+        queue_email(
             subject="Ваш код для входа",
             body=f"""
                 <html>
@@ -146,11 +147,10 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
                     </body>
                 </html>
             """,
-            from_email=EMAIL_HOST_USER,
-            to=[email],
+            recipients=[email],
+            is_html=True,
+            sensitive=True,
         )
-        email_message.content_subtype = "html"
-        email_message.send()
 
     @extend_schema(
         summary="Подтвердить код и установить токены",
@@ -200,10 +200,11 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
             return Response({"error": "Аккаунт деактивирован"}, status=status.HTTP_403_FORBIDDEN)
 
         # активная блокировка — сразу 423 + детали
+        ip = get_client_ip(request)
         try:
-            check_ban(user)
+            check_ban(user, ip)
         except PermissionError:
-            state = get_login_state(user)
+            state = get_login_state(user, ip)
             return Response(
                 {
                     "error": "Слишком много неверных попыток",
@@ -212,12 +213,11 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
                 },
                 status=status.HTTP_423_LOCKED,
             )
-        # ─── 2. Пробуем аутентифицировать по коду ────────────────────────────────
-        authenticated_user = authenticate(email=email, password=str(code))
-        success = authenticated_user is not None
+        # ─── 2. Проверяем одноразовый код ────────────────────────────────────────
+        success = verify_login_code(user, code)
 
         # ─── 3. Записываем попытку ───────────────────────────────────────────────
-        state = record_login_attempt(user, success, request.META.get("REMOTE_ADDR"))
+        state = record_login_attempt(user, success, ip)
         if not success:
             return Response(
                 {
@@ -228,9 +228,9 @@ class AuthViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         # ─── 4. Всё ок – выдаем токены и куки (оригинальный код без изменений) ───
-        refresh = RefreshToken.for_user(authenticated_user)
+        refresh = RefreshToken.for_user(user)
         response = Response(
-            {"role": authenticated_user.role, "id": authenticated_user.id},
+            {"role": user.role, "id": user.id},
             status=status.HTTP_200_OK,
         )
 
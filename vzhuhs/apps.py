@@ -5,3 +5,6 @@ class VzhuhConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "vzhuhs"
     verbose_name = "ВЖУХИ"
+
+    def ready(self):
+        import vzhuhs.signals  # noqa: F401
@@ -14,6 +14,12 @@ class VzhuhPhoto(models.Model):
     photos = models.ImageField(
         upload_to="vzhuhs_photos/",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Варианты фотографии",
+        help_text="Уменьшенные копии фотографии в WebP и JPEG, строятся в фоне",
+    )
 
     class Meta:
         verbose_name = "Фото Вжуха"
@@ -3,22 +3,19 @@ from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.fields import DecimalField
 
+from all_fixture.images import ImageVariantsField
 from hotels.models import Hotel
-from hotels.serializers import HotelPhotoSerializer
 from tours.models import Tour
 from vzhuhs.models import Vzhuh, VzhuhPhoto
 
 
-def get_first_photo(self, obj, related_field="hotel_photos"):
+def get_cover_photo(self, hotel):
     """
-    Вспомогательная функция для получения первой фотографии
+    Вспомогательная функция для получения обложки отеля (загружается через select_related).
     """
     request = getattr(self, "context", {}).get("request")
-    related_objects = getattr(obj, related_field, None)
-    first_photo = related_objects.first() if related_objects else None
-    if first_photo:
-        serializer = HotelPhotoSerializer(first_photo, context={"request": request})
-        photo_url = serializer.data["photo"]
+    if hotel.cover_photo:
+        photo_url = hotel.cover_photo.photo.url
         return request.build_absolute_uri(photo_url) if request else photo_url
     return None
 
@@ -28,9 +25,11 @@ class VzhuhPhotoSerializer(serializers.ModelSerializer):
     Сериализатор для фотографий Вжуха.
     """
 
+    variants = ImageVariantsField(source="image_variants")
+
     class Meta:
         model = VzhuhPhoto
-        fields = ("photos",)
+        fields = ("photos", "variants")
 
 
 class VzhuhHotelShortSerializer(serializers.ModelSerializer):
@@ -58,9 +57,9 @@ class VzhuhHotelShortSerializer(serializers.ModelSerializer):
     @extend_schema_field(serializers.ImageField(allow_null=True))
     def get_photo(self, obj: Hotel):
         """
-        Возвращает первую фотографию отеля, если она доступна.
+        Возвращает обложку отеля, если она есть.
         """
-        return get_first_photo(self, obj, "hotel_photos")
+        return get_cover_photo(self, obj)
 
     @extend_schema_field(
         serializers.DecimalField(
@@ -73,7 +72,10 @@ class VzhuhHotelShortSerializer(serializers.ModelSerializer):
     def get_total_price(self, obj: Hotel):
         """
         Вычисляет минимальную цену по связанным турам отеля, если они есть.
+        Берётся из hotel_min_prices в контексте (load_vzhuh_hotels_data), если цены загружены.
         """
+        if "hotel_min_prices" in self.context:
+            return self.context["hotel_min_prices"].get(obj.id)
         total_price = obj.tours.filter(total_price__isnull=False).aggregate(Min("total_price"))["total_price__min"]
         return total_price
 
@@ -121,10 +123,10 @@ class VzhuhTourShortSerializer(serializers.ModelSerializer):
     @extend_schema_field(serializers.ImageField(allow_null=True))
     def get_photo(self, obj: Tour):
         """
-        Возвращает первую фотографию отеля, связанного с туром, если она доступна.
+        Возвращает обложку отеля, связанного с туром, если она есть.
         """
         if obj.hotel:
-            return get_first_photo(self, obj.hotel, "hotel_photos")
+            return get_cover_photo(self, obj.hotel)
         return None
 
     @extend_schema_field(serializers.IntegerField(allow_null=True))
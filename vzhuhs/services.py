@@ -0,0 +1,115 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Min
+from redis.exceptions import RedisError
+
+from all_fixture.redis_client import get_redis, redis_key
+from tours.models import Tour
+from vzhuhs.models import Vzhuh
+
+logger = logging.getLogger(__name__)
+
+# Метка в множестве пула: отличает собранный пустой пул от ещё не собранного
+POOL_SENTINEL = "-"
+POOL_TIMEOUT = 60 * 60 * 24
+VISITOR_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_pool_version(client):
+    return int(client.get(redis_key("vzhuh", "pool_version")) or 0)
+
+
+def get_pool_key(client, departure_city):
+    """
+    Множество id опубликованных Вжухов города вылета, при отсутствии собирается из БД.
+    Версия пула в ключе меняется при публикации/снятии Вжухов, старые пулы истекают сами.
+    """
+    city = departure_city.strip().lower() or "all"
+    pool_key = redis_key("vzhuh", "pool", get_pool_version(client), city)
+    if not client.exists(pool_key):
+        queryset = Vzhuh.objects.filter(is_published=True)
+        if departure_city:
+            queryset = queryset.filter(departure_city__iexact=departure_city)
+        pipe = client.pipeline()
+        pipe.sadd(pool_key, POOL_SENTINEL, *queryset.values_list("id", flat=True))
+        pipe.expire(pool_key, POOL_TIMEOUT)
+        pipe.execute()
+    return pool_key
+
+
+def next_vzhuh_id(departure_city, visitor=None):
+    """
+    Следующий непоказанный посетителю Вжух (SPOP из его копии пула).
+    Когда все Вжухи показаны, копия пула собирается заново без последнего показанного.
+    Без visitor (посетитель ещё не вернул cookie) — случайный Вжух пула без копии и истории показов,
+    чтобы запросы без cookie не создавали в Redis новых ключей.
+    Возвращает None, если в городе нет опубликованных Вжухов.
+    """
+    client = get_redis()
+    pool_key = get_pool_key(client, departure_city)
+    if visitor is None:
+        for chosen in client.srandmember(pool_key, 2):
+            if chosen != POOL_SENTINEL.encode():
+                return int(chosen)
+        return None
+    remaining_key = f"{pool_key}:remaining:{visitor}"
+    last_key = redis_key("vzhuh", "last", departure_city.strip().lower() or "all", visitor)
+
+    chosen = client.spop(remaining_key)
+    if chosen is None:
+        pipe = client.pipeline()
+        pipe.sunionstore(remaining_key, [pool_key])
+        pipe.srem(remaining_key, POOL_SENTINEL)
+        pipe.expire(remaining_key, VISITOR_TIMEOUT)
+        pipe.get(last_key)
+        *_, last = pipe.execute()
+        if last is not None and client.scard(remaining_key) > 1:
+            client.srem(remaining_key, last)
+        chosen = client.spop(remaining_key)
+        if chosen is None:
+            return None
+    client.set(last_key, chosen, ex=VISITOR_TIMEOUT)
+    return int(chosen)
+
+
+def random_vzhuh_id(departure_city):
+    """Случайный опубликованный Вжух из БД без истории показов (если Redis недоступен)."""
+    queryset = Vzhuh.objects.filter(is_published=True)
+    if departure_city:
+        queryset = queryset.filter(departure_city__iexact=departure_city)
+    return queryset.order_by("?").values_list("id", flat=True).first()
+
+
+def invalidate_vzhuh_pools():
+    """Сбрасывает пулы Вжухов после фиксации транзакции: следующие запросы соберут их заново."""
+
+    def invalidate():
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.incr(redis_key("vzhuh", "pool_version"))
+        except RedisError:
+            logger.warning("Не удалось сбросить пулы Вжухов в Redis", exc_info=True)
+
+    transaction.on_commit(invalidate)
+
+
+def load_vzhuh_hotels_data(vzhuhs):
+    """
+    Минимальные цены туров по отелям Вжухов одним групповым запросом на любое число отелей.
+    Вжухи должны быть загружены с prefetch_related("hotels", "tours").
+    Результат передаётся в контекст VzhuhSerializer, обложки отелей берутся через select_related.
+    """
+    hotel_ids = set()
+    for vzhuh in vzhuhs:
+        hotel_ids.update(hotel.id for hotel in vzhuh.hotels.all())
+        hotel_ids.update(tour.hotel_id for tour in vzhuh.tours.all() if tour.hotel_id)
+    min_prices = (
+        Tour.objects.filter(hotel_id__in=hotel_ids, total_price__isnull=False)
+        .order_by()
+        .values("hotel_id")
+        .annotate(min_price=Min("total_price"))
+    )
+    return {"hotel_min_prices": {row["hotel_id"]: row["min_price"] for row in min_prices}}
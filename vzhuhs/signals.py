@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from all_fixture.images import register_image_variants
+from vzhuhs.models import Vzhuh, VzhuhPhoto
+from vzhuhs.services import invalidate_vzhuh_pools
+
+register_image_variants(VzhuhPhoto, "photos")
+
+
+@receiver([post_save, post_delete], sender=Vzhuh)
+def vzhuh_changed(sender, instance, **kwargs):
+    """Пересборка пулов ротации при публикации, снятии с публикации или смене города вылета."""
+    invalidate_vzhuh_pools()
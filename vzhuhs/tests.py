@@ -1 +1,104 @@
-# Create your tests here.
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from all_fixture import redis_client
+from all_fixture.tests.test_temp_image import create_test_image
+from hotels.models import Hotel, HotelPhoto
+from hotels.services import update_cover_photos
+from tours.models import Tour
+from vzhuhs.models import Vzhuh
+
+
+@override_settings(REDIS_URL=None)
+class VzhuhRotationTest(TestCase):
+    def setUp(self):
+        self.url = reverse("vzhuhs:vzhuh-list")
+        self.vzhuh = Vzhuh.objects.create(departure_city="Москва", arrival_city="Сочи")
+        Vzhuh.objects.create(departure_city="Москва", arrival_city="Казань", is_published=False)
+
+    def test_published_vzhuh_without_redis(self):
+        """Без Redis Вжух выбирается из опубликованных в БД"""
+        response = self.client.get(self.url, {"departure_city": "москва"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.vzhuh.id)
+        self.assertIn("vzhuh_visitor", response.cookies)
+
+    def test_unknown_departure_city(self):
+        """Город вылета без опубликованных Вжухов"""
+        response = self.client.get(self.url, {"departure_city": "Омск"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hotels_loaded_in_batch(self):
+        """Цены и фотографии отелей Вжуха загружаются постоянным числом запросов"""
+        media_root = tempfile.mkdtemp(prefix="test_media_")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        first_photos = {}
+        with self.settings(MEDIA_ROOT=media_root):
+            for i in range(3):
+                hotel = Hotel.objects.create(name=f"Отель {i}", country="Россия", city="Сочи")
+                for _ in range(2):
+                    HotelPhoto.objects.create(hotel=hotel, photo=create_test_image())
+                update_cover_photos([hotel.id])
+                hotel.refresh_from_db()
+                first_photos[hotel.id] = hotel.cover_photo.photo.url
+                for price in (Decimal("90000.00"), Decimal("80000.00")):
+                    tour = Tour.objects.create(
+                        start_date=date(2026, 7, 1),
+                        end_date=date(2026, 7, 8),
+                        departure_country="Россия",
+                        departure_city="Москва",
+                        arrival_country="Россия",
+                        arrival_city="Сочи",
+                        hotel=hotel,
+                        total_price=price,
+                    )
+                    self.vzhuh.tours.add(tour)
+                self.vzhuh.hotels.add(hotel)
+
+            # Выбор id, Вжух, туры с отелями и обложками, отели с обложками, фотографии Вжуха, минимальные цены
+            with self.assertNumQueries(6):
+                response = self.client.get(self.url, {"departure_city": "Москва"})
+        self.assertEqual(len(response.data["hotels"]), 3)
+        for hotel in response.data["hotels"]:
+            self.assertEqual(hotel["total_price"], Decimal("80000.00"))
+            self.assertTrue(hotel["photo"].endswith(first_photos[hotel["id"]]))
+
+
+@override_settings(REDIS_URL=os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"))
+class RedisVzhuhRotationTest(TestCase):
+    def setUp(self):
+        redis_client._client = None
+        self.redis = redis_client.get_redis()
+        try:
+            self.redis.flushdb()
+        except Exception:
+            self.skipTest("Redis недоступен")
+        self.url = reverse("vzhuhs:vzhuh-list")
+        self.vzhuhs = [Vzhuh.objects.create(departure_city="Москва", arrival_city=f"Город {i}") for i in range(3)]
+
+    def tearDown(self):
+        self.redis.flushdb()
+        redis_client._client = None
+
+    def test_no_visitor_keys_without_cookie(self):
+        """Запросы без cookie не создают в Redis копий пула и истории показов"""
+        for _ in range(5):
+            self.client.cookies.clear()
+            response = self.client.get(self.url, {"departure_city": "Москва"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn("vzhuh_visitor", response.cookies)
+        self.assertEqual(self.redis.keys("*remaining*"), [])
+        self.assertEqual(self.redis.keys("*last*"), [])
+
+    def test_rotation_with_cookie(self):
+        """С вернувшейся cookie Вжухи показываются по кругу без повторов"""
+        self.client.get(self.url, {"departure_city": "Москва"})
+        shown = [self.client.get(self.url, {"departure_city": "Москва"}).data["id"] for _ in range(3)]
+        self.assertCountEqual(shown, [vzhuh.id for vzhuh in self.vzhuhs])
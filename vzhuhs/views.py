@@ -1,20 +1,25 @@
 import logging
-import random
+import uuid
 
 from dal import autocomplete
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from redis.exceptions import RedisError
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from all_fixture.redis_client import get_redis
+from all_fixture.trigram import AUTOCOMPLETE_LIMIT, trigram_search
 from all_fixture.views_fixture import VZHUH_SETTINGS
 from hotels.models import Hotel
 from tours.models import Tour
 from vzhuhs.filters import VzhuhFilter
 from vzhuhs.models import Vzhuh
 from vzhuhs.serializers import VzhuhSerializer
+from vzhuhs.services import load_vzhuh_hotels_data, next_vzhuh_id, random_vzhuh_id
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +45,9 @@ class VzhuhViewSet(ReadOnlyModelViewSet):
     - Возвращает только записи с `is_published=True`.
 
     - Добавлена фильтрация по `departure_city` - городу отправления, поле обязательное.
+
+    - Вжухи показываются по кругу без повторов: пул опубликованных id города и непоказанные
+      посетителю id хранятся в Redis, из БД загружается только выбранный Вжух.
     """
 
     queryset = Vzhuh.objects.none()
@@ -47,81 +55,61 @@ class VzhuhViewSet(ReadOnlyModelViewSet):
     filterset_class = VzhuhFilter
     serializer_class = VzhuhSerializer
 
-    SESSION_KEY = "vzhuh_history"
-    MAX_HISTORY = 500  # Максимальная длина истории
+    VISITOR_COOKIE = "vzhuh_visitor"
+    VISITOR_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+    MAX_ATTEMPTS = 3  # Сколько раз выбирать заново, если Вжух сняли с публикации после сборки пула
 
     def get_queryset(self):
-        return (
-            Vzhuh.objects.prefetch_related(
-                "tours__hotel__hotel_photos",
-                "hotels__tours",
-                "hotels__hotel_photos",
-                "photos",
-            )
-            .filter(
-                is_published=True,
-            )
-            .distinct()
-            .order_by("?")
+        return Vzhuh.objects.prefetch_related(
+            Prefetch("tours", queryset=Tour.objects.select_related("hotel__cover_photo")),
+            Prefetch("hotels", queryset=Hotel.objects.select_related("cover_photo")),
+            "photos",
+        ).filter(
+            is_published=True,
         )
 
+    def get_visitor(self, request):
+        """Посетитель для истории показов: пользователь или анонимный идентификатор из cookie."""
+        if request.user.is_authenticated:
+            return f"user:{request.user.pk}", None
+        visitor = request.COOKIES.get(self.VISITOR_COOKIE, "")
+        if len(visitor) == 32 and visitor.isalnum():
+            return visitor, None
+        visitor = uuid.uuid4().hex
+        return visitor, visitor
+
     def list(self, request, *args, **kwargs):
-        qs = self.filter_queryset(self.get_queryset())
-        all_ids = set(qs.values_list("id", flat=True))
-        if not all_ids:
-            return Response({"error": "Вжух не найден."}, status=status.HTTP_404_NOT_FOUND)
-
-        # Получаем историю показов
-        seen = request.session.get(self.SESSION_KEY, [])
-        # Ограничиваем размер истории
-        if len(seen) > self.MAX_HISTORY:
-            # fmt: off
-            seen = seen[-self.MAX_HISTORY:]
-            # fmt: on
-
-        # Создаем список доступных ID
-        remaining = [item_id for item_id in all_ids if item_id not in seen]
-
-        if not remaining:
-            # При сбросе цикла исключаем последний показанный
-            last_seen = seen[-1] if seen else None
-            pool = [item_id for item_id in all_ids if item_id != last_seen]
-            if not pool:  # На случай, если всего 1 объект
-                pool = list(all_ids)
-            chosen_id = random.choice(pool)
-            seen = [chosen_id]  # Начинаем новую историю
-        else:
-            # Если сущностей всего 2, чередуем их
-            if len(all_ids) == 2 and len(seen) > 1:
-                if seen[-1] == seen[-2]:
-                    # Если последняя сущность такая же, как предыдущая, выбираем другую
-                    seen.pop()
-                    chosen_id = next(item_id for item_id in all_ids if item_id != seen[-1])
-                    seen.append(chosen_id)
-                else:
-                    chosen_id = remaining[random.randint(0, len(remaining) - 1)]
-                    seen.append(chosen_id)
-            else:
-                # Более эффективный выбор случайного элемента
-                chosen_id = remaining[random.randint(0, len(remaining) - 1)]
-                seen.append(chosen_id)
-
-        # Обновляем сессию
-        request.session[self.SESSION_KEY] = seen
-        request.session.modified = True
-
-        # Безопасное получение объекта
-        try:
-            instance = qs.get(id=chosen_id)
-        except Vzhuh.DoesNotExist:
-            # Удаляем несуществующий ID из истории
-            seen.remove(chosen_id)
-            request.session[self.SESSION_KEY] = seen
-            request.session.modified = True
-            return Response({"error": "Объект больше не доступен"}, status=410)
-
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        departure_city = request.query_params.get("departure_city", "")
+        visitor, new_cookie = self.get_visitor(request)
+        # История показов ведётся с запроса, который вернул cookie
+        history_visitor = None if new_cookie else visitor
+        instance = None
+        for _ in range(self.MAX_ATTEMPTS):
+            try:
+                chosen_id = (
+                    next_vzhuh_id(departure_city, history_visitor) if get_redis() else random_vzhuh_id(departure_city)
+                )
+            except RedisError:
+                logger.warning("Redis недоступен, Вжух выбирается из БД без истории показов", exc_info=True)
+                chosen_id = random_vzhuh_id(departure_city)
+            if chosen_id is None:
+                if departure_city:
+                    raise ValidationError(f"Город вылета '{departure_city}' не найден.")
+                return Response({"error": "Вжух не найден."}, status=status.HTTP_404_NOT_FOUND)
+            instance = self.get_queryset().filter(id=chosen_id).first()
+            if instance is not None:
+                break
+        if instance is None:
+            return Response({"error": "Объект больше не доступен"}, status=status.HTTP_410_GONE)
+
+        context = self.get_serializer_context()
+        context.update(load_vzhuh_hotels_data([instance]))
+        response = Response(self.get_serializer(instance, context=context).data)
+        if new_cookie:
+            response.set_cookie(
+                self.VISITOR_COOKIE, new_cookie, max_age=self.VISITOR_COOKIE_MAX_AGE, httponly=True, samesite="Lax"
+            )
+        return response
 
 
 class VzhuhAutocompleteHotel(autocomplete.Select2QuerySetView):
@@ -142,7 +130,7 @@ class VzhuhAutocompleteHotel(autocomplete.Select2QuerySetView):
         if selected_ids:
             qs = qs.exclude(id__in=selected_ids)
         if self.q:
-            qs = qs.filter(name__icontains=self.q)
+            qs = trigram_search(qs, "name", self.q, limit=AUTOCOMPLETE_LIMIT)
         return qs
 
 
@@ -165,5 +153,6 @@ class VzhuhAutocompleteTour(autocomplete.Select2QuerySetView):
         if selected_ids:
             qs = qs.exclude(id__in=selected_ids)
         if self.q:
-            qs = qs.filter(name__icontains=self.q)
+            # У тура нет названия, ищем по названию отеля
+            qs = trigram_search(qs.select_related("hotel"), "hotel__name", self.q, limit=AUTOCOMPLETE_LIMIT)
         return qs